@@ -1,45 +1,81 @@
 import os
+import json
 import shutil
 import logging
-import time
-import json
-import hashlib
 import asyncio
+import math
 import queue
+import re
 import threading
 import tempfile
-from typing import List, Optional
-from collections import OrderedDict
-
-import langid
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response, Request
-from fastapi.responses import StreamingResponse
-
-from app.core.engine import tts_engine
+import time
+import uuid
+from functools import partial
+from typing import List, Optional, Tuple
+
+from fastapi import (
+    APIRouter,
+    UploadFile,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Response,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from pydantic import ValidationError
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.core.engine import DeadlineExceeded, SynthesisCancelled, tts_engine
+from app.core.audio_cache import audio_cache
+from app.core.batch import (
+    NdjsonBatchEncoder,
+    ZipBatchEncoder,
+    BatchStats,
+    plan_batch,
+    run_batch,
+)
+from app.core.incremental import IncrementalSynthesisSession
+from app.core.history import history_store
+from app.core.jobs import MEDIA_TYPES, TERMINAL_STATES, job_manager
+from app.core.scene import (
+    SceneMixer,
+    plan_scene,
+    scene_items,
+    scene_timelines,
+    streaming_wav_header,
+)
+from app.core.scheduler import QuotaExceeded
+from app.core.speaker_registry import SpeakerSnapshot
+from app.core.spill_buffer import SpillBuffer
 from app.core.config import settings
-from app.api.schemas import TTSRequest, OpenAISpeechRequest
+from app.core.lang_id import SUPPORTED_LANGUAGES, language_identifier
+from app.core.timing import RequestTimings
+from app.core.logging_utils import tenant_id_var
+from app.core import metrics
+from app.api.schemas import (
+    TTSRequest,
+    TTSBatchRequest,
+    SceneRequest,
+    LongFormJobRequest,
+    IncrementalStreamStart,
+    OpenAISpeechRequest,
+)
 
 logger = logging.getLogger("API")
 router = APIRouter()
 
-SUPPORTED_LANGUAGES = [
-    "en",
-    "es",
-    "fr",
-    "de",
-    "it",
-    "pt",
-    "pl",
-    "tr",
-    "ru",
-    "nl",
-    "cs",
-    "ar",
-    "zh-cn",
-    "ja",
-    "hu",
-    "ko",
-]
+# nginx geleneği: yanıt hazır olmadan istemci bağlantıyı kapattı.
+CLIENT_CLOSED_REQUEST = 499
+# Çağıranın bekleme bütçesi (sn). Kalan süre sentez tahminine yetmezse istek modele
+# girmeden 504 ile düşer; sentez sırasında dolarsa iş kesilir.
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+# Önbellek anahtarı aynı zamanda içerik kimliğidir: GET /api/tts/audio/{id}.
+AUDIO_CONTENT_ID = re.compile(r"^[0-9a-f]{32}\.(wav|mp3|opus|pcm)$")
+AUDIO_READ_CHUNK = 64 * 1024
+
 LANGUAGE_NAMES = {
     "tr": "Turkish",
     "en": "English",
@@ -60,27 +96,6 @@ LANGUAGE_NAMES = {
 }
 
 
-class MemoryLRUCache:
-    def __init__(self, capacity: int = 100):
-        self.cache: OrderedDict[str, bytes] = OrderedDict()
-        self.capacity = capacity
-
-    def get(self, key: str) -> Optional[bytes]:
-        if key not in self.cache:
-            return None
-        self.cache.move_to_end(key)
-        return self.cache[key]
-
-    def put(self, key: str, value: bytes):
-        self.cache[key] = value
-        self.cache.move_to_end(key)
-        if len(self.cache) > self.capacity:
-            self.cache.popitem(last=False)
-
-
-RAM_CACHE = MemoryLRUCache(capacity=100)
-
-
 async def cleanup_files(file_paths: List[str]):
     for path in file_paths:
         try:
@@ -92,56 +107,146 @@ async def cleanup_files(file_paths: List[str]):
             )
 
 
-def calculate_vca_metrics(
-    start_time: float, char_count: int, audio_bytes: bytes, sample_rate: int = 24000
-) -> dict:
-    process_time = time.perf_counter() - start_time
-    len_bytes = len(audio_bytes) if audio_bytes else 0
-    audio_duration_sec = len_bytes / (sample_rate * 2)
-    rtf = process_time / audio_duration_sec if audio_duration_sec > 0 else 0
+def calculate_vca_metrics(timings: RequestTimings, char_count: int) -> dict:
+    # RTF, motorun ürettiği gerçek örnek sayısından hesaplanır (format/codec bağımsız).
+    rtf = timings.rtf() or 0.0
 
     return {
         "X-VCA-Chars": str(char_count),
-        "X-VCA-Time": f"{process_time:.3f}",
+        "X-VCA-Time": f"{timings.elapsed():.3f}",
         "X-VCA-RTF": f"{rtf:.4f}",
         "X-VCA-Model": settings.MODEL_NAME,
+        "Server-Timing": timings.server_timing(),
     }
 
 
-def generate_deterministic_filename(params: dict, ext: str) -> str:
-    key_data = {
-        "text": params.get("text"),
-        "lang": params.get("language"),
-        "spk": params.get("speaker_idx"),
-        "temp": params.get("temperature"),
-        "speed": params.get("speed"),
-        "fmt": ext,
-    }
-    file_hash = hashlib.md5(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
-    return f"{file_hash}.{ext}"
+def _request_timeout(http_req: Request) -> Optional[float]:
+    raw = http_req.headers.get(REQUEST_TIMEOUT_HEADER)
+    if not raw:
+        return None
+    try:
+        timeout = float(raw)
+    except ValueError:
+        logger.warning(
+            f"Ignoring invalid {REQUEST_TIMEOUT_HEADER} header: '{raw}'",
+            extra={"event": "REQUEST_TIMEOUT_INVALID"},
+        )
+        return None
+    return timeout if timeout > 0 else None
 
 
-async def _get_voices_list() -> list:
-    speakers_map = tts_engine.get_speakers()
-    voices_list = []
+def _deadline_exceeded(e: DeadlineExceeded) -> HTTPException:
+    logger.warning(
+        f"Synthesis dropped: {e}", extra={"event": "REQUEST_DEADLINE_EXCEEDED"}
+    )
+    return HTTPException(status_code=504, detail=str(e))
 
-    openai_voices = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
-    for v in openai_voices:
-        voices_list.append(
-            {"id": v, "name": f"OpenAI {v.capitalize()}", "object": "voice"}
+
+def _quota_exceeded(e: QuotaExceeded) -> HTTPException:
+    logger.warning(
+        f"Synthesis throttled: {e}", extra={"event": "TENANT_QUOTA_EXCEEDED"}
+    )
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
+
+async def _open_stream(params: dict, timings: RequestTimings, **kwargs):
+    """
+    Akış sentezini başlatır (hazırlık, deadline kabulü, tenant kotası) ve chunk üretecini
+    döner. StreamingResponse'tan önce çağrılır: karşılanamayacak deadline 504, kota aşımı
+    429 olarak 200 başlıkları gönderilmeden döner.
+    """
+    try:
+        return await asyncio.to_thread(
+            tts_engine.synthesize_stream, params, timings=timings, **kwargs
+        )
+    except DeadlineExceeded as e:
+        raise _deadline_exceeded(e)
+    except QuotaExceeded as e:
+        raise _quota_exceeded(e)
+
+
+async def _synthesize_until_disconnect(
+    http_req: Request, front_door: str, params: dict, **kwargs
+) -> Optional[bytes]:
+    """
+    Unary sentezi thread'de çalıştırır ve istemci bağlantısını 0.1 sn'de bir yoklar.
+    İstemci ayrılırsa iş bir sonraki GPT adımında iptal edilir (model kilidi hemen
+    bırakılır) ve None döner. Deadline aşımı 504, tenant kotası aşımı 429 olarak
+    yükseltilir.
+    """
+    cancel_event = threading.Event()
+    job = asyncio.ensure_future(
+        asyncio.to_thread(
+            tts_engine.synthesize, params, is_aborted_cb=cancel_event.is_set, **kwargs
         )
+    )
+    try:
+        while True:
+            done, _ = await asyncio.wait({job}, timeout=0.1)
+            if done:
+                return job.result()
+            if await http_req.is_disconnected():
+                break
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+    except DeadlineExceeded as e:
+        raise _deadline_exceeded(e)
+    except QuotaExceeded as e:
+        raise _quota_exceeded(e)
+
+    logger.warning(
+        "HTTP Client disconnected during synthesis. Cancelling job.",
+        extra={"event": "HTTP_CLIENT_DISCONNECT"},
+    )
+    metrics.record_stream_abort(front_door, "client_disconnect")
+    cancel_event.set()
+    try:
+        # Sentez iptalden hemen önce bittiyse sonuç yine döner (önbelleğe yazılabilir).
+        return await job
+    except SynthesisCancelled:
+        return None
+
+
+OPENAI_VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+
+# Speaker indeksi her değiştiğinde yeniden hesaplanan hazır yanıtlar
+VOICE_PAYLOADS: dict = {"voices": [], "models": {"object": "list", "data": []}}
+
+
+def _build_voice_payloads(snapshot: SpeakerSnapshot):
+    voices_list = [
+        {"id": v, "name": f"OpenAI {v.capitalize()}", "object": "voice"}
+        for v in OPENAI_VOICES
+    ]
+    for spk_name, styles in sorted(snapshot.styles.items()):
+        voices_list.append({"id": spk_name, "name": spk_name, "object": "voice"})
+        for style in sorted(styles):
+            if style.lower() != spk_name.lower():
+                variant_id = f"{spk_name}/{style}"
+                voices_list.append(
+                    {"id": variant_id, "name": variant_id, "object": "voice"}
+                )
+
+    models_data = [
+        {"id": v["id"], "object": "model", "name": v.get("name", v["id"])}
+        for v in voices_list
+    ]
+    # dict.update GIL altında tek adımda uygulanır; handler'lar kilitsiz okur.
+    VOICE_PAYLOADS.update(
+        {"voices": voices_list, "models": {"object": "list", "data": models_data}}
+    )
 
-    if isinstance(speakers_map, dict):
-        for spk_name, styles in sorted(speakers_map.items()):
-            voices_list.append({"id": spk_name, "name": spk_name, "object": "voice"})
-            if isinstance(styles, list):
-                for style in sorted(styles):
-                    if style.lower() != spk_name.lower():
-                        variant_id = f"{spk_name}/{style}"
-                        voices_list.append(
-                            {"id": variant_id, "name": variant_id, "object": "voice"}
-                        )
-    return voices_list
+
+tts_engine.speaker_registry.subscribe(_build_voice_payloads)
+
+
+async def _get_voices_list() -> list:
+    return VOICE_PAYLOADS["voices"]
 
 
 @router.get("/favicon.ico", include_in_schema=False)
@@ -182,12 +287,7 @@ async def get_public_config():
 
 @router.get("/v1/models")
 async def list_models():
-    voices = await _get_voices_list()
-    models_data = [
-        {"id": v["id"], "object": "model", "name": v.get("name", v["id"])}
-        for v in voices
-    ]
-    return {"object": "list", "data": models_data}
+    return VOICE_PAYLOADS["models"]
 
 
 @router.get("/v1/audio/voices")
@@ -197,19 +297,21 @@ async def list_voices_custom():
 
 
 @router.post("/v1/audio/speech")
-async def openai_speech_endpoint(request: OpenAISpeechRequest):
+async def openai_speech_endpoint(request: OpenAISpeechRequest, http_req: Request):
     if not request.input or not request.input.strip():
         raise HTTPException(status_code=422, detail="Input text cannot be empty.")
 
+    timings = RequestTimings(
+        "openai", tenant_id_var.get(), timeout=_request_timeout(http_req)
+    )
     detected_lang = settings.DEFAULT_LANGUAGE
     try:
-        lang_code, confidence = langid.classify(request.input)
-        if lang_code in SUPPORTED_LANGUAGES:
-            detected_lang = lang_code
-            logger.info(
-                f"Detected Lang: {detected_lang} (Conf: {confidence})",
-                extra={"event": "LANG_DETECTED"},
-            )
+        with timings.measure("lang_id"):
+            detected_lang, confidence = language_identifier.classify(request.input)
+        logger.info(
+            f"Detected Lang: {detected_lang} (Conf: {confidence:.3f})",
+            extra={"event": "LANG_DETECTED"},
+        )
     except Exception:
         pass
 
@@ -254,8 +356,22 @@ async def openai_speech_endpoint(request: OpenAISpeechRequest):
 
     try:
         params = internal_req.model_dump()
-        audio_bytes = await asyncio.to_thread(tts_engine.synthesize, params)
-        return Response(content=audio_bytes, media_type="audio/mpeg")
+        audio_bytes = await _synthesize_until_disconnect(
+            http_req, "openai", params, timings=timings
+        )
+        if audio_bytes is None:
+            metrics.report_request(timings)
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+        timings.mark_first_byte()
+        timings.bytes_sent = len(audio_bytes)
+        metrics.report_request(timings)
+        return Response(
+            content=audio_bytes,
+            media_type="audio/mpeg",
+            headers=calculate_vca_metrics(timings, len(request.input)),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(
             f"TTS Generation Failed: {e}",
@@ -281,28 +397,25 @@ async def generate_speech(request: TTSRequest, http_req: Request):
         raise HTTPException(status_code=422)
 
     params = request.model_dump()
-    start_time = time.perf_counter()
+    timings = RequestTimings(
+        "http", tenant_id_var.get(), timeout=_request_timeout(http_req)
+    )
 
     if request.stream:
         logger.info(
             "Stream request: Bypassing cache.", extra={"event": "STREAM_REQUEST_INIT"}
         )
 
+        abort_event = threading.Event()
+        chunks = await _open_stream(params, timings, is_aborted_cb=abort_event.is_set)
+
         async def stream_no_save():
-            q: queue.Queue = queue.Queue(maxsize=5)
-            abort_event = threading.Event()
+            q = SpillBuffer("http")
 
             def producer():
                 try:
-                    for chunk in tts_engine.synthesize_stream(
-                        params, is_aborted_cb=abort_event.is_set
-                    ):
-                        while not abort_event.is_set():
-                            try:
-                                q.put(("chunk", chunk), timeout=0.1)
-                                break
-                            except queue.Full:
-                                continue
+                    for chunk in chunks:
+                        q.put(("chunk", chunk))
                     if not abort_event.is_set():
                         q.put(("done", None))
                 except Exception as ex:
@@ -317,6 +430,7 @@ async def generate_speech(request: TTSRequest, http_req: Request):
                             "HTTP Client disconnected during stream.",
                             extra={"event": "HTTP_CLIENT_DISCONNECT"},
                         )
+                        metrics.record_stream_abort("http", "client_disconnect")
                         abort_event.set()
                         break
                     try:
@@ -329,14 +443,23 @@ async def generate_speech(request: TTSRequest, http_req: Request):
                             f"Stream error in thread: {payload}",
                             extra={"event": "STREAM_THREAD_ERROR"},
                         )
+                        metrics.record_stream_abort(
+                            "http", getattr(payload, "abort_reason", "error")
+                        )
                         raise payload
                     elif msg_type == "done":
                         break
                     else:
+                        timings.mark_first_byte()
+                        timings.bytes_sent += len(payload)
                         yield payload
             except asyncio.CancelledError:
+                metrics.record_stream_abort("http", "cancelled")
                 abort_event.set()
                 raise
+            finally:
+                q.close()
+                metrics.report_request(timings)
 
         return StreamingResponse(
             stream_no_save(), media_type="application/octet-stream"
@@ -348,24 +471,682 @@ async def generate_speech(request: TTSRequest, http_req: Request):
             "opus": "audio/ogg",
             "pcm": "application/octet-stream",
         }.get(ext, "audio/wav")
-        safe_hash = generate_deterministic_filename(params, ext)
+        safe_hash = audio_cache.key(params, ext)
 
-        cached_audio = RAM_CACHE.get(safe_hash)
+        cached_audio = audio_cache.get_memory(safe_hash)
+        if cached_audio is None:
+            cached_audio = await asyncio.to_thread(audio_cache.get_remote, safe_hash)
         if cached_audio:
             # [ARCH-COMPLIANCE] INFO -> DEBUG (Teknik gürültü)
             logger.debug(f"RAM Cache Hit: {safe_hash}", extra={"event": "CACHE_HIT"})
+            await _record_history(params, safe_hash, len(cached_audio))
             return Response(
-                content=cached_audio, media_type=media_type, headers={"X-Cache": "HIT"}
+                content=cached_audio,
+                media_type=media_type,
+                headers={"X-Cache": "HIT", **_content_headers(safe_hash)},
             )
 
-        audio_bytes = await asyncio.to_thread(tts_engine.synthesize, params)
-        metrics = calculate_vca_metrics(
-            start_time, len(request.text), audio_bytes, request.sample_rate
+        audio_bytes = await _synthesize_until_disconnect(
+            http_req, "http", params, timings=timings
+        )
+        if audio_bytes is None:
+            metrics.report_request(timings)
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+        timings.mark_first_byte()
+        timings.bytes_sent = len(audio_bytes)
+        metrics.report_request(timings)
+        vca_headers = calculate_vca_metrics(timings, len(request.text))
+
+        await asyncio.to_thread(audio_cache.put, safe_hash, audio_bytes)
+        duration = (
+            timings.audio_samples / timings.sample_rate if timings.sample_rate else None
+        )
+        await _record_history(params, safe_hash, len(audio_bytes), duration)
+
+        return Response(
+            content=audio_bytes,
+            media_type=media_type,
+            headers={**vca_headers, **_content_headers(safe_hash)},
         )
 
-        RAM_CACHE.put(safe_hash, audio_bytes)
 
-        return Response(content=audio_bytes, media_type=media_type, headers=metrics)
+async def _record_history(
+    params: dict, content_id: str, size: int, duration: Optional[float] = None
+):
+    mode = "SSML" if params["text"].lstrip().startswith("<speak") else "TTS"
+    await asyncio.to_thread(
+        history_store.record,
+        tenant_id_var.get(),
+        content_id,
+        params,
+        size,
+        duration,
+        mode,
+    )
+
+
+def _etag(content_id: str) -> str:
+    return f'"{content_id}"'
+
+
+def _content_headers(content_id: str) -> dict:
+    """Unary yanıtın adreslenebilir kopyası: GET ile yeniden istenebilir, CDN'de önbelleğe alınabilir."""
+    return {
+        "ETag": _etag(content_id),
+        "X-Content-Id": content_id,
+        "Content-Location": f"/api/tts/audio/{content_id}",
+    }
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match: zayıf karşılaştırma (W/ öneki yoksayılır), '*' her şeyle eşleşir."""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Tek aralıklı 'bytes=' isteğini (başlangıç, bitiş dahil) olarak döner. Anlaşılmayan ya
+    da çok aralıklı istekte None (tam yanıt); karşılanamayan aralıkta 416.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416, headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+def _read_file_range(f, start: int, length: int):
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(AUDIO_READ_CHUNK, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+@router.get("/api/tts/audio/{content_id}")
+async def get_cached_audio(content_id: str, http_req: Request):
+    """
+    /api/tts yanıtındaki X-Content-Id ile önbellekteki sesi sunar: If-None-Match -> 304,
+    Range -> 206 ve uzun Cache-Control ömrü. Disk katmanındaki girdi belleğe alınmadan
+    dosyadan akıtılır. Önbellekte olmayan içerik sentezlenmez (404).
+    """
+    return await _serve_cached_audio(content_id, http_req)
+
+
+async def _serve_cached_audio(content_id: str, http_req: Request) -> Response:
+    if not AUDIO_CONTENT_ID.match(content_id):
+        raise HTTPException(status_code=404, detail="Audio not found.")
+    etag = _etag(content_id)
+    headers = {
+        "ETag": etag,
+        # Rota tenant başlığı ister; paylaşılan ara önbellekler yanıtı saklamamalı.
+        "Cache-Control": f"private, max-age={settings.AUDIO_HTTP_MAX_AGE}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    # İçerik kimliği değişmez: doğrulama için önbelleğe bakmaya gerek yoktur.
+    if _etag_matches(http_req.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    audio = audio_cache.get_memory(content_id)
+    audio_file = None
+    if audio is None:
+        audio_file = await asyncio.to_thread(audio_cache.open, content_id)
+        if audio_file is None:
+            audio = await asyncio.to_thread(audio_cache.get_remote, content_id)
+            if audio is None:
+                raise HTTPException(status_code=404, detail="Audio not found.")
+    if audio is not None:
+        size = len(audio)
+    else:
+        assert audio_file is not None
+        size = os.fstat(audio_file.fileno()).st_size
+
+    byte_range = None
+    range_header = http_req.headers.get("range")
+    if_range = http_req.headers.get("if-range")
+    # If-Range eşleşmezse istemcinin kısmi kopyası geçersizdir: tam yanıt gönderilir.
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except HTTPException:
+            if audio_file is not None:
+                audio_file.close()
+            raise
+    start, end = byte_range or (0, size - 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    status_code = 206 if byte_range else 200
+    media_type = MEDIA_TYPES[content_id.rsplit(".", 1)[1]]
+
+    if audio is not None:
+        return Response(
+            content=audio[start : end + 1],
+            status_code=status_code,
+            media_type=media_type,
+            headers=headers,
+        )
+    return StreamingResponse(
+        _read_file_range(audio_file, start, end - start + 1),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+@router.get("/api/history")
+async def list_history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[int] = Query(None, ge=1),
+    speaker: Optional[str] = None,
+    language: Optional[str] = None,
+    mode: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    since: Optional[float] = None,
+):
+    """
+    Tenant'ın geçmişi, en yeniden eskiye. Sonraki sayfa varsa imleci X-Next-Cursor
+    başlığındadır (before=<imleç>); gövde Studio arayüzünün beklediği düz listedir.
+    """
+    entries, next_cursor = await asyncio.to_thread(
+        history_store.list,
+        tenant_id_var.get(),
+        limit=limit,
+        before=before,
+        speaker=speaker,
+        language=language,
+        mode=mode,
+        query=q,
+        since=since,
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return entries
+
+
+@router.delete("/api/history/all")
+async def delete_all_history():
+    removed = await asyncio.to_thread(history_store.clear, tenant_id_var.get())
+    return {"status": "ok", "deleted": removed}
+
+
+@router.get("/api/history/audio/{filename}")
+async def get_history_audio(filename: str, http_req: Request):
+    entry = await asyncio.to_thread(history_store.get, tenant_id_var.get(), filename)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="History entry not found.")
+    try:
+        return await _serve_cached_audio(filename, http_req)
+    except HTTPException as e:
+        if e.status_code == 404:
+            # Ses önbellekten düşmüş: kayıt artık oynatılamaz, dizinden de çıkarılır.
+            await asyncio.to_thread(history_store.delete, tenant_id_var.get(), filename)
+        raise
+
+
+@router.delete("/api/history/{filename}")
+async def delete_history(filename: str):
+    if not await asyncio.to_thread(history_store.delete, tenant_id_var.get(), filename):
+        raise HTTPException(status_code=404, detail="History entry not found.")
+    return {"status": "ok"}
+
+
+def _put_until_aborted(q: queue.Queue, item: tuple, abort_event: threading.Event):
+    """Sınırlı kuyruğa yazar; tüketici ayrıldıysa (abort) beklemeyi bırakır, thread sızmaz."""
+    while not abort_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+@router.post("/api/tts/batch")
+async def generate_speech_batch(request: TTSBatchRequest, http_req: Request):
+    items = [item.model_dump() for item in request.items]
+    if any(not item["text"].strip() for item in items):
+        raise HTTPException(status_code=422, detail="Batch items cannot be empty.")
+
+    jobs = plan_batch(items, audio_cache.key)
+    encoder = (
+        ZipBatchEncoder() if request.response_format == "zip" else NdjsonBatchEncoder()
+    )
+    tenant_id = tenant_id_var.get()
+    logger.info(
+        f"Batch request: {len(items)} items, {len(jobs)} unique ({request.response_format}).",
+        extra={"event": "BATCH_REQUEST_INIT"},
+    )
+
+    async def stream_batch():
+        q: queue.Queue = queue.Queue(maxsize=5)
+        abort_event = threading.Event()
+        started = time.perf_counter()
+        # Bağlantı koparsa sürmekte olan öğe de bir sonraki GPT adımında kesilir.
+        synthesize = partial(tts_engine.synthesize, is_aborted_cb=abort_event.is_set)
+
+        def producer():
+            try:
+                for result in run_batch(
+                    jobs,
+                    synthesize,
+                    audio_cache,
+                    tenant_id=tenant_id,
+                    is_aborted_cb=abort_event.is_set,
+                ):
+                    _put_until_aborted(q, ("result", result), abort_event)
+                _put_until_aborted(q, ("done", None), abort_event)
+            except Exception as ex:
+                _put_until_aborted(q, ("error", ex), abort_event)
+
+        threading.Thread(target=producer, daemon=True).start()
+
+        stats = BatchStats()
+        try:
+            yield encoder.start(len(items), len(jobs))
+            while True:
+                if await http_req.is_disconnected():
+                    logger.warning(
+                        f"HTTP Client disconnected during batch ({stats.unique}/{len(jobs)}).",
+                        extra={"event": "HTTP_CLIENT_DISCONNECT"},
+                    )
+                    metrics.record_stream_abort("batch", "client_disconnect")
+                    abort_event.set()
+                    return
+                try:
+                    msg_type, payload = await asyncio.to_thread(q.get, True, 0.1)
+                except queue.Empty:
+                    continue
+
+                if msg_type == "error":
+                    metrics.record_stream_abort("batch", "error")
+                    raise payload
+                elif msg_type == "done":
+                    break
+                else:
+                    stats.add(payload)
+                    yield encoder.item(payload, stats.unique, len(jobs))
+
+            summary = stats.summary(len(items), time.perf_counter() - started)
+            logger.info(
+                f"Batch finished: {summary['ok']}/{summary['items']} ok, "
+                f"{summary['items_per_min']} items/min.",
+                extra={"event": "BATCH_COMPLETE"},
+            )
+            yield encoder.finish(summary)
+        except asyncio.CancelledError:
+            metrics.record_stream_abort("batch", "cancelled")
+            abort_event.set()
+            raise
+        finally:
+            # Üretecin kapatılması (GeneratorExit) dahil her çıkışta üretici thread durur.
+            abort_event.set()
+
+    ext = "zip" if request.response_format == "zip" else "ndjson"
+    return StreamingResponse(
+        stream_batch(),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="tts_batch.{ext}"'},
+    )
+
+
+@router.post("/api/scene")
+async def render_scene(request: SceneRequest, http_req: Request):
+    """
+    Çok konuşmacılı sahneyi tek istekte sentezler ve miksi tek dosya (wav/pcm) olarak
+    akıtır. Bloklar tekilleştirilir, önbellekten okunur ve pencere içinde konuşmacıya göre
+    gruplanarak sentezlenir; miks sahne sırasıyla, her blok hazır olduğunda yazılır.
+    Blok ofsetleri X-Scene-Id ile GET /api/scene/{id} üzerinden (render sürerken de) alınır.
+    """
+    scene = request.model_dump()
+    if any(not block["text"].strip() for block in scene["blocks"]):
+        raise HTTPException(status_code=422, detail="Scene blocks cannot be empty.")
+
+    items = scene_items(scene)
+    jobs = plan_scene(items, audio_cache.key, settings.SCENE_GROUP_WINDOW)
+    tenant_id = tenant_id_var.get()
+    scene_id = uuid.uuid4().hex
+    mixer = SceneMixer(
+        scene_id,
+        items,
+        [
+            scene["gap_ms"] if b["gap_ms"] is None else b["gap_ms"]
+            for b in scene["blocks"]
+        ],
+        request.sample_rate,
+        request.output_format,
+        tenant_id=tenant_id,
+    )
+    scene_timelines.put(scene_id, mixer)
+    logger.info(
+        f"Scene request: {len(items)} blocks, {len(jobs)} unique.",
+        extra={"event": "SCENE_REQUEST_INIT"},
+    )
+
+    async def stream_scene():
+        q: queue.Queue = queue.Queue(maxsize=5)
+        abort_event = threading.Event()
+        # Bağlantı koparsa sürmekte olan blok da bir sonraki GPT adımında kesilir.
+        synthesize = partial(tts_engine.synthesize, is_aborted_cb=abort_event.is_set)
+
+        def producer():
+            try:
+                for result in run_batch(
+                    jobs,
+                    synthesize,
+                    audio_cache,
+                    tenant_id=tenant_id,
+                    is_aborted_cb=abort_event.is_set,
+                ):
+                    _put_until_aborted(q, ("result", result), abort_event)
+                _put_until_aborted(q, ("done", None), abort_event)
+            except Exception as ex:
+                _put_until_aborted(q, ("error", ex), abort_event)
+
+        threading.Thread(target=producer, daemon=True).start()
+
+        try:
+            if request.output_format == "wav":
+                yield streaming_wav_header(request.sample_rate)
+            while True:
+                if await http_req.is_disconnected():
+                    logger.warning(
+                        f"HTTP Client disconnected during scene {scene_id}.",
+                        extra={"event": "HTTP_CLIENT_DISCONNECT"},
+                    )
+                    metrics.record_stream_abort("scene", "client_disconnect")
+                    abort_event.set()
+                    mixer.finish("aborted")
+                    return
+                try:
+                    msg_type, payload = await asyncio.to_thread(q.get, True, 0.1)
+                except queue.Empty:
+                    continue
+
+                if msg_type == "error":
+                    metrics.record_stream_abort("scene", "error")
+                    mixer.finish("failed")
+                    raise payload
+                elif msg_type == "done":
+                    break
+                for piece in mixer.add(payload):
+                    yield piece
+
+            mixer.finish()
+            logger.info(
+                f"Scene finished: {scene_id} ({mixer.timeline()['duration_ms'] / 1000:.1f}s audio).",
+                extra={"event": "SCENE_COMPLETE"},
+            )
+        except asyncio.CancelledError:
+            metrics.record_stream_abort("scene", "cancelled")
+            abort_event.set()
+            mixer.finish("aborted")
+            raise
+        finally:
+            abort_event.set()
+
+    return StreamingResponse(
+        stream_scene(),
+        media_type=MEDIA_TYPES[request.output_format],
+        headers={
+            "X-Scene-Id": scene_id,
+            "X-Scene-Blocks": str(len(items)),
+            "Content-Disposition": f'attachment; filename="scene_{scene_id}.{request.output_format}"',
+        },
+    )
+
+
+@router.get("/api/scene/{scene_id}")
+async def get_scene_timeline(scene_id: str):
+    mixer = scene_timelines.get(scene_id)
+    # Tenant izolasyonu: başka tenant'ın sahnesi "yok" gibi görünür.
+    if mixer is None or mixer.tenant_id != tenant_id_var.get():
+        raise HTTPException(status_code=404, detail="Scene not found.")
+    return mixer.timeline()
+
+
+def _authorize_websocket(websocket: WebSocket) -> Optional[str]:
+    """
+    HTTP middleware WebSocket'leri kapsamaz; tenant ve API key burada doğrulanır.
+    Tarayıcılar özel başlık gönderemediği için sorgu parametreleri de kabul edilir.
+    """
+    tenant_id = websocket.headers.get("x-tenant-id") or websocket.query_params.get(
+        "tenant_id"
+    )
+    if not tenant_id or tenant_id == "unknown":
+        logger.error(
+            "Tenant ID is missing in WebSocket handshake. Connection rejected.",
+            extra={"event": "MISSING_TENANT_ID"},
+        )
+        return None
+    if settings.API_KEY:
+        client_key = websocket.headers.get("x-api-key") or websocket.query_params.get(
+            "api_key"
+        )
+        if client_key != settings.API_KEY:
+            logger.warning(
+                "Unauthorized WebSocket connection attempt.",
+                extra={"event": "UNAUTHORIZED_ACCESS"},
+            )
+            return None
+    return tenant_id
+
+
+@router.websocket("/api/tts/ws")
+async def stream_incremental_text(websocket: WebSocket):
+    """
+    LLM token akışı için artımlı sentez. İstemci mesajları (JSON):
+      {"type": "start", ...TTSRequest alanları}  -> ilk mesaj, oturum ayarları
+      {"type": "text", "text": "..."}           -> metin parçası
+      {"type": "flush"}                          -> tampondaki yarım cümleyi hemen seslendir
+      {"type": "clear"}                          -> barge-in: bekleyen tüm metni düşür
+      {"type": "end"}                            -> girdi bitti
+    Sunucu: ham PCM (s16le) binary çerçeveler ve segment/cleared/done/error JSON olayları.
+    """
+    tenant_id = _authorize_websocket(websocket)
+    if tenant_id is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    tenant_id_var.set(tenant_id)
+
+    try:
+        start_msg = await websocket.receive_json()
+        if start_msg.pop("type", "start") != "start":
+            raise ValueError("First message must be of type 'start'.")
+        config = IncrementalStreamStart(**start_msg)
+    except (ValidationError, ValueError) as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1003)
+        return
+    except WebSocketDisconnect:
+        return
+
+    params = config.model_dump()
+    session = IncrementalSynthesisSession(params, "websocket", tenant_id).start()
+    logger.info(
+        f"WebSocket incremental session started ({config.language}, {config.sample_rate} Hz).",
+        extra={"event": "WS_SESSION_START"},
+    )
+    await websocket.send_json({"type": "ready", "sample_rate": config.sample_rate})
+    if config.text:
+        session.feed(config.text)
+
+    async def receive_text():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError as e:
+                await websocket.send_json(
+                    {"type": "error", "detail": f"Invalid JSON message: {e}"}
+                )
+                continue
+            msg_type = message.get("type") if isinstance(message, dict) else None
+            if msg_type == "text":
+                session.feed(str(message.get("text", "")))
+            elif msg_type == "flush":
+                session.flush()
+            elif msg_type == "clear":
+                dropped = session.clear()
+                await websocket.send_json({"type": "cleared", "dropped": dropped})
+            elif msg_type == "end":
+                session.finish()
+                return
+            else:
+                await websocket.send_json(
+                    {"type": "error", "detail": f"Unknown message type: {msg_type}"}
+                )
+
+    receiver = asyncio.create_task(receive_text())
+    try:
+        while True:
+            if receiver.done():
+                error = receiver.exception()
+                if error is not None:
+                    raise error
+            try:
+                generation, msg_type, payload = await asyncio.to_thread(
+                    session.output.get, True, 0.1
+                )
+            except queue.Empty:
+                continue
+            if generation != session.generation:
+                continue  # Barge-in öncesi üretilmiş ses
+
+            if msg_type == "audio":
+                await websocket.send_bytes(payload)
+            elif msg_type in ("segment", "segment_end"):
+                await websocket.send_json({"type": msg_type, **payload})
+            elif msg_type == "error":
+                metrics.record_stream_abort(
+                    "websocket", getattr(payload, "abort_reason", "error")
+                )
+                logger.error(
+                    f"WebSocket incremental synthesis failed: {payload}",
+                    extra={"event": "WS_SESSION_ERROR"},
+                )
+                await websocket.send_json({"type": "error", "detail": str(payload)})
+                await websocket.close(code=1011)
+                return
+            elif msg_type == "done":
+                await websocket.send_json({"type": "done"})
+                await websocket.close()
+                logger.info(
+                    "WebSocket incremental session finished.",
+                    extra={"event": "WS_SESSION_COMPLETE"},
+                )
+                return
+    except WebSocketDisconnect:
+        logger.warning(
+            "WebSocket client disconnected during incremental stream.",
+            extra={"event": "WS_CLIENT_DISCONNECT"},
+        )
+        metrics.record_stream_abort("websocket", "client_disconnect")
+    except asyncio.CancelledError:
+        metrics.record_stream_abort("websocket", "cancelled")
+        raise
+    finally:
+        session.abort()
+        receiver.cancel()
+
+
+def _get_job_or_404(job_id: str) -> dict:
+    job = job_manager.get(job_id, tenant_id_var.get())
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@router.post("/api/tts/jobs", status_code=202)
+async def create_longform_job(request: LongFormJobRequest):
+    if request.text.lstrip().startswith("<speak"):
+        raise HTTPException(
+            status_code=422, detail="Long-form jobs accept plain text only (no SSML)."
+        )
+    params = request.model_dump()
+    params["stream"] = False
+    try:
+        return await asyncio.to_thread(job_manager.submit, params, tenant_id_var.get())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/api/tts/jobs/{job_id}")
+async def get_longform_job(job_id: str):
+    return job_manager.public_view(_get_job_or_404(job_id))
+
+
+@router.get("/api/tts/jobs/{job_id}/events")
+async def stream_longform_job_events(job_id: str, http_req: Request):
+    """İlerlemeyi Server-Sent Events olarak yayınlar; iş bitince akış kapanır."""
+    _get_job_or_404(job_id)
+    tenant_id = tenant_id_var.get()
+
+    async def event_stream():
+        last_payload = None
+        while not await http_req.is_disconnected():
+            job = job_manager.get(job_id, tenant_id)
+            if job is None:
+                yield "event: deleted\ndata: {}\n\n"
+                return
+            payload = json.dumps(job_manager.public_view(job), ensure_ascii=False)
+            if payload != last_payload:
+                last_payload = payload
+                yield f"event: progress\ndata: {payload}\n\n"
+            if job["status"] in TERMINAL_STATES:
+                return
+            await asyncio.sleep(1.0)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/api/tts/jobs/{job_id}/result")
+async def get_longform_job_result(job_id: str):
+    job = _get_job_or_404(job_id)
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=409, detail=f"Job is not completed (status: {job['status']})."
+        )
+    fmt = job["params"]["output_format"]
+    return FileResponse(
+        job_manager.result_path(job),
+        media_type=MEDIA_TYPES[fmt],
+        filename=f"tts_job_{job_id}.{fmt}",
+    )
+
+
+@router.delete("/api/tts/jobs/{job_id}", status_code=204)
+async def delete_longform_job(job_id: str):
+    if not await asyncio.to_thread(job_manager.cancel, job_id, tenant_id_var.get()):
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return Response(status_code=204)
 
 
 @router.post("/api/tts/clone")
@@ -386,26 +1167,26 @@ async def generate_speech_clone(
             saved_files.append(path)
 
         params = {"text": text, "language": language, "output_format": output_format}
+        timings = RequestTimings(
+            "http", tenant_id_var.get(), timeout=_request_timeout(http_req)
+        )
 
         if stream:
+            abort_event = threading.Event()
+            chunks = await _open_stream(
+                params,
+                timings,
+                speaker_wavs=saved_files,
+                is_aborted_cb=abort_event.is_set,
+            )
 
             async def stream_with_cleanup():
-                q: queue.Queue = queue.Queue(maxsize=5)
-                abort_event = threading.Event()
+                q = SpillBuffer("http")
 
                 def producer():
                     try:
-                        for chunk in tts_engine.synthesize_stream(
-                            params,
-                            speaker_wavs=saved_files,
-                            is_aborted_cb=abort_event.is_set,
-                        ):
-                            while not abort_event.is_set():
-                                try:
-                                    q.put(("chunk", chunk), timeout=0.1)
-                                    break
-                                except queue.Full:
-                                    continue
+                        for chunk in chunks:
+                            q.put(("chunk", chunk))
                         if not abort_event.is_set():
                             q.put(("done", None))
                     except Exception as ex:
@@ -416,6 +1197,7 @@ async def generate_speech_clone(
                 try:
                     while True:
                         if await http_req.is_disconnected():
+                            metrics.record_stream_abort("http", "client_disconnect")
                             abort_event.set()
                             break
                         try:
@@ -426,26 +1208,51 @@ async def generate_speech_clone(
                             continue
 
                         if msg_type == "error":
-                            break
+                            logger.error(
+                                f"Clone stream error in thread: {payload}",
+                                extra={"event": "STREAM_THREAD_ERROR"},
+                            )
+                            metrics.record_stream_abort(
+                                "http", getattr(payload, "abort_reason", "error")
+                            )
+                            raise payload
                         elif msg_type == "done":
                             break
                         else:
+                            timings.mark_first_byte()
+                            timings.bytes_sent += len(payload)
                             yield payload
                 except asyncio.CancelledError:
+                    metrics.record_stream_abort("http", "cancelled")
                     abort_event.set()
                     raise
                 finally:
+                    q.close()
+                    metrics.report_request(timings)
                     await cleanup_files(saved_files)
 
             return StreamingResponse(
                 stream_with_cleanup(), media_type="application/octet-stream"
             )
         else:
-            audio_bytes = await asyncio.to_thread(
-                tts_engine.synthesize, params, speaker_wavs=saved_files
+            audio_bytes = await _synthesize_until_disconnect(
+                http_req, "http", params, speaker_wavs=saved_files, timings=timings
             )
             await cleanup_files(saved_files)
-            return Response(content=audio_bytes, media_type="audio/wav")
+            if audio_bytes is None:
+                metrics.report_request(timings)
+                return Response(status_code=CLIENT_CLOSED_REQUEST)
+            timings.mark_first_byte()
+            timings.bytes_sent = len(audio_bytes)
+            metrics.report_request(timings)
+            return Response(
+                content=audio_bytes,
+                media_type="audio/wav",
+                headers=calculate_vca_metrics(timings, len(text)),
+            )
+    except HTTPException:
+        await cleanup_files(saved_files)
+        raise
     except Exception as e:
         await cleanup_files(saved_files)
         logger.error(f"Clone generation failed: {e}", extra={"event": "CLONE_GEN_FAIL"})
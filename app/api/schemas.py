@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from app.core.config import settings
 
 # SSML açıklama metni
@@ -44,6 +44,76 @@ class TTSRequest(BaseModel):
     )
 
 
+class TTSBatchItem(TTSRequest):
+    """Toplu sentez öğesi. `stream` alanı yoksayılır; sonuçlar parti yanıtında akar."""
+
+    id: Optional[str] = Field(
+        None, max_length=128, description="İstemci tarafı öğe kimliği"
+    )
+
+
+class TTSBatchRequest(BaseModel):
+    items: List[TTSBatchItem] = Field(
+        ..., min_length=1, max_length=settings.BATCH_MAX_ITEMS
+    )
+    response_format: str = Field(
+        "ndjson",
+        pattern="^(ndjson|zip)$",
+        description="ndjson: satır başına sonuç (base64 ses) | zip: akış halinde arşiv",
+    )
+
+
+class SceneBlock(BaseModel):
+    """Sahne satırı. Dil verilmezse sahnenin dili, gap_ms verilmezse sahnenin arası kullanılır."""
+
+    id: Optional[str] = Field(
+        None, max_length=128, description="İstemci tarafı blok kimliği"
+    )
+    text: str = Field(..., min_length=1, max_length=5000)
+    speaker: Optional[str] = settings.DEFAULT_SPEAKER
+    style: Optional[str] = Field(None, description="Konuşmacı stili (ör. 'happy')")
+    speed: float = Field(settings.DEFAULT_SPEED, ge=0.25, le=4.0)
+    language: Optional[str] = Field(
+        None, pattern="^(en|es|fr|de|it|pt|pl|tr|ru|nl|cs|ar|zh-cn|ja|hu|ko)$"
+    )
+    gap_ms: Optional[int] = Field(
+        None, ge=0, le=10000, description="Bu bloktan sonraki sessizlik (ms)"
+    )
+
+
+class SceneRequest(BaseModel):
+    """Çok konuşmacılı sahne: bloklar sunucuda sentezlenip tek dosya olarak miks edilir."""
+
+    blocks: List[SceneBlock] = Field(
+        ..., min_length=1, max_length=settings.SCENE_MAX_BLOCKS
+    )
+    language: str = Field(
+        settings.DEFAULT_LANGUAGE,
+        pattern="^(en|es|fr|de|it|pt|pl|tr|ru|nl|cs|ar|zh-cn|ja|hu|ko)$",
+    )
+    temperature: float = Field(settings.DEFAULT_TEMPERATURE, ge=0.01, le=2.0)
+    top_k: int = Field(settings.DEFAULT_TOP_K, ge=1)
+    top_p: float = Field(settings.DEFAULT_TOP_P, ge=0.01, le=1.0)
+    repetition_penalty: float = Field(settings.DEFAULT_REPETITION_PENALTY, ge=1.0)
+    gap_ms: int = Field(settings.SCENE_GAP_MS, ge=0, le=10000)
+    # Miks akış halinde gönderilir: yalnızca sıkıştırılmamış biçimler.
+    output_format: str = Field("wav", pattern="^(wav|pcm)$")
+    sample_rate: int = Field(settings.DEFAULT_SAMPLE_RATE)
+
+
+class LongFormJobRequest(TTSRequest):
+    """Uzun metin işi. Metin cümle parçalarına bölünür; `stream` ve `split_sentences` yoksayılır."""
+
+    text: str = Field(..., min_length=1, max_length=settings.LONGFORM_MAX_CHARS)
+
+
+class IncrementalStreamStart(TTSRequest):
+    """WebSocket oturumunun ilk mesajı. Metin sonradan parça parça gelir; çıkış ham PCM'dir."""
+
+    text: str = Field("", max_length=5000, description="İsteğe bağlı ilk metin parçası")
+    output_format: str = Field("pcm", pattern="^pcm$")
+
+
 class OpenAISpeechRequest(BaseModel):
     """OpenAI API uyumluluğu için şema"""
 
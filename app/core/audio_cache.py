@@ -0,0 +1,203 @@
+import json
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from typing import BinaryIO, Dict, List, Optional
+
+from app.core import metrics
+from app.core.cache import MemoryLRUCache
+from app.core.cache_backends import CacheBackend, FilesystemBackend, create_backend
+from app.core.config import settings
+from app.core.engine import tts_engine
+
+logger = logging.getLogger("AUDIO-CACHE")
+
+# Sıkıştırılmış değerin başlığı. Başlıksız değer ham sestir: sıkıştırma sonradan açılsa da
+# mevcut girdiler okunmaya devam eder.
+_COMPRESSED_MAGIC = b"\x00SCZ"
+# mp3/opus zaten sıkıştırılmıştır; yalnızca ham örnek taşıyan biçimler sıkıştırılır.
+_COMPRESSIBLE_EXTS = (".wav", ".pcm")
+# Ses verisinde yüksek seviyeler kayda değer kazanç getirmez, yazma süresini uzatır.
+_ZLIB_LEVEL = 1
+# Kazanç bu oranın altındaysa değer ham saklanır (okuma tarafı açma maliyeti ödemez).
+_MIN_COMPRESSION_GAIN = 0.05
+# Anahtar şeması sürümü: sentezi etkileyen alan eklenince artırılır, eski girdiler
+# (farklı örnekleme parametreleriyle üretilmiş olabilir) bir daha isabet etmez.
+_KEY_VERSION = 2
+
+
+def _pack(key: str, audio: bytes, compression: str) -> bytes:
+    if compression != "zlib" or not key.endswith(_COMPRESSIBLE_EXTS):
+        return audio
+    packed = _COMPRESSED_MAGIC + zlib.compress(audio, _ZLIB_LEVEL)
+    return packed if len(packed) <= len(audio) * (1 - _MIN_COMPRESSION_GAIN) else audio
+
+
+def _unpack(value: bytes) -> bytes:
+    if value[:4] == _COMPRESSED_MAGIC:
+        return zlib.decompress(memoryview(value)[4:])
+    return value
+
+
+class AudioCache:
+    """
+    Görevi: Sentezlenmiş ses için iki katmanlı önbellek.
+    RAM (LRU, replikaya özel) -> arka uç (CacheBackend: yerel/paylaşımlı dizin, Redis ya
+    da süreç içi bellek). Paylaşımlı arka uçta bir replikanın sentezlediği ses diğer
+    replikalarda da isabet eder. Sabitlenmiş (pinned) girdiler iki katmanda da tahliye
+    edilmez. Arka uca yazılan değer isteğe bağlı olarak zlib ile sıkıştırılır.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        ram_capacity: int,
+        disk_max_bytes: int,
+        backend: Optional[CacheBackend] = None,
+        compression: str = "none",
+    ):
+        self.memory: MemoryLRUCache[bytes] = MemoryLRUCache(capacity=ram_capacity)
+        self.backend = backend or FilesystemBackend(root_dir, disk_max_bytes)
+        self.compression = compression
+        self._pinned: set = set()
+        self._lock = threading.Lock()
+
+    def key(self, params: dict, ext: str) -> str:
+        """Sesi etkileyen parametreler, model adı ve konuşmacı referans sürümü anahtara dahildir."""
+        key_data = {
+            "v": _KEY_VERSION,
+            "text": params.get("text"),
+            "lang": params.get("language"),
+            "spk": params.get("speaker_idx"),
+            "temp": params.get("temperature"),
+            "speed": params.get("speed"),
+            "top_k": params.get("top_k"),
+            "top_p": params.get("top_p"),
+            "rep": params.get("repetition_penalty"),
+            "split": params.get("split_sentences"),
+            "sr": params.get("sample_rate"),
+            "fmt": ext,
+            "model": settings.MODEL_NAME,
+            "voice": tts_engine.speaker_version(params.get("speaker_idx")),
+        }
+        file_hash = hashlib.md5(
+            json.dumps(key_data, sort_keys=True).encode()
+        ).hexdigest()
+        return f"{file_hash}.{ext}"
+
+    # --- OKUMA ---
+    def get_memory(self, key: str) -> Optional[bytes]:
+        started = time.perf_counter()
+        audio = self.memory.get(key)
+        metrics.record_cache_lookup(
+            "ram", audio is not None, time.perf_counter() - started
+        )
+        return audio
+
+    def get_remote(self, key: str) -> Optional[bytes]:
+        started = time.perf_counter()
+        value = self.backend.get(key)
+        audio = _unpack(value) if value is not None else None
+        metrics.record_cache_lookup(
+            self.backend.tier, audio is not None, time.perf_counter() - started
+        )
+        if audio is not None:
+            self.memory.put(key, audio, pin=key in self._pinned)
+        return audio
+
+    def get(self, key: str) -> Optional[bytes]:
+        audio = self.get_memory(key)
+        if audio is None:
+            audio = self.get_remote(key)
+        return audio
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """RAM'de olmayanlar arka uçtan tek çoklu okumayla (Redis: tek MGET) alınır."""
+        found: Dict[str, bytes] = {}
+        missing = []
+        for key in keys:
+            audio = self.get_memory(key)
+            if audio is None:
+                missing.append(key)
+            else:
+                found[key] = audio
+        if not missing:
+            return found
+
+        started = time.perf_counter()
+        values = self.backend.get_many(missing)
+        elapsed = time.perf_counter() - started
+        for key in missing:
+            value = values.get(key)
+            metrics.record_cache_lookup(self.backend.tier, value is not None)
+            if value is None:
+                continue
+            audio = _unpack(value)
+            self.memory.put(key, audio, pin=key in self._pinned)
+            found[key] = audio
+        metrics.record_cache_latency(self.backend.tier, "multi_get", elapsed)
+        return found
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """
+        Girdi arka uçta ham (sıkıştırılmamış) dosya olarak duruyorsa başa konumlanmış açık
+        dosyayı döner: ses belleğe alınmadan diskten doğrudan akıtılır. Kapatmak
+        çağıranın sorumluluğundadır. Diğer durumlarda None (get_remote kullanılmalı).
+        """
+        started = time.perf_counter()
+        f = self.backend.open(key)
+        if f is None:
+            return None
+        if f.read(len(_COMPRESSED_MAGIC)) == _COMPRESSED_MAGIC:
+            f.close()
+            return None
+        f.seek(0)
+        metrics.record_cache_lookup(
+            self.backend.tier, True, time.perf_counter() - started
+        )
+        return f
+
+    def contains(self, key: str) -> bool:
+        return key in self.memory or self.backend.contains(key)
+
+    # --- YAZMA ---
+    def put(self, key: str, audio: bytes, pin: bool = False):
+        self.memory.put(key, audio, pin=pin)
+        self.backend.put(key, _pack(key, audio, self.compression), pin=pin)
+        if pin:
+            with self._lock:
+                self._pinned.add(key)
+
+    def pin(self, key: str):
+        self.memory.pin(key)
+        with self._lock:
+            if key in self._pinned:
+                return
+            self._pinned.add(key)
+        self.backend.pin(key)
+
+    # --- BAŞLANGIÇ ---
+    def load(self):
+        """Sabitlenmiş girdileri arka uçtan tek çoklu okumayla RAM'e yükler."""
+        pins = self.backend.load()
+        with self._lock:
+            self._pinned = set(pins)
+        values = self.backend.get_many(pins) if pins else {}
+        for key, value in values.items():
+            self.memory.put(key, _unpack(value), pin=True)
+        logger.info(
+            f"Audio cache ready ({self.backend.tier}): {len(values)}/{len(pins)} "
+            "pinned entries loaded.",
+            extra={"event": "AUDIO_CACHE_LOADED"},
+        )
+
+
+audio_cache = AudioCache(
+    settings.AUDIO_CACHE_DIR,
+    ram_capacity=settings.AUDIO_CACHE_RAM_ITEMS,
+    disk_max_bytes=settings.AUDIO_CACHE_DISK_MAX_MB * 1024 * 1024,
+    backend=create_backend(settings),
+    compression=settings.AUDIO_CACHE_COMPRESSION.lower(),
+)
@@ -0,0 +1,244 @@
+import io
+import re
+import json
+import time
+import base64
+import logging
+import zipfile
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+from app.core import metrics
+from app.core.audio_cache import AudioCache
+from app.core.timing import RequestTimings
+
+logger = logging.getLogger("BATCH")
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+# Önbellek bu kadar işlik pencereler halinde tek çoklu okumayla (Redis: tek MGET) sorgulanır.
+CACHE_PREFETCH = 32
+
+
+@dataclass
+class BatchJob:
+    """Aynı önbellek anahtarına düşen (tekrarlanan) öğelerin tek bir sentez işi."""
+
+    key: str
+    params: dict
+    indices: List[int] = field(default_factory=list)
+    ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchResult:
+    job: BatchJob
+    audio: Optional[bytes]
+    cache_hit: bool
+    error: Optional[str]
+    elapsed_ms: float
+
+
+def plan_batch(items: List[dict], key_fn: Callable[[dict, str], str]) -> List[BatchJob]:
+    """
+    Öğeleri önbellek anahtarına göre tekilleştirir ve konuşmacı/dil sırasına dizer.
+    Aynı konuşmacının işleri art arda geldiği için latent önbelleği sıcak kalır.
+    """
+    jobs: Dict[str, BatchJob] = {}
+    for index, item in enumerate(items):
+        params = {k: v for k, v in item.items() if k != "id"}
+        params["stream"] = False
+        key = key_fn(params, params["output_format"])
+        job = jobs.get(key)
+        if job is None:
+            job = jobs[key] = BatchJob(key=key, params=params)
+        job.indices.append(index)
+        job.ids.append(item.get("id") or str(index))
+
+    return sorted(
+        jobs.values(),
+        key=lambda j: (
+            j.params.get("speaker_idx") or "",
+            j.params.get("language") or "",
+            j.indices[0],
+        ),
+    )
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    synthesize: Callable[..., bytes],
+    cache: AudioCache,
+    tenant_id: Optional[str] = None,
+    is_aborted_cb: Optional[Callable[[], bool]] = None,
+) -> Iterator[BatchResult]:
+    """İşleri sırayla çalıştırır. Bir öğenin hatası partinin geri kalanını durdurmaz."""
+    prefetched: Dict[str, bytes] = {}
+    for position, job in enumerate(jobs):
+        if is_aborted_cb and is_aborted_cb():
+            logger.warning("Batch aborted by caller.", extra={"event": "BATCH_ABORTED"})
+            return
+        if position % CACHE_PREFETCH == 0:
+            prefetched = cache.get_many(
+                [j.key for j in jobs[position : position + CACHE_PREFETCH]]
+            )
+
+        if len(job.indices) > 1:
+            metrics.record_batch_item("duplicate", len(job.indices) - 1)
+
+        t0 = time.perf_counter()
+        audio = prefetched.pop(job.key, None)
+        if audio is not None:
+            metrics.record_batch_item("cache_hit")
+            yield BatchResult(
+                job, audio, True, None, (time.perf_counter() - t0) * 1000.0
+            )
+            continue
+
+        timings = RequestTimings("batch", tenant_id)
+        try:
+            audio = synthesize(dict(job.params), timings=timings)
+        except Exception as e:
+            metrics.record_batch_item("error")
+            logger.warning(
+                f"Batch item failed ({job.ids[0]}): {e}",
+                extra={"event": "BATCH_ITEM_FAIL"},
+            )
+            yield BatchResult(
+                job, None, False, str(e), (time.perf_counter() - t0) * 1000.0
+            )
+            continue
+
+        timings.bytes_sent = len(audio)
+        metrics.report_request(timings)
+        metrics.record_batch_item("synthesized")
+        cache.put(job.key, audio)
+        yield BatchResult(job, audio, False, None, (time.perf_counter() - t0) * 1000.0)
+
+
+@dataclass
+class BatchStats:
+    """Parti özeti için sayaçlar; sonuçlar (ses baytları) akıtıldıktan sonra tutulmaz."""
+
+    unique: int = 0
+    ok: int = 0
+    failed: int = 0
+    cache_hits: int = 0
+
+    def add(self, result: BatchResult):
+        self.unique += 1
+        if result.error:
+            self.failed += len(result.job.indices)
+        else:
+            self.ok += len(result.job.indices)
+        if result.cache_hit:
+            self.cache_hits += 1
+
+    def summary(self, item_count: int, elapsed: float) -> dict:
+        return {
+            "items": item_count,
+            "unique": self.unique,
+            "ok": self.ok,
+            "failed": self.failed,
+            "cache_hits": self.cache_hits,
+            "elapsed_s": round(elapsed, 3),
+            "items_per_min": round(item_count / elapsed * 60.0, 1)
+            if elapsed > 0
+            else 0.0,
+        }
+
+
+class NdjsonBatchEncoder:
+    """Her satır bağımsız bir JSON nesnesi: start, item (ilerleme ile), summary."""
+
+    media_type = "application/x-ndjson"
+
+    @staticmethod
+    def _line(payload: dict) -> bytes:
+        return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def start(self, item_count: int, unique_count: int) -> bytes:
+        return self._line(
+            {"type": "start", "items": item_count, "unique": unique_count}
+        )
+
+    def item(self, result: BatchResult, done: int, total: int) -> bytes:
+        payload = {
+            "type": "item",
+            "ids": result.job.ids,
+            "indices": result.job.indices,
+            "status": "error" if result.error else "ok",
+            "cache": "hit" if result.cache_hit else "miss",
+            "format": result.job.params["output_format"],
+            "elapsed_ms": round(result.elapsed_ms, 1),
+            "progress": {"done": done, "total": total},
+        }
+        if result.error:
+            payload["error"] = result.error
+        else:
+            assert result.audio is not None
+            payload["bytes"] = len(result.audio)
+            payload["audio_base64"] = base64.b64encode(result.audio).decode("ascii")
+        return self._line(payload)
+
+    def finish(self, summary: dict) -> bytes:
+        return self._line({"type": "summary", **summary})
+
+
+class _ZipSink:
+    """Seek desteklemeyen yazma hedefi; zipfile veri tanımlayıcılarıyla akış halinde yazar."""
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+
+    def write(self, data) -> int:
+        return self._buffer.write(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class ZipBatchEncoder:
+    """Öğe başına bir dosya ve sonda hata/ilerleme bilgisini içeren manifest.json."""
+
+    media_type = "application/zip"
+
+    def __init__(self):
+        self._sink = _ZipSink()
+        # Ses zaten sıkıştırılmış/az sıkışan veri: STORED, CPU harcamaz.
+        self._zip = zipfile.ZipFile(
+            self._sink, mode="w", compression=zipfile.ZIP_STORED
+        )
+        self._manifest: List[dict] = []
+
+    def start(self, item_count: int, unique_count: int) -> bytes:
+        return b""
+
+    def item(self, result: BatchResult, done: int, total: int) -> bytes:
+        ext = result.job.params["output_format"]
+        for index, item_id in zip(result.job.indices, result.job.ids):
+            entry = {"index": index, "id": item_id, "status": "ok"}
+            if result.error:
+                entry.update(status="error", error=result.error)
+            else:
+                safe_id = _SAFE_NAME.sub("_", item_id)[:100]
+                entry["file"] = f"{index:05d}_{safe_id}.{ext}"
+                self._zip.writestr(entry["file"], result.audio)
+            self._manifest.append(entry)
+        return self._sink.drain()
+
+    def finish(self, summary: dict) -> bytes:
+        manifest = {
+            "summary": summary,
+            "items": sorted(self._manifest, key=lambda e: e["index"]),
+        }
+        self._zip.writestr(
+            "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2)
+        )
+        self._zip.close()
+        return self._sink.drain()
@@ -0,0 +1,50 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class MemoryLRUCache(Generic[V]):
+    def __init__(self, capacity: int = 100):
+        self.cache: "OrderedDict[str, V]" = OrderedDict()
+        # Sabitlenmiş (pinned) girdiler LRU dışında tutulur ve kapasiteye sayılmaz.
+        self.pinned: Dict[str, V] = {}
+        self.capacity = capacity
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[V]:
+        with self._lock:
+            if key in self.pinned:
+                return self.pinned[key]
+            if key not in self.cache:
+                return None
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+    def put(self, key: str, value: V, pin: bool = False):
+        with self._lock:
+            if pin or key in self.pinned:
+                self.cache.pop(key, None)
+                self.pinned[key] = value
+                return
+            self.cache[key] = value
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+
+    def pin(self, key: str) -> bool:
+        """Mevcut bir girdiyi sabitler. Girdi yoksa False döner."""
+        with self._lock:
+            if key in self.pinned:
+                return True
+            if key not in self.cache:
+                return False
+            self.pinned[key] = self.cache.pop(key)
+            return True
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.pinned or key in self.cache
+
+    def __len__(self) -> int:
+        return len(self.cache) + len(self.pinned)
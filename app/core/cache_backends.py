@@ -0,0 +1,452 @@
+import os
+import json
+import ssl
+import time
+import uuid
+import socket
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, List, Optional
+from urllib.parse import unquote, urlparse
+
+from app.core.cache import MemoryLRUCache
+
+logger = logging.getLogger("CACHE-BACKEND")
+
+PINS_FILE = "pinned.json"
+# Redis'e ulaşılamadığında bu süre (sn) boyunca istekler uzak katmanı beklemeden atlar.
+REDIS_RETRY_SECONDS = 5.0
+
+
+class CacheBackend(ABC):
+    """
+    Görevi: AudioCache'in RAM arkasındaki ikinci katmanı. Değerler opak baytlardır
+    (sıkıştırma AudioCache'tedir). Arka uç hataları isteği düşürmez: okuma hatası
+    ıskalama, yazma hatası no-op olarak ele alınır.
+    """
+
+    # Metrik label'ı (tts_cache_lookups_total / tts_cache_lookup_seconds).
+    tier = "remote"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Bulunan anahtarlar; uzak arka uçlarda tek round-trip."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, key: str, value: bytes, pin: bool = False):
+        raise NotImplementedError
+
+    @abstractmethod
+    def contains(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def pin(self, key: str):
+        """Girdiyi tahliye dışı bırakır; sabitleme kaydı yeniden başlatmalarda korunur."""
+        raise NotImplementedError
+
+    def load(self) -> List[str]:
+        """Başlangıçta çağrılır; sabitlenmiş anahtarları döner."""
+        return []
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Yerel dosya olarak duran girdiyi okumak için açar; diğer arka uçlar None döner."""
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    """Süreç içi LRU. Tek replika ve testlerde paylaşımlı deponun yerel yerine geçeni."""
+
+    tier = "memory"
+
+    def __init__(self, capacity: int = 1000):
+        self.store: MemoryLRUCache[bytes] = MemoryLRUCache(capacity=capacity)
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        found = {}
+        for key in keys:
+            value = self.store.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def put(self, key: str, value: bytes, pin: bool = False):
+        self.store.put(key, value, pin=pin)
+
+    def contains(self, key: str) -> bool:
+        return key in self.store
+
+    def pin(self, key: str):
+        self.store.pin(key)
+
+    def load(self) -> List[str]:
+        return list(self.store.pinned)
+
+
+class FilesystemBackend(CacheBackend):
+    """
+    Yerel disk ya da paylaşımlı dizin (NFS, hostPath). Yazma benzersiz geçici dosya +
+    os.replace ile atomiktir: aynı dizini paylaşan replikalar yarım dosya okumaz.
+    mtime disk LRU'sunun erişim zamanıdır; sabitlenmiş girdiler tahliye edilmez.
+    """
+
+    tier = "disk"
+
+    def __init__(self, root_dir: str, max_bytes: int):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self._pinned: set = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        found = {}
+        for key in keys:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    found[key] = f.read()
+                os.utime(path)
+            except OSError:
+                continue
+        return found
+
+    def put(self, key: str, value: bytes, pin: bool = False):
+        path = self._path(key)
+        # Paylaşımlı dizinde PID/thread kimliği replikalar arasında çakışabilir.
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(self.root_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+            try:
+                # Aynı anahtarın üzerine yazılırsa eski boyut toplamdan düşülür.
+                previous = os.path.getsize(path)
+            except OSError:
+                previous = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(
+                f"Audio cache write failed ({key}): {e}",
+                extra={"event": "AUDIO_CACHE_WRITE_FAIL"},
+            )
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        if pin:
+            self.pin(key)
+        with self._lock:
+            self._bytes += len(value) - previous
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+            os.utime(path)
+        except OSError:
+            return None
+        # Açık tanımlayıcı, dosya bu arada tahliye edilse de okunmaya devam eder.
+        return f
+
+    def pin(self, key: str):
+        with self._lock:
+            if key in self._pinned:
+                return
+            # Diğer replikaların sabitlemeleri ezilmesin diye manifest yeniden okunur.
+            self._pinned |= set(self._read_pins())
+            self._pinned.add(key)
+            self._write_pins(sorted(self._pinned))
+
+    def load(self) -> List[str]:
+        os.makedirs(self.root_dir, exist_ok=True)
+        pins = self._read_pins()
+        with self._lock:
+            self._pinned = set(pins)
+            self._bytes = sum(size for _, _, size in self._entries())
+        logger.info(
+            f"Audio cache directory ready: {self._bytes / (1024 * 1024):.1f} MB on disk.",
+            extra={"event": "AUDIO_CACHE_DIR_READY"},
+        )
+        return pins
+
+    def _evict(self):
+        with self._lock:
+            pinned = set(self._pinned)
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _mtime, name, size in entries:
+            if total <= target:
+                break
+            if name in pinned:
+                continue
+            try:
+                os.remove(os.path.join(self.root_dir, name))
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes = total
+        logger.info(
+            f"Audio disk cache trimmed: {removed} entries removed.",
+            extra={"event": "AUDIO_CACHE_EVICT"},
+        )
+
+    def _entries(self):
+        try:
+            with os.scandir(self.root_dir) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith((".tmp", ".json")):
+                        stat = entry.stat()
+                        yield stat.st_mtime, entry.name, stat.st_size
+        except OSError:
+            return
+
+    def _read_pins(self) -> List[str]:
+        try:
+            with open(os.path.join(self.root_dir, PINS_FILE), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _write_pins(self, pins: List[str]):
+        path = os.path.join(self.root_dir, PINS_FILE)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(pins, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(
+                f"Pin manifest write failed: {e}",
+                extra={"event": "AUDIO_CACHE_PIN_FAIL"},
+            )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, os.path.basename(key))
+
+
+class RespError(Exception):
+    """Sunucunun '-ERR ...' yanıtı."""
+
+
+class _RespConnection:
+    """Redis protokolü (RESP2) üzerinde tek bağlantı; komutlar boru hattıyla gönderilir."""
+
+    def __init__(self, url, timeout: float):
+        sock = socket.create_connection(
+            (url.hostname or "localhost", url.port or 6379), timeout
+        )
+        if url.scheme == "rediss":
+            sock = ssl.create_default_context().wrap_socket(
+                sock, server_hostname=url.hostname
+            )
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+
+        setup = []
+        if url.password:
+            credentials = [unquote(url.username)] if url.username else []
+            setup.append(["AUTH", *credentials, unquote(url.password)])
+        db = url.path.lstrip("/")
+        if db and db != "0":
+            setup.append(["SELECT", db])
+        if setup:
+            self.execute_many(setup)
+
+    def execute_many(self, commands: List[list]) -> list:
+        """Tüm komutları tek yazmada gönderir, yanıtları sırayla okur."""
+        self.sock.sendall(b"".join(self._encode(command) for command in commands))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _encode(command: list) -> bytes:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            if isinstance(arg, str):
+                arg = arg.encode()
+            elif isinstance(arg, int):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n" % len(arg))
+            parts.append(arg)
+            parts.append(b"\r\n")
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by cache server.")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body
+        if kind == b"-":
+            # Boru hattındaki diğer yanıtlar okunana kadar fırlatılmaz (bağlantı senkron kalır).
+            return RespError(body.decode(errors="replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by cache server.")
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"Unexpected cache server reply: {line[:32]!r}")
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis protokolü konuşan paylaşımlı depo (Redis, Valkey, KeyDB, Dragonfly).
+    Harici istemci kütüphanesi gerektirmez. Çoklu okuma tek MGET, yazma + sabitleme tek
+    boru hattıdır. Sabitlenmemiş girdiler ttl_seconds sonra düşer; tahliye sunucunun
+    maxmemory politikasına bırakılır. Sunucuya ulaşılamazsa REDIS_RETRY_SECONDS boyunca
+    katman atlanır ve istekler ıskalama olarak devam eder.
+    """
+
+    tier = "redis"
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "",
+        ttl_seconds: int = 0,
+        timeout: float = 0.25,
+        pool_size: int = 8,
+    ):
+        self.url = urlparse(url)
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle: List[_RespConnection] = []
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        if not keys:
+            return {}
+        replies = self._execute([["MGET", *(self.prefix + key for key in keys)]])
+        if replies is None:
+            return {}
+        return {key: value for key, value in zip(keys, replies[0]) if value is not None}
+
+    def put(self, key: str, value: bytes, pin: bool = False):
+        command: List[object] = ["SET", self.prefix + key, value]
+        if self.ttl_seconds > 0 and not pin:
+            command += ["EX", self.ttl_seconds]
+        commands = [command]
+        if pin:
+            commands.append(["SADD", self._pins_key, key])
+        self._execute(commands)
+
+    def contains(self, key: str) -> bool:
+        replies = self._execute([["EXISTS", self.prefix + key]])
+        return bool(replies and replies[0])
+
+    def pin(self, key: str):
+        self._execute([["PERSIST", self.prefix + key], ["SADD", self._pins_key, key]])
+
+    def load(self) -> List[str]:
+        replies = self._execute([["SMEMBERS", self._pins_key]])
+        if replies is None:
+            return []
+        logger.info(
+            f"Shared audio cache reachable at {self.url.hostname}:{self.url.port or 6379}.",
+            extra={"event": "AUDIO_CACHE_REDIS_READY"},
+        )
+        return sorted(member.decode() for member in replies[0])
+
+    @property
+    def _pins_key(self) -> str:
+        return self.prefix + PINS_FILE
+
+    def _execute(self, commands: List[list]) -> Optional[list]:
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            with self._connection() as conn:
+                replies = conn.execute_many(commands)
+        except (OSError, ConnectionError, RespError, ValueError) as e:
+            with self._lock:
+                was_up = self._down_until == 0.0
+                self._down_until = time.monotonic() + REDIS_RETRY_SECONDS
+            if was_up:
+                logger.warning(
+                    f"Shared audio cache unavailable, bypassing for "
+                    f"{REDIS_RETRY_SECONDS:.0f}s: {e}",
+                    extra={"event": "AUDIO_CACHE_REDIS_DOWN"},
+                )
+            return None
+        self._down_until = 0.0
+        return replies
+
+    @contextmanager
+    def _connection(self) -> Iterator[_RespConnection]:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = _RespConnection(self.url, self.timeout)
+        try:
+            yield conn
+        except BaseException:
+            # Yarım kalan yanıt bağlantıyı senkrondan çıkarır: havuza dönmez.
+            conn.close()
+            raise
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+
+def create_backend(settings) -> CacheBackend:
+    kind = settings.AUDIO_CACHE_BACKEND.lower()
+    if kind == "redis":
+        return RedisBackend(
+            settings.AUDIO_CACHE_REDIS_URL,
+            prefix=settings.AUDIO_CACHE_REDIS_PREFIX,
+            ttl_seconds=settings.AUDIO_CACHE_REDIS_TTL,
+            timeout=settings.AUDIO_CACHE_REDIS_TIMEOUT_MS / 1000.0,
+        )
+    if kind == "memory":
+        return MemoryBackend(capacity=settings.AUDIO_CACHE_MEMORY_ITEMS)
+    if kind != "filesystem":
+        logger.warning(
+            f"Unknown audio cache backend '{kind}', using filesystem.",
+            extra={"event": "AUDIO_CACHE_BACKEND_UNKNOWN"},
+        )
+    return FilesystemBackend(
+        settings.AUDIO_CACHE_DIR, settings.AUDIO_CACHE_DISK_MAX_MB * 1024 * 1024
+    )
@@ -85,6 +85,228 @@ class Settings(BaseSettings):
         os.getenv("TTS_COQUI_SERVICE_DEFAULT_SAMPLE_RATE", "24000")
     )
 
+    # --- AUDIO CACHE ---
+    AUDIO_CACHE_DIR: str = os.getenv(
+        "TTS_COQUI_SERVICE_AUDIO_CACHE_DIR", "/app/cache/audio"
+    )
+    AUDIO_CACHE_RAM_ITEMS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_AUDIO_CACHE_RAM_ITEMS", "100")
+    )
+    AUDIO_CACHE_DISK_MAX_MB: int = int(
+        os.getenv("TTS_COQUI_SERVICE_AUDIO_CACHE_DISK_MAX_MB", "2048")
+    )
+    # GET /api/tts/audio/{id} yanıtlarının Cache-Control ömrü (sn). İçerik kimliği istek
+    # parametrelerinden, model adından ve konuşmacı sürümünden türediği için değişmez.
+    AUDIO_HTTP_MAX_AGE: int = int(
+        os.getenv("TTS_COQUI_SERVICE_AUDIO_HTTP_MAX_AGE", "31536000")
+    )
+    # RAM arkasındaki katman: filesystem (AUDIO_CACHE_DIR; replikalar arası paylaşım için
+    # NFS/hostPath bağlanabilir) | redis (Redis protokolü) | memory (süreç içi).
+    AUDIO_CACHE_BACKEND: str = os.getenv(
+        "TTS_COQUI_SERVICE_AUDIO_CACHE_BACKEND", "filesystem"
+    )
+    AUDIO_CACHE_MEMORY_ITEMS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_AUDIO_CACHE_MEMORY_ITEMS", "1000")
+    )
+    # redis:// ya da rediss:// (TLS); kullanıcı/parola ve veritabanı URL'de verilir.
+    AUDIO_CACHE_REDIS_URL: str = os.getenv(
+        "TTS_COQUI_SERVICE_AUDIO_CACHE_REDIS_URL", "redis://localhost:6379/0"
+    )
+    AUDIO_CACHE_REDIS_PREFIX: str = os.getenv(
+        "TTS_COQUI_SERVICE_AUDIO_CACHE_REDIS_PREFIX", "sentiric:tts:audio:"
+    )
+    # Sabitlenmemiş girdilerin ömrü (sn). 0 = süresiz (tahliye maxmemory politikasına kalır).
+    AUDIO_CACHE_REDIS_TTL: int = int(
+        os.getenv("TTS_COQUI_SERVICE_AUDIO_CACHE_REDIS_TTL", "604800")
+    )
+    AUDIO_CACHE_REDIS_TIMEOUT_MS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_AUDIO_CACHE_REDIS_TIMEOUT_MS", "250")
+    )
+    # none | zlib (yalnızca wav/pcm girdileri; RAM katmanı her zaman ham tutar).
+    AUDIO_CACHE_COMPRESSION: str = os.getenv(
+        "TTS_COQUI_SERVICE_AUDIO_CACHE_COMPRESSION", "none"
+    )
+    # Boş değilse başlangıçta bu katalog arka planda önbelleğe işlenir.
+    PREWARM_CATALOG: str = os.getenv("TTS_COQUI_SERVICE_PREWARM_CATALOG", "")
+    PREWARM_WORKERS: int = int(os.getenv("TTS_COQUI_SERVICE_PREWARM_WORKERS", "2"))
+
+    # --- BATCH ---
+    BATCH_MAX_ITEMS: int = int(os.getenv("TTS_COQUI_SERVICE_BATCH_MAX_ITEMS", "5000"))
+
+    # --- SCENE (STUDIO) ---
+    SCENE_MAX_BLOCKS: int = int(os.getenv("TTS_COQUI_SERVICE_SCENE_MAX_BLOCKS", "200"))
+    # Bloklar bu büyüklükteki pencereler içinde konuşmacıya göre gruplanır; büyüdükçe
+    # konuşmacı geçişi azalır ama ilk sesin gelmesi ve sıra dışı bekleyen ses artar.
+    SCENE_GROUP_WINDOW: int = int(
+        os.getenv("TTS_COQUI_SERVICE_SCENE_GROUP_WINDOW", "8")
+    )
+    SCENE_GAP_MS: int = int(os.getenv("TTS_COQUI_SERVICE_SCENE_GAP_MS", "300"))
+    # GET /api/scene/{id} için bellekte tutulan son sahne zaman çizelgesi sayısı.
+    SCENE_TIMELINE_ITEMS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_SCENE_TIMELINE_ITEMS", "256")
+    )
+
+    # --- gRPC UNARY ---
+    # Bu sınırları aşan istekler CoquiSynthesizeStream'e yönlendirilir.
+    GRPC_UNARY_MAX_CHARS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_GRPC_UNARY_MAX_CHARS", "500")
+    )
+    # gRPC istemcilerinin varsayılan alma sınırı 4 MB'dır.
+    GRPC_UNARY_MAX_AUDIO_BYTES: int = int(
+        os.getenv("TTS_COQUI_SERVICE_GRPC_UNARY_MAX_AUDIO_BYTES", str(3 * 1024 * 1024))
+    )
+
+    # --- INCREMENTAL (LLM TOKEN) STREAMING ---
+    INCREMENTAL_SEGMENT_CHARS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_INCREMENTAL_SEGMENT_CHARS", "220")
+    )
+    # İlk birim bu uzunluğu geçince virgülden erken kesilir (ilk ses gecikmesi düşer).
+    INCREMENTAL_EAGER_CHARS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_INCREMENTAL_EAGER_CHARS", "60")
+    )
+
+    # --- LONG-FORM JOBS ---
+    LONGFORM_JOBS_DIR: str = os.getenv(
+        "TTS_COQUI_SERVICE_LONGFORM_JOBS_DIR", "/app/cache/jobs"
+    )
+    LONGFORM_WORKERS: int = int(os.getenv("TTS_COQUI_SERVICE_LONGFORM_WORKERS", "1"))
+    LONGFORM_MAX_CHARS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_LONGFORM_MAX_CHARS", "500000")
+    )
+    # XTTS dil bazlı karakter sınırının (~250) altında kalmalı.
+    LONGFORM_CHUNK_CHARS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_LONGFORM_CHUNK_CHARS", "220")
+    )
+    LONGFORM_CHUNK_RETRIES: int = int(
+        os.getenv("TTS_COQUI_SERVICE_LONGFORM_CHUNK_RETRIES", "2")
+    )
+    LONGFORM_CHUNK_GAP_MS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_LONGFORM_CHUNK_GAP_MS", "250")
+    )
+    # Biten/başarısız işler (kayıt + sonuç dosyası) bu süre sonra silinir; 0 ise süresiz.
+    LONGFORM_JOB_MAX_AGE_HOURS: float = float(
+        os.getenv("TTS_COQUI_SERVICE_LONGFORM_JOB_MAX_AGE_HOURS", "72")
+    )
+    LONGFORM_EVICT_INTERVAL_SECONDS: float = float(
+        os.getenv("TTS_COQUI_SERVICE_LONGFORM_EVICT_INTERVAL_SECONDS", "300")
+    )
+
+    # --- HISTORY ---
+    # Studio geçmişinin SQLite dizini; ses blob'ları ses önbelleğinde (içerik kimliğiyle) durur.
+    HISTORY_ENABLED: bool = (
+        os.getenv("TTS_COQUI_SERVICE_HISTORY_ENABLED", "true").lower() == "true"
+    )
+    HISTORY_DB_PATH: str = os.getenv(
+        "TTS_COQUI_SERVICE_HISTORY_DB_PATH", "/app/history/history.db"
+    )
+    # Tenant başına tutulan en fazla kayıt; 0 ise sınırsız.
+    HISTORY_MAX_ENTRIES: int = int(
+        os.getenv("TTS_COQUI_SERVICE_HISTORY_MAX_ENTRIES", "1000")
+    )
+    # Bu yaştan eski kayıtlar silinir; 0 ise süre sınırı yok.
+    HISTORY_MAX_AGE_DAYS: float = float(
+        os.getenv("TTS_COQUI_SERVICE_HISTORY_MAX_AGE_DAYS", "30")
+    )
+    HISTORY_EVICT_INTERVAL_SECONDS: float = float(
+        os.getenv("TTS_COQUI_SERVICE_HISTORY_EVICT_INTERVAL_SECONDS", "300")
+    )
+
+    # --- PREFIX KV CACHE ---
+    # Konuşmacı başına GPT koşullandırma öneki KV durumu (~8 MB/konuşmacı, fp32).
+    ENABLE_PREFIX_KV_CACHE: bool = (
+        os.getenv("TTS_COQUI_SERVICE_ENABLE_PREFIX_KV_CACHE", "true").lower() == "true"
+    )
+    PREFIX_KV_CACHE_MB: int = int(
+        os.getenv("TTS_COQUI_SERVICE_PREFIX_KV_CACHE_MB", "256")
+    )
+
+    # --- VOCODER BACKEND ---
+    # eager | compile (torch.compile) | torchscript | onnx (onnxruntime gerekir).
+    # Derleme/eşitlik kontrolü başarısız olursa eager'a düşülür.
+    VOCODER_BACKEND: str = os.getenv(
+        "TTS_COQUI_SERVICE_VOCODER_BACKEND", "eager"
+    ).lower()
+    VOCODER_CACHE_DIR: str = os.getenv(
+        "TTS_COQUI_SERVICE_VOCODER_CACHE_DIR", "/app/cache/vocoder"
+    )
+
+    # --- VOCODER BATCHING ---
+    # Eşzamanlı isteklerin HiFi-GAN çağrıları tek batch'te çözülür (1 = kapalı).
+    # Kazanç çekirdek sayısına bağlıdır; açmadan önce model_benchmark.py vocoder_batch.
+    VOCODER_BATCH_SIZE: int = int(
+        os.getenv("TTS_COQUI_SERVICE_VOCODER_BATCH_SIZE", "1")
+    )
+    VOCODER_BATCH_WAIT_MS: float = float(
+        os.getenv("TTS_COQUI_SERVICE_VOCODER_BATCH_WAIT_MS", "8")
+    )
+
+    # --- STREAM BUFFERING ---
+    # Üretim tüketiciyi beklemez: akış başına bellek tamponu, aşılınca diske taşar.
+    # 1 MB ~ 21 sn 24 kHz PCM. Disk sınırı da aşılırsa akış kesilir.
+    STREAM_BUFFER_MEMORY_KB: int = int(
+        os.getenv("TTS_COQUI_SERVICE_STREAM_BUFFER_MEMORY_KB", "1024")
+    )
+    STREAM_SPILL_MAX_MB: int = int(
+        os.getenv("TTS_COQUI_SERVICE_STREAM_SPILL_MAX_MB", "64")
+    )
+    STREAM_SPILL_DIR: str = os.getenv("TTS_COQUI_SERVICE_STREAM_SPILL_DIR", "")
+
+    # --- GPT / VOCODER PIPELINE ---
+    # Akışta GPT ve HiFi-GAN ayrı thread'lerde örtüşerek çalışır (chunk N çözülürken
+    # chunk N+1 üretilir). Derinlik: GPT'nin önde gidebileceği chunk sayısı.
+    ENABLE_STAGE_PIPELINE: bool = (
+        os.getenv("TTS_COQUI_SERVICE_ENABLE_STAGE_PIPELINE", "true").lower() == "true"
+    )
+    STAGE_PIPELINE_DEPTH: int = int(
+        os.getenv("TTS_COQUI_SERVICE_STAGE_PIPELINE_DEPTH", "2")
+    )
+    # Aşama başına intra-op thread bütçesi (0 = torch varsayılanı).
+    GPT_THREADS: int = int(os.getenv("TTS_COQUI_SERVICE_GPT_THREADS", "0"))
+    VOCODER_THREADS: int = int(os.getenv("TTS_COQUI_SERVICE_VOCODER_THREADS", "0"))
+
+    # --- SPEAKER REGISTRY ---
+    SPEAKER_SCAN_INTERVAL: float = float(
+        os.getenv("TTS_COQUI_SERVICE_SPEAKER_SCAN_INTERVAL", "5.0")
+    )
+    LATENT_CACHE_SIZE: int = int(
+        os.getenv("TTS_COQUI_SERVICE_LATENT_CACHE_SIZE", "256")
+    )
+
+    # --- LANGUAGE DETECTION ---
+    LANG_ID_PREFIX_CHARS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_LANG_ID_PREFIX_CHARS", "200")
+    )
+    LANG_ID_CACHE_SIZE: int = int(
+        os.getenv("TTS_COQUI_SERVICE_LANG_ID_CACHE_SIZE", "4096")
+    )
+
+    # --- TENANT SCHEDULING ---
+    # Model süresi tenant'lar arasında ağırlıklarıyla orantılı paylaşılır (WFQ).
+    # Biçim: "tenant_a=4,tenant_b=0.5"; listede olmayan tenant varsayılan ağırlığı alır.
+    TENANT_WEIGHTS: str = os.getenv("TTS_COQUI_SERVICE_TENANT_WEIGHTS", "")
+    TENANT_DEFAULT_WEIGHT: float = float(
+        os.getenv("TTS_COQUI_SERVICE_TENANT_DEFAULT_WEIGHT", "1.0")
+    )
+    # Tenant başına karakter/sn kotası (token bucket). 0 = sınırsız.
+    # TENANT_QUOTAS aynı biçimde tenant bazlı geçersiz kılar.
+    TENANT_QUOTA_CHARS_PER_SEC: float = float(
+        os.getenv("TTS_COQUI_SERVICE_TENANT_QUOTA_CHARS_PER_SEC", "0")
+    )
+    TENANT_QUOTAS: str = os.getenv("TTS_COQUI_SERVICE_TENANT_QUOTAS", "")
+    # Kova kapasitesi = kota x bu süre (sn): boştaki tenant'ın yapabileceği anlık burst.
+    TENANT_QUOTA_BURST_SECONDS: float = float(
+        os.getenv("TTS_COQUI_SERVICE_TENANT_QUOTA_BURST_SECONDS", "10")
+    )
+
+    # --- METRICS ---
+    # Boşsa ilk N tenant kendi label'ını alır, kalanlar "other" olur.
+    METRICS_TENANT_ALLOWLIST: str = os.getenv(
+        "TTS_COQUI_SERVICE_METRICS_TENANT_ALLOWLIST", ""
+    )
+    METRICS_MAX_TENANTS: int = int(
+        os.getenv("TTS_COQUI_SERVICE_METRICS_MAX_TENANTS", "20")
+    )
+
     # --- LOGGING ---
     DEBUG: bool = os.getenv("TTS_COQUI_SERVICE_DEBUG", "false").lower() == "true"
 
@@ -1,20 +1,26 @@
+import io
 import os
-import time
 import torch
 import numpy as np
-import langid
 import glob
 import hashlib
 import json
 import logging
+import queue
 import threading
+import time
 import gc
 import shutil
 import torchaudio
-from typing import Dict, Any, Callable, Optional
+import torch.nn.functional as F
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Optional, Tuple
 
 from TTS.tts.configs.xtts_config import XttsConfig
 from TTS.tts.models.xtts import Xtts
+from TTS.tts.layers.xtts.tokenizer import split_sentence
 from TTS.utils.manage import ModelManager
 from TTS.utils.generic_utils import get_user_data_dir
 
@@ -22,9 +28,33 @@ from app.core.config import settings
 from app.core.normalizer import normalizer
 from app.core.audio import audio_processor
 from app.core.ssml_handler import ssml_handler
+from app.core.lang_id import language_identifier
+from app.core.timing import RequestTimings
+from app.core.cache import MemoryLRUCache
+from app.core.estimator import SynthesisEstimator
+from app.core.pcm import TRIM_FADE_LEN, TRIM_THRESHOLD, PcmEncoder, trim_tail
+from app.core.prefix_cache import PrefixKVCache
+from app.core.scheduler import FairScheduler
+from app.core.vocoder import BatchedVocoder, VocoderBatcher, install_vocoder_backend
+from app.core.speaker_registry import FALLBACK_SPEAKER, SpeakerRegistry
+from app.core import metrics
 
 logger = logging.getLogger("XTTS-ENGINE")
 
+# Xtts.inference_stream varsayılanları: chunk başına GPT token'ı ve çapraz geçiş örneği.
+STREAM_CHUNK_TOKENS = 20
+STREAM_OVERLAP_SAMPLES = 1024
+
+
+class SynthesisCancelled(Exception):
+    """İstemci ayrıldı: sentez bir GPT adımı ya da vocoder çağrısı sınırında durduruldu."""
+
+
+class DeadlineExceeded(SynthesisCancelled):
+    """İsteğin deadline'ı geçti ya da kalan süre tahmini sentez süresine yetmiyor."""
+
+    abort_reason = "deadline"
+
 
 class SmartMemoryManager:
     def __init__(self, device: str, threshold_mb: int = 4500):
@@ -42,16 +72,17 @@ class SmartMemoryManager:
             if allocated > self.threshold_mb or (
                 self.request_counter % self.gc_frequency == 0
             ):
-                reason = (
-                    f"High VRAM ({int(allocated)}MB)"
-                    if allocated > self.threshold_mb
-                    else "Periodic"
-                )
-                self._force_clean(reason)
+                if allocated > self.threshold_mb:
+                    self._force_clean(
+                        f"High VRAM ({int(allocated)}MB)", kind="threshold"
+                    )
+                else:
+                    self._force_clean("Periodic", kind="periodic")
         except Exception:
             pass
 
-    def _force_clean(self, reason: str):
+    def _force_clean(self, reason: str, kind: str = "oom"):
+        metrics.MEMORY_CLEANUPS.labels(kind=kind).inc()
         logger.info(
             f"🧹 Memory Cleanup Triggered: {reason}. Cleaning cache...",
             extra={"event": "VRAM_CLEANUP"},
@@ -63,7 +94,17 @@ class SmartMemoryManager:
 
 class TTSEngine:
     _instance = None
-    _gpu_lock = threading.Lock()
+    # Kilidi tutan, bekleyen ya da vocoder batch'i için geçici bırakmış istek sayısı.
+    _inflight = 0
+    _inflight_lock = threading.Lock()
+    _slot_local = threading.local()
+
+    # __new__ içinde tekil örneğe atanan bileşenler.
+    speaker_registry: SpeakerRegistry
+    latents_cache: "MemoryLRUCache[Tuple[torch.Tensor, torch.Tensor]]"
+    prefix_cache: PrefixKVCache
+    estimator: SynthesisEstimator
+    scheduler: FairScheduler
 
     SPEAKERS_DIR = "/app/speakers"
     CACHE_DIR = "/app/cache"
@@ -73,10 +114,21 @@ class TTSEngine:
         if cls._instance is None:
             cls._instance = super(TTSEngine, cls).__new__(cls)
             cls._instance.model = None
-            cls._instance.speakers_map = {}
-            cls._instance.last_cache_update = 0
-            cls._instance.CACHE_TTL = 60
+            cls._instance.speaker_registry = SpeakerRegistry(
+                cls.SPEAKERS_DIR, scan_interval=settings.SPEAKER_SCAN_INTERVAL
+            )
+            cls._instance.latents_cache = MemoryLRUCache(
+                capacity=settings.LATENT_CACHE_SIZE
+            )
+            cls._instance.prefix_cache = PrefixKVCache(
+                settings.PREFIX_KV_CACHE_MB * 1024 * 1024
+            )
+            cls._instance.estimator = SynthesisEstimator()
+            # Model kilidi: tenant'lar arası WFQ + karakter kotası.
+            cls._instance.scheduler = FairScheduler.from_settings()
             cls._instance.memory_manager = None
+            cls._instance.vocoder_backend = "eager"
+            cls._instance.vocoder_stage = None
             cls._instance.native_sample_rate = 24000
         return cls._instance
 
@@ -91,6 +143,7 @@ class TTSEngine:
                 extra={"event": "MODEL_INIT"},
             )
             try:
+                language_identifier.load()
                 self._ensure_fallback_speaker()
                 self._migrate_legacy_speakers()
 
@@ -131,142 +184,647 @@ class TTSEngine:
                         extra={"event": "MODEL_LOADED_CPU"},
                     )
 
+                self.vocoder_backend = install_vocoder_backend(
+                    self.model.hifigan_decoder,
+                    settings.VOCODER_BACKEND,
+                    settings.VOCODER_CACHE_DIR,
+                )
+                self._install_vocoder_stage()
+                self._install_stage_hooks()
+                self._install_cancellation_hook()
+                # DeepSpeed GPT modülünü kendi çekirdekleriyle değiştirir; önek KV'si uygulanmaz.
+                if settings.ENABLE_PREFIX_KV_CACHE and not settings.ENABLE_DEEPSPEED:
+                    self.prefix_cache.install(self.model)
                 self.refresh_speakers(force=True)
+                self.speaker_registry.start()
             except Exception as e:
                 logger.critical(
                     f"🔥 Model init failed: {e}", extra={"event": "MODEL_INIT_FAILED"}
                 )
                 raise e
 
+    def _install_vocoder_stage(self):
+        """
+        Vocoder aşamasını (kendi thread'i ve thread bütçesiyle) kurar. Akış hattı bu aşamaya
+        doğrudan iş gönderir; VOCODER_BATCH_SIZE > 1 ise hifigan_decoder da batcher
+        vekiliyle değiştirilir (unary `inference` yolu da batch'e katılır).
+        """
+        decoder = getattr(self.model, "hifigan_decoder", None)
+        if isinstance(decoder, BatchedVocoder):
+            decoder = decoder.inner
+        if not isinstance(decoder, torch.nn.Module):
+            return
+        self.vocoder_stage = VocoderBatcher(
+            decoder,
+            max_batch=settings.VOCODER_BATCH_SIZE,
+            wait_ms=settings.VOCODER_BATCH_WAIT_MS,
+            expected_jobs=lambda: self._inflight,
+            num_threads=settings.VOCODER_THREADS,
+        )
+        if settings.VOCODER_BATCH_SIZE <= 1:
+            self.model.hifigan_decoder = decoder
+            return
+        self.model.hifigan_decoder = BatchedVocoder(
+            self.vocoder_stage, release=self._released_slot
+        )
+        logger.info(
+            f"Vocoder batching enabled (max {settings.VOCODER_BATCH_SIZE}, "
+            f"wait {settings.VOCODER_BATCH_WAIT_MS} ms).",
+            extra={"event": "VOCODER_BATCHING_READY"},
+        )
+
+    def _install_stage_hooks(self):
+        """HiFi-GAN decoder'a forward hook ekler; GPT süresi = model süresi - vocoder süresi."""
+        decoder = getattr(self.model, "hifigan_decoder", None)
+        if decoder is None or not hasattr(decoder, "register_forward_hook"):
+            return
+        if isinstance(decoder, BatchedVocoder):
+            return  # Vekil, vocoder süresini çağıran isteğe kendisi yazar.
+
+        # Yalnızca model kilidini tutan thread'deki çağrılar sayılır; akış hattının vocoder
+        # aşaması kendi süresini iş bazında yazar (_await_vocoder).
+        def _pre_hook(module, inputs):
+            slot = getattr(self._slot_local, "slot", None)
+            if slot is None:
+                return
+            self._check_cancelled()
+            if settings.DEVICE == "cuda":
+                torch.cuda.synchronize()
+            slot["vocoder_started_at"] = time.perf_counter()
+
+        def _post_hook(module, inputs, output):
+            slot = getattr(self._slot_local, "slot", None)
+            if slot is None or slot.get("vocoder_started_at") is None:
+                return
+            if settings.DEVICE == "cuda":
+                torch.cuda.synchronize()
+            slot["timings"].add(
+                "vocoder", time.perf_counter() - slot.pop("vocoder_started_at")
+            )
+
+        decoder.register_forward_pre_hook(_pre_hook)
+        decoder.register_forward_hook(_post_hook)
+
+    def _install_cancellation_hook(self):
+        """
+        GPT inference modülünün her forward çağrısından (üretilen her token) önce isteğin
+        iptal durumunu kontrol eder. generate döngüsü, akış ve unary yolları için tek nokta.
+        """
+        inference_model = getattr(
+            getattr(self.model, "gpt", None), "gpt_inference", None
+        )
+        if not hasattr(inference_model, "register_forward_pre_hook"):
+            logger.warning(
+                "GPT inference module not found; cancellation checked per chunk only.",
+                extra={"event": "CANCELLATION_HOOK_UNSUPPORTED"},
+            )
+            return
+        inference_model.register_forward_pre_hook(
+            lambda module, inputs: self._check_cancelled()
+        )
+
+    def _check_cancelled(self):
+        """
+        Model kilidini tutan thread'de çağrılır: deadline geçtiyse DeadlineExceeded,
+        istek iptal edildiyse SynthesisCancelled.
+        """
+        slot = getattr(self._slot_local, "slot", None)
+        if slot is None:
+            return
+        timings = slot["timings"]
+        if timings.deadline is not None and time.perf_counter() > timings.deadline:
+            metrics.record_deadline_drop(timings.front_door, "inflight")
+            raise DeadlineExceeded("Request deadline passed during synthesis.")
+        if slot["cancelled"] is not None and slot["cancelled"]():
+            raise SynthesisCancelled("Synthesis cancelled by client.")
+
+    def _estimate_seconds(self, conf: dict) -> Optional[float]:
+        return self.estimator.estimate(len(conf["text"]), conf["speed"])
+
+    def _observe(self, conf: dict, timings: RequestTimings):
+        """Tamamlanan isteğin kilit süresi, tahmin edicinin RTF ortalamasını günceller."""
+        self.estimator.observe(
+            len(conf["text"]),
+            conf["speed"],
+            timings.audio_seconds(),
+            timings.stages.get("lock_hold", 0.0) / 1000.0,
+        )
+
+    def _charge_quota(self, conf: dict, timings: RequestTimings, background: bool):
+        """Tenant karakter kotası: gerçek zamanlı istek QuotaExceeded alır, arka plan bekler."""
+        self.scheduler.charge(timings.tenant_id, len(conf["text"]), wait=background)
+
+    @staticmethod
+    def _admit(
+        timings: RequestTimings, estimated_seconds: Optional[float]
+    ) -> Optional[float]:
+        """
+        Deadline kabul kontrolü: kalan süre tahmini sentez süresine yetmiyorsa
+        DeadlineExceeded. Kilit beklemesi için kalan bütçeyi (deadline yoksa None) döner.
+        """
+        budget = timings.time_remaining()
+        if budget is not None:
+            budget -= estimated_seconds or 0.0
+            if budget <= 0:
+                metrics.record_deadline_drop(timings.front_door, "admission")
+                raise DeadlineExceeded(
+                    "Remaining deadline cannot cover the estimated synthesis time."
+                )
+        return budget
+
+    @contextmanager
+    def _model_slot(
+        self,
+        timings: RequestTimings,
+        background: bool = False,
+        cancelled: Optional[Callable[[], bool]] = None,
+        estimated_seconds: Optional[float] = None,
+    ):
+        """
+        Model kilidini tenant sırasına göre (FairScheduler) alır; bekleme ve tutma
+        sürelerini ölçer. cancelled verilirse kilit altındaki her GPT adımında ve vocoder
+        çağrısında kontrol edilir (_check_cancelled).
+
+        İstekte deadline varsa kalan süre tahmini sentez süresine yetmediğinde iş modele
+        hiç girmeden DeadlineExceeded ile düşürülür: kuyruğa girmeden önce ve kilit
+        beklemesi (en fazla kalan süre - tahmin kadar beklenir) sonunda.
+        """
+        budget = self._admit(timings, estimated_seconds)
+
+        with self._inflight_lock:
+            TTSEngine._inflight += 1
+        wait_started = time.perf_counter()
+        try:
+            ticket = self.scheduler.acquire(
+                timings.tenant_id, estimated_seconds, background, budget
+            )
+        except BaseException:
+            with self._inflight_lock:
+                TTSEngine._inflight -= 1
+            raise
+        if ticket is None:
+            with self._inflight_lock:
+                TTSEngine._inflight -= 1
+            timings.add("queue_wait", time.perf_counter() - wait_started)
+            metrics.record_deadline_drop(timings.front_door, "queue")
+            raise DeadlineExceeded(
+                "Request deadline would pass while waiting for the model."
+            )
+        slot: Dict[str, Any] = {
+            "timings": timings,
+            "ticket": ticket,
+            "released": 0.0,
+            "cancelled": cancelled,
+        }
+        self._slot_local.slot = slot
+        held = 0.0
+        try:
+            acquired_at = time.perf_counter()
+            timings.add("queue_wait", acquired_at - wait_started)
+            try:
+                # Kuyrukta beklerken ayrılan istemci için modele hiç girilmez.
+                self._check_cancelled()
+                yield
+            finally:
+                held = time.perf_counter() - acquired_at - slot["released"]
+                timings.add("lock_hold", held)
+        finally:
+            self._slot_local.slot = None
+            self.scheduler.release(ticket, held)
+            with self._inflight_lock:
+                TTSEngine._inflight -= 1
+
+    @contextmanager
+    def _released_slot(self):
+        """
+        Vocoder batch beklemesi boyunca model kilidini bırakır: diğer istekler GPT
+        adımlarını çalıştırıp aynı batch'e katılabilir. Dönüşte kilit aynı sıra etiketiyle
+        geri alınır ve bu isteğe ait GPT durumu (önek gömmesi, önek KV'si) geri yüklenir.
+        """
+        slot = getattr(self._slot_local, "slot", None)
+        if slot is None:  # Kilit dışı çağrı (ör. benchmark): bırakılacak bir şey yok.
+            yield None
+            return
+
+        timings = slot["timings"]
+        gpt_state = self._gpt_state()
+        released_at = time.perf_counter()
+        self.scheduler.pause()
+        try:
+            yield timings
+        finally:
+            wait_started = time.perf_counter()
+            self.scheduler.resume(slot["ticket"])
+            reacquired_at = time.perf_counter()
+            timings.add("queue_wait", reacquired_at - wait_started)
+            slot["released"] += reacquired_at - released_at
+            self._restore_gpt_state(gpt_state)
+
+    def _gpt_state(self):
+        inference_model = getattr(
+            getattr(self.model, "gpt", None), "gpt_inference", None
+        )
+        if inference_model is None:
+            return None
+        return (
+            inference_model,
+            getattr(inference_model, "cached_prefix_emb", None),
+            getattr(inference_model, "_prefix_past", None),
+        )
+
+    @staticmethod
+    def _restore_gpt_state(state):
+        if state is None:
+            return
+        inference_model, prefix_emb, prefix_past = state
+        inference_model.cached_prefix_emb = prefix_emb
+        if hasattr(inference_model, "_prefix_past"):
+            inference_model._prefix_past = prefix_past
+
+    @staticmethod
+    def _offloaded_ms(timings: RequestTimings) -> float:
+        """Model çağrısı içinde GPT'ye ait olmayan süre: vocoder + kilidi geri alma beklemesi."""
+        return timings.stages.get("vocoder", 0.0) + timings.stages.get(
+            "queue_wait", 0.0
+        )
+
+    def _record_model_time(
+        self, timings: RequestTimings, model_ms: float, offloaded_before_ms: float
+    ):
+        offloaded_ms = self._offloaded_ms(timings) - offloaded_before_ms
+        timings.add("gpt", max(model_ms - offloaded_ms, 0.0) / 1000.0)
+
     def synthesize_stream(
         self,
         params: dict,
         speaker_wavs: Optional[list] = None,
         is_aborted_cb: Optional[Callable[[], bool]] = None,
+        timings: Optional[RequestTimings] = None,
     ):
-        conf = self._prepare_inference(params, speaker_wavs)
+        """
+        Hazırlık (normalizasyon, latentler), deadline kabulü ve tenant kotası çağrı anında
+        yapılır: DeadlineExceeded/QuotaExceeded, çağıran yanıt başlıklarını göndermeden
+        önce yükselir (kabul edilmeyen istek kotadan düşülmez). Dönen
+        üreteçte model döngüsü ayrı bir thread'de kilit altında çalışır ve ham float
+        chunk'ları sıraya koyar; yeniden örnekleme, son chunk kırpması ve int16 dönüşümü
+        tüketici thread'inde, kilit dışında yapılır. Dönen memoryview bir sonraki
+        iterasyona kadar geçerlidir.
+        """
+        timings = timings or RequestTimings()
+        conf = self._prepare_inference(params, speaker_wavs, timings)
+        self._admit(timings, self._estimate_seconds(conf))
+        self._charge_quota(conf, timings, background=False)
+        return self._stream_chunks(conf, params, timings, is_aborted_cb)
 
-        with self._gpu_lock:
-            try:
-                with torch.inference_mode():
-                    chunks = self.model.inference_stream(
-                        conf["text"],
-                        conf["language"],
-                        conf["gpt_cond_latent"],
-                        conf["speaker_embedding"],
-                        temperature=conf["temperature"],
-                        repetition_penalty=conf["repetition_penalty"],
-                        top_k=conf["top_k"],
-                        top_p=conf["top_p"],
-                        speed=conf["speed"],
-                        enable_text_splitting=conf["split_sentences"],
-                    )
+    def _stream_chunks(
+        self,
+        conf: dict,
+        params: dict,
+        timings: RequestTimings,
+        is_aborted_cb: Optional[Callable[[], bool]],
+    ):
+        stopped = threading.Event()
 
-                    target_sr = params.get("sample_rate") or self.native_sample_rate
-                    resampler = None
-                    if self.native_sample_rate != target_sr:
-                        resampler = torchaudio.transforms.Resample(
-                            orig_freq=self.native_sample_rate, new_freq=target_sr
-                        )
+        def aborted() -> bool:
+            return stopped.is_set() or (is_aborted_cb is not None and is_aborted_cb())
 
-                    last_chunk_np = None
-                    for chunk in chunks:
-                        if is_aborted_cb is not None and is_aborted_cb():
-                            logger.warning(
-                                "Inference aborted by client disconnect (Barge-in). Releasing GPU lock.",
-                                extra={"event": "GPU_INFERENCE_ABORTED"},
-                            )
-                            break
+        raw_chunks: "queue.SimpleQueue[Tuple[str, Any]]" = queue.SimpleQueue()
+        threading.Thread(
+            target=self._stream_model_worker,
+            args=(conf, timings, aborted, raw_chunks),
+            daemon=True,
+        ).start()
 
-                        wav_chunk_float = (
-                            chunk.cpu().numpy()
-                            if settings.DEVICE == "cuda"
-                            else chunk.numpy()
-                        )
+        target_sr = params.get("sample_rate") or self.native_sample_rate
+        resampler = None
+        if self.native_sample_rate != target_sr:
+            resampler = torchaudio.transforms.Resample(
+                orig_freq=self.native_sample_rate, new_freq=target_sr
+            )
+        encoder = PcmEncoder()
 
-                        if last_chunk_np is not None:
-                            tensor_chunk = torch.from_numpy(last_chunk_np)
-                            if resampler:
-                                if tensor_chunk.ndim == 1:
-                                    tensor_chunk = tensor_chunk.unsqueeze(0)
-                                tensor_chunk = resampler(tensor_chunk)
-
-                            final_chunk = (
-                                (tensor_chunk.numpy().flatten() * 32767)
-                                .astype(np.int16)
-                                .tobytes()
-                            )
-                            yield final_chunk
+        # Son chunk kırpılacağı için her chunk bir sonraki gelene kadar bekletilir.
+        pending = None
+        try:
+            while True:
+                kind, payload = raw_chunks.get()
+                if kind == "error":
+                    raise payload
+                if kind == "done" or aborted():
+                    break
+                if pending is not None:
+                    yield self._encode_stream_chunk(
+                        pending, encoder, resampler, target_sr, timings
+                    )
+                pending = payload
 
-                        last_chunk_np = wav_chunk_float
+            if pending is not None and not aborted():
+                yield self._encode_stream_chunk(
+                    trim_tail(pending), encoder, resampler, target_sr, timings
+                )
+                self._observe(conf, timings)
+        finally:
+            stopped.set()
 
-                    if last_chunk_np is not None and not (
-                        is_aborted_cb is not None and is_aborted_cb()
+    def _stream_model_worker(
+        self,
+        conf: dict,
+        timings: RequestTimings,
+        aborted: Callable[[], bool],
+        raw_chunks: queue.SimpleQueue,
+    ):
+        """Kilit altında yalnızca chunk üretir; tüketiciyi hiçbir zaman beklemez."""
+        try:
+            with self._model_slot(
+                timings,
+                cancelled=aborted,
+                estimated_seconds=self._estimate_seconds(conf),
+            ):
+                try:
+                    with (
+                        torch.inference_mode(),
+                        self.prefix_cache.bind(
+                            conf["voice_key"], conf["gpt_cond_latent"]
+                        ),
                     ):
-                        last_tensor = torch.from_numpy(last_chunk_np)
-                        cleaned_tensor = self._clean_and_trim_tensor(last_tensor)
-
-                        if resampler:
-                            if cleaned_tensor.ndim == 1:
-                                cleaned_tensor = cleaned_tensor.unsqueeze(0)
-                            cleaned_tensor = resampler(cleaned_tensor)
-
-                        final_chunk = (
-                            (cleaned_tensor.numpy().flatten() * 32767)
-                            .astype(np.int16)
-                            .tobytes()
-                        )
-                        yield final_chunk
+                        if self._pipeline_enabled():
+                            chunks = self._pipelined_stream(conf, timings)
+                        else:
+                            chunks = self._sequential_stream(conf, timings)
 
-                    self.memory_manager.check_and_clear()
+                        try:
+                            for chunk in chunks:
+                                if aborted():
+                                    logger.warning(
+                                        "Inference aborted by client disconnect (Barge-in). Releasing GPU lock.",
+                                        extra={"event": "GPU_INFERENCE_ABORTED"},
+                                    )
+                                    break
+                                raw_chunks.put(
+                                    (
+                                        "chunk",
+                                        chunk.cpu().numpy()
+                                        if settings.DEVICE == "cuda"
+                                        else chunk.numpy(),
+                                    )
+                                )
+                        finally:
+                            chunks.close()
 
-            except RuntimeError as e:
-                if "CUDA out of memory" in str(e):
+                        self.memory_manager.check_and_clear()
+
+                except SynthesisCancelled:
+                    raise
+                except RuntimeError as e:
+                    if "CUDA out of memory" in str(e):
+                        logger.error(
+                            "🚨 TTS Stream OOM! Cleaning cache...",
+                            extra={"event": "VRAM_OOM_STREAM"},
+                        )
+                        self.memory_manager._force_clean("OOM Stream Recovery")
+                    raise e
+                except Exception as e:
                     logger.error(
-                        "🚨 TTS Stream OOM! Cleaning cache...",
-                        extra={"event": "VRAM_OOM_STREAM"},
+                        f"TTS Stream processing failed: {e}",
+                        exc_info=True,
+                        extra={"event": "TTS_STREAM_ERROR"},
                     )
-                    self.memory_manager._force_clean("OOM Stream Recovery")
-                raise e
-            except Exception as e:
-                logger.error(
-                    f"TTS Stream processing failed: {e}",
-                    exc_info=True,
-                    extra={"event": "TTS_STREAM_ERROR"},
+                    raise e
+        except DeadlineExceeded as e:
+            logger.warning(
+                f"Stream dropped: {e}", extra={"event": "REQUEST_DEADLINE_EXCEEDED"}
+            )
+            raw_chunks.put(("error", e))
+        except SynthesisCancelled:
+            logger.warning(
+                "Inference cancelled mid-chunk (Barge-in). GPU lock released.",
+                extra={"event": "GPU_INFERENCE_ABORTED"},
+            )
+            raw_chunks.put(("done", None))
+        except Exception as e:
+            raw_chunks.put(("error", e))
+        else:
+            raw_chunks.put(("done", None))
+
+    def _pipeline_enabled(self) -> bool:
+        return (
+            settings.ENABLE_STAGE_PIPELINE
+            and self.vocoder_stage is not None
+            and hasattr(getattr(self.model, "gpt", None), "get_generator")
+        )
+
+    def _sequential_stream(self, conf: dict, timings: RequestTimings):
+        """XTTS'in kendi inference_stream döngüsü: GPT ve vocoder aynı thread'de sırayla."""
+        chunks = self.model.inference_stream(
+            conf["text"],
+            conf["language"],
+            conf["gpt_cond_latent"],
+            conf["speaker_embedding"],
+            temperature=conf["temperature"],
+            repetition_penalty=conf["repetition_penalty"],
+            top_k=conf["top_k"],
+            top_p=conf["top_p"],
+            speed=conf["speed"],
+            enable_text_splitting=conf["split_sentences"],
+        )
+        model_seconds = 0.0
+        offloaded_before_ms = self._offloaded_ms(timings)
+        try:
+            while True:
+                step_started = time.perf_counter()
+                chunk = next(chunks, None)
+                model_seconds += time.perf_counter() - step_started
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            chunks.close()
+            self._record_model_time(
+                timings, model_seconds * 1000.0, offloaded_before_ms
+            )
+
+    def _pipelined_stream(self, conf: dict, timings: RequestTimings):
+        """
+        İki aşamalı akış (Xtts.inference_stream ile aynı çıktı): GPT token'ları bu thread'de
+        kilit altında üretilir, HiFi-GAN çözümü vocoder aşamasının thread'inde çalışır.
+        Chunk N çözülürken chunk N+1'in token'ları üretilir. Aşamalar arası kuyruk
+        STAGE_PIPELINE_DEPTH ile sınırlıdır; dolduğunda en eski chunk beklenir ve bu sürede
+        model kilidi diğer isteklere bırakılır.
+
+        Paylaşılan to_thread havuzundaki thread'in torch thread sayısı akış bitince eski
+        değerine döndürülür; havuzdan aynı thread'i sonra alan işler GPT_THREADS'i devralmaz.
+        """
+        if settings.GPT_THREADS <= 0:
+            yield from self._pipelined_sentences(conf, timings)
+            return
+        previous_threads = torch.get_num_threads()
+        torch.set_num_threads(settings.GPT_THREADS)
+        try:
+            yield from self._pipelined_sentences(conf, timings)
+        finally:
+            torch.set_num_threads(previous_threads)
+
+    def _pipelined_sentences(self, conf: dict, timings: RequestTimings):
+        model = self.model
+        language = conf["language"].split("-")[0]
+        length_scale = 1.0 / max(conf["speed"], 0.05)
+        gpt_cond_latent = conf["gpt_cond_latent"].to(model.device)
+        speaker_embedding = conf["speaker_embedding"].to(model.device)
+        sentences = [conf["text"]]
+        if conf["split_sentences"]:
+            sentences = split_sentence(
+                conf["text"], language, model.tokenizer.char_limits[language]
+            )
+
+        for sentence in sentences:
+            text_tokens = (
+                torch.IntTensor(
+                    model.tokenizer.encode(sentence.strip().lower(), lang=language)
+                )
+                .unsqueeze(0)
+                .to(model.device)
+            )
+            if text_tokens.shape[-1] >= model.args.gpt_max_text_tokens:
+                raise ValueError(
+                    f"XTTS can only generate text with a maximum of "
+                    f"{model.args.gpt_max_text_tokens} tokens."
                 )
-                raise e
+
+            started = time.perf_counter()
+            fake_inputs = model.gpt.compute_embeddings(gpt_cond_latent, text_tokens)
+            generator = model.gpt.get_generator(
+                fake_inputs=fake_inputs,
+                top_k=conf["top_k"],
+                top_p=conf["top_p"],
+                temperature=conf["temperature"],
+                do_sample=True,
+                num_beams=1,
+                num_return_sequences=1,
+                length_penalty=1.0,
+                repetition_penalty=float(conf["repetition_penalty"]),
+                output_attentions=False,
+                output_hidden_states=True,
+            )
+            timings.add("gpt", time.perf_counter() - started)
+
+            pending: "deque[Future]" = deque()
+            all_latents = []
+            new_tokens = 0
+            wav_gen_prev = wav_overlap = None
+            is_end = False
+            try:
+                while not is_end:
+                    self._check_cancelled()
+                    started = time.perf_counter()
+                    try:
+                        _, latent = next(generator)
+                        all_latents.append(latent)
+                        new_tokens += 1
+                    except StopIteration:
+                        is_end = True
+                    timings.add("gpt", time.perf_counter() - started)
+
+                    if all_latents and (is_end or new_tokens >= STREAM_CHUNK_TOKENS):
+                        gpt_latents = torch.cat(all_latents, dim=0)[None, :]
+                        if length_scale != 1.0:
+                            gpt_latents = F.interpolate(
+                                gpt_latents.transpose(1, 2),
+                                scale_factor=length_scale,
+                                mode="linear",
+                            ).transpose(1, 2)
+                        pending.append(
+                            self.vocoder_stage.submit(gpt_latents, speaker_embedding)
+                        )
+                        new_tokens = 0
+
+                    # Sırayla teslim: hazır olanlar hemen, kuyruk doluysa ya da bittiyse beklenir.
+                    while pending and (
+                        is_end
+                        or pending[0].done()
+                        or len(pending) > settings.STAGE_PIPELINE_DEPTH
+                    ):
+                        wav_gen = self._await_vocoder(pending.popleft(), timings)
+                        wav_chunk, wav_gen_prev, wav_overlap = model.handle_chunks(
+                            wav_gen.squeeze(),
+                            wav_gen_prev,
+                            wav_overlap,
+                            STREAM_OVERLAP_SAMPLES,
+                        )
+                        yield wav_chunk
+            finally:
+                generator.close()
+
+    def _await_vocoder(self, future: Future, timings: RequestTimings) -> torch.Tensor:
+        """
+        Çözüm GPT ile örtüştüğü için yalnızca isteğin gerçekten beklediği kısım "vocoder"
+        aşamasına yazılır; GPT'nin arkasında saklanan kalan süre "vocoder_concurrent"
+        olarak ayrı raporlanır (aşamaların toplamı duvar saatini aşmaz).
+        """
+        waited = 0.0
+        if not future.done():
+            with self._released_slot():
+                # Kilidi geri alma beklemesi queue_wait'e yazılır; burada sayılmaz.
+                started = time.perf_counter()
+                future.result()
+                waited = time.perf_counter() - started
+        decode_seconds = getattr(future, "decode_seconds", 0.0)
+        blocking = min(waited, decode_seconds)
+        timings.add("vocoder", blocking)
+        timings.add("vocoder_concurrent", decode_seconds - blocking)
+        return future.result()
+
+    def _encode_stream_chunk(
+        self,
+        samples: np.ndarray,
+        encoder: PcmEncoder,
+        resampler: Optional[torchaudio.transforms.Resample],
+        target_sr: int,
+        timings: RequestTimings,
+    ) -> memoryview:
+        if resampler:
+            with timings.measure("resample"):
+                samples = resampler(torch.from_numpy(samples).reshape(1, -1)).numpy()
+
+        with timings.measure("encode"):
+            pcm = encoder.encode(samples)
+        timings.add_audio(samples.size, target_sr)
+        return pcm
 
     def _clean_and_trim_tensor(
-        self, wav_tensor: torch.Tensor, threshold: float = 0.025, fade_len: int = 2400
+        self,
+        wav_tensor: torch.Tensor,
+        threshold: float = TRIM_THRESHOLD,
+        fade_len: int = TRIM_FADE_LEN,
     ) -> torch.Tensor:
         if wav_tensor.numel() == 0:
             return wav_tensor
         if wav_tensor.device.type == "cuda":
             wav_tensor = wav_tensor.cpu()
+        # numpy görünümü ve geri dönüş kopyasızdır; kırpma ve fade yerinde yapılır.
+        return torch.from_numpy(trim_tail(wav_tensor.numpy(), threshold, fade_len))
 
-        wav_np = wav_tensor.numpy().flatten()
-        abs_wav = np.abs(wav_np)
-        mask = abs_wav > threshold
-
-        if not np.any(mask):
-            return wav_tensor
-
-        last_index = len(mask) - 1 - np.argmax(mask[::-1])
-        cut_index = min(last_index + fade_len, len(wav_np))
-        trimmed_wav = wav_np[:cut_index]
-
-        actual_fade_len = min(fade_len, len(trimmed_wav))
-        if actual_fade_len > 10:
-            fade_curve = np.linspace(1.0, 0.0, actual_fade_len)
-            trimmed_wav[-actual_fade_len:] *= fade_curve
-
-        return torch.from_numpy(trimmed_wav)
-
-    def synthesize(self, params: dict, speaker_wavs: Optional[list] = None) -> bytes:
-        conf = self._prepare_inference(params, speaker_wavs)
+    def synthesize(
+        self,
+        params: dict,
+        speaker_wavs: Optional[list] = None,
+        timings: Optional[RequestTimings] = None,
+        background: bool = False,
+        is_aborted_cb: Optional[Callable[[], bool]] = None,
+    ) -> bytes:
+        """
+        is_aborted_cb True dönerse sentez bir sonraki GPT adımında (ya da vocoder
+        çağrısında) SynthesisCancelled ile kesilir ve model kilidi hemen bırakılır.
+        Tenant karakter kotası aşıldıysa QuotaExceeded; arka plan işleri kotayı bekler.
+        """
+        timings = timings or RequestTimings()
+        conf = self._prepare_inference(params, speaker_wavs, timings)
+        self._charge_quota(conf, timings, background)
+        estimated_seconds = self._estimate_seconds(conf)
         try:
-            with self._gpu_lock:
-                raw_wav_tensor = self._run_inference(conf)
+            with self._model_slot(
+                timings, background, is_aborted_cb, estimated_seconds
+            ):
+                raw_wav_tensor = self._timed_inference(conf, timings)
         except RuntimeError as e:
             if "CUDA out of memory" in str(e):
                 logger.warning(
@@ -275,8 +833,10 @@ class TTSEngine:
                 )
                 self.memory_manager._force_clean("OOM Recovery")
                 conf["split_sentences"] = True
-                with self._gpu_lock:
-                    raw_wav_tensor = self._run_inference(conf)
+                with self._model_slot(
+                    timings, background, is_aborted_cb, estimated_seconds
+                ):
+                    raw_wav_tensor = self._timed_inference(conf, timings)
             else:
                 raise e
 
@@ -284,26 +844,42 @@ class TTSEngine:
         target_sr = params.get("sample_rate", settings.DEFAULT_SAMPLE_RATE)
 
         if self.native_sample_rate != target_sr:
-            resampler = torchaudio.transforms.Resample(
-                orig_freq=self.native_sample_rate, new_freq=target_sr
-            )
-            if cleaned_tensor.ndim == 1:
-                cleaned_tensor = cleaned_tensor.unsqueeze(0)
-            resampled_tensor = resampler(cleaned_tensor)
+            with timings.measure("resample"):
+                resampler = torchaudio.transforms.Resample(
+                    orig_freq=self.native_sample_rate, new_freq=target_sr
+                )
+                if cleaned_tensor.ndim == 1:
+                    cleaned_tensor = cleaned_tensor.unsqueeze(0)
+                resampled_tensor = resampler(cleaned_tensor)
         else:
             resampled_tensor = cleaned_tensor
+        timings.add_audio(int(resampled_tensor.shape[-1]), target_sr)
+        self._observe(conf, timings)
 
-        wav_data = audio_processor.tensor_to_bytes(
-            resampled_tensor, sample_rate=target_sr
-        )
-        return audio_processor.process_audio(
-            wav_data,
-            params.get("output_format", settings.DEFAULT_OUTPUT_FORMAT),
-            target_sr,
-        )
+        with timings.measure("encode"):
+            wav_data = audio_processor.tensor_to_bytes(
+                resampled_tensor, sample_rate=target_sr
+            )
+            return audio_processor.process_audio(
+                wav_data,
+                params.get("output_format", settings.DEFAULT_OUTPUT_FORMAT),
+                target_sr,
+            )
+
+    def _timed_inference(self, conf: dict, timings: RequestTimings) -> torch.Tensor:
+        started = time.perf_counter()
+        offloaded_before_ms = self._offloaded_ms(timings)
+        try:
+            return self._run_inference(conf)
+        finally:
+            model_ms = (time.perf_counter() - started) * 1000.0
+            self._record_model_time(timings, model_ms, offloaded_before_ms)
 
     def _run_inference(self, conf: dict) -> torch.Tensor:
-        with torch.inference_mode():
+        with (
+            torch.inference_mode(),
+            self.prefix_cache.bind(conf["voice_key"], conf["gpt_cond_latent"]),
+        ):
             if ssml_handler.is_ssml(conf["text"]):
                 segments = ssml_handler.parse(conf["text"], conf)
                 wav_chunks = []
@@ -351,26 +927,41 @@ class TTSEngine:
             return raw_wav_tensor
 
     def _prepare_inference(
-        self, params: dict, speaker_wavs: Optional[list] = None
+        self,
+        params: dict,
+        speaker_wavs: Optional[list] = None,
+        timings: Optional[RequestTimings] = None,
     ) -> Dict[str, Any]:
+        timings = timings or RequestTimings()
         p_lang = params.get("language", settings.DEFAULT_LANGUAGE)
-        text = normalizer.normalize(params.get("text", ""), p_lang)
+        with timings.measure("normalize"):
+            text = normalizer.normalize(params.get("text", ""), p_lang)
         if not p_lang or p_lang == "auto":
-            try:
-                p_lang = langid.classify(text)[0].strip()
-            except Exception:
-                p_lang = settings.DEFAULT_LANGUAGE
+            with timings.measure("lang_id"):
+                p_lang = language_identifier.detect(text)
         if p_lang == "zh":
             p_lang = "zh-cn"
+        timings.language = p_lang
 
         p_speaker_id = params.get("speaker_idx", settings.DEFAULT_SPEAKER)
-        gpt_cond_latent, speaker_embedding = self._get_latents(
-            p_speaker_id, speaker_wavs
-        )
+        voice_key: Optional[str]
+        with timings.measure("latents"):
+            if params.get("speaker_wav"):
+                voice_key = self.inline_voice_id(params["speaker_wav"])
+                gpt_cond_latent, speaker_embedding = self.get_inline_latents(
+                    params["speaker_wav"]
+                )
+            else:
+                # Tek seferlik klon yüklemeleri için önek KV'si saklanmaz.
+                voice_key = None if speaker_wavs else self.speaker_version(p_speaker_id)
+                gpt_cond_latent, speaker_embedding = self._get_latents(
+                    p_speaker_id, speaker_wavs
+                )
 
         return {
             "text": text,
             "language": p_lang,
+            "voice_key": voice_key,
             "gpt_cond_latent": gpt_cond_latent,
             "speaker_embedding": speaker_embedding,
             "temperature": params.get("temperature", settings.DEFAULT_TEMPERATURE),
@@ -384,40 +975,12 @@ class TTSEngine:
         }
 
     def refresh_speakers(self, force=False):
-        now = time.time()
-        if not force and (now - self.last_cache_update < self.CACHE_TTL):
-            return {"status": "cached", "count": len(self.speakers_map)}
-        new_map = {}
-        try:
-            entries = os.listdir(self.SPEAKERS_DIR)
-            for entry in entries:
-                path = os.path.join(self.SPEAKERS_DIR, entry)
-                if os.path.isdir(path):
-                    styles = []
-                    for f in glob.glob(os.path.join(path, "*.wav")):
-                        style_name = os.path.splitext(os.path.basename(f))[0]
-                        styles.append(style_name)
-                    if styles:
-                        new_map[entry] = sorted(styles)
-                elif entry.endswith(".wav"):
-                    speaker_name = os.path.splitext(entry)[0]
-                    new_map[speaker_name] = ["default"]
-        except Exception:
-            pass
-        self.speakers_map = new_map
-        self.last_cache_update = now
-        logger.info(
-            f"🔊 Speakers refreshed. Total: {len(new_map)}",
-            extra={"event": "SPEAKERS_REFRESHED"},
-        )
-        return {"success": True, "total": len(new_map), "map": new_map}
+        snapshot = self.speaker_registry.rescan(force=force)
+        return {"success": True, "total": len(snapshot.styles), "map": snapshot.styles}
 
     def get_speakers(self):
-        if not self.speakers_map or (
-            time.time() - self.last_cache_update > self.CACHE_TTL
-        ):
-            self.refresh_speakers()
-        return self.speakers_map
+        # Kilitsiz okuma: indeks arka plan tarayıcısı tarafından güncellenir.
+        return self.speaker_registry.snapshot.styles
 
     def _ensure_fallback_speaker(self):
         if not os.path.exists(self.SPEAKERS_DIR):
@@ -446,6 +1009,57 @@ class TTSEngine:
                 except Exception:
                     pass
 
+    def resolve_speaker(self, speaker_id: Optional[str]) -> Tuple[str, int]:
+        """Konuşmacıyı (wav_path, mtime_ns) çiftine çözer; bulunamazsa fallback sese düşer."""
+        resolved = self.speaker_registry.resolve(
+            speaker_id or settings.DEFAULT_SPEAKER
+        ) or self.speaker_registry.resolve(FALLBACK_SPEAKER)
+        if resolved is None:
+            self._ensure_fallback_speaker()
+            resolved = (os.path.join(self.SPEAKERS_DIR, "system_default.wav"), 0)
+        return resolved
+
+    def speaker_version(self, speaker_id: Optional[str]) -> str:
+        """Ses önbelleği anahtarı için: referans dosya değişirse sürüm de değişir."""
+        wav_path, mtime_ns = self.resolve_speaker(speaker_id)
+        return f"{os.path.relpath(wav_path, self.SPEAKERS_DIR)}:{mtime_ns}"
+
+    @staticmethod
+    def inline_voice_id(audio_bytes: bytes) -> str:
+        """Satır içi referans sesin kimliği (latent ve ses önbelleği anahtarı)."""
+        return f"inline:{hashlib.sha256(audio_bytes).hexdigest()[:32]}"
+
+    def get_inline_latents(self, audio_bytes: bytes):
+        """
+        İstekle gelen referans sesi (WAV/FLAC/OGG) bellekte çözer; latentler içerik
+        özetiyle RAM'de önbelleklenir. Müşteri sesi diske yazılmaz.
+        """
+        cache_id = self.inline_voice_id(audio_bytes)
+        cached = self.latents_cache.get(cache_id)
+        metrics.record_cache_lookup("latent_ram", cached is not None)
+        if cached is not None:
+            return cached
+
+        load_sr = 22050  # XTTS get_conditioning_latents varsayılanı
+        try:
+            audio, sample_rate = torchaudio.load(io.BytesIO(audio_bytes))
+        except Exception as e:
+            raise ValueError(f"speaker_wav could not be decoded: {e}") from e
+        if audio.size(0) > 1:
+            audio = audio.mean(dim=0, keepdim=True)
+        if sample_rate != load_sr:
+            audio = torchaudio.functional.resample(audio, sample_rate, load_sr)
+        audio = audio.clamp(-1.0, 1.0)[:, : load_sr * 60].to(self.model.device)
+
+        with torch.inference_mode():
+            speaker_embedding = self.model.get_speaker_embedding(audio, load_sr)
+            gpt_cond_latent = self.model.get_gpt_cond_latents(
+                audio, load_sr, length=30, chunk_length=4
+            )
+        latents = self._to_cuda((gpt_cond_latent, speaker_embedding))
+        self.latents_cache.put(cache_id, latents)
+        return latents
+
     def _get_latents(self, speaker_id: str, speaker_wavs: Optional[list]):
         if speaker_wavs:
             latents = self.model.get_conditioning_latents(
@@ -455,41 +1069,30 @@ class TTSEngine:
                 max_ref_length=60,
             )
             return self._to_cuda(latents)
-        if not speaker_id:
-            speaker_id = settings.DEFAULT_SPEAKER
-        if "/" in speaker_id:
-            spk_name, spk_style = speaker_id.split("/", 1)
-        else:
-            spk_name, spk_style = speaker_id, "default"
-        wav_path = None
-        folder_path = os.path.join(self.SPEAKERS_DIR, spk_name)
-        if os.path.isdir(folder_path):
-            style_path = os.path.join(folder_path, f"{spk_style}.wav")
-            if os.path.exists(style_path):
-                wav_path = style_path
-            else:
-                files = glob.glob(os.path.join(folder_path, "*.wav"))
-                if files:
-                    wav_path = files[0]
-        if not wav_path:
-            root_path = os.path.join(self.SPEAKERS_DIR, f"{spk_name}.wav")
-            if os.path.exists(root_path):
-                wav_path = root_path
-        if not wav_path or not os.path.exists(wav_path):
-            self._ensure_fallback_speaker()
-            wav_path = os.path.join(self.SPEAKERS_DIR, "system_default.wav")
-        cache_id = hashlib.md5(wav_path.encode()).hexdigest()
+        wav_path, version = self.resolve_speaker(speaker_id)
+
+        # mtime sürümü anahtara dahildir: referans ses değişirse latent yeniden hesaplanır.
+        cache_id = hashlib.md5(f"{wav_path}:{version}".encode()).hexdigest()
+        cached = self.latents_cache.get(cache_id)
+        metrics.record_cache_lookup("latent_ram", cached is not None)
+        if cached is not None:
+            return cached
+
         latent_file = os.path.join(self.LATENTS_DIR, f"{cache_id}.json")
-        if os.path.exists(latent_file):
+        latent_file_exists = os.path.exists(latent_file)
+        metrics.record_cache_lookup("latent_disk", latent_file_exists)
+        if latent_file_exists:
             try:
                 with open(latent_file, "r") as f:
                     data = json.load(f)
-                return self._to_cuda(
+                latents = self._to_cuda(
                     (
                         torch.tensor(data["gpt_cond_latent"]),
                         torch.tensor(data["speaker_embedding"]),
                     )
                 )
+                self.latents_cache.put(cache_id, latents)
+                return latents
             except Exception:
                 pass
         latents = self.model.get_conditioning_latents(
@@ -509,7 +1112,9 @@ class TTSEngine:
                 )
         except Exception:
             pass
-        return self._to_cuda(latents)
+        latents = self._to_cuda(latents)
+        self.latents_cache.put(cache_id, latents)
+        return latents
 
     def _to_cuda(self, latents):
         g, s = latents
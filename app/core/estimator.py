@@ -0,0 +1,46 @@
+import threading
+from typing import Optional
+
+# Gözlem yokken konuşma hızı varsayımı (hız 1.0'da saniyedeki karakter).
+DEFAULT_CHARS_PER_SECOND = 14.0
+# Yeni gözlemin hareketli ortalamadaki ağırlığı.
+EWMA_ALPHA = 0.2
+
+
+class SynthesisEstimator:
+    """
+    Görevi: Bir isteğin model kilidi altında ne kadar süreceğini tahmin etmek.
+
+    Tahmin = metin uzunluğundan beklenen ses süresi x hareketli model RTF'si.
+    Her iki oran da tamamlanan isteklerden üstel hareketli ortalama ile güncellenir.
+    Henüz gözlem yoksa RTF bilinmez ve tahmin None döner (istek reddedilmez).
+    """
+
+    def __init__(self, alpha: float = EWMA_ALPHA):
+        self.alpha = alpha
+        self.chars_per_second = DEFAULT_CHARS_PER_SECOND
+        self.rtf: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(
+        self, chars: int, speed: float, audio_seconds: float, model_seconds: float
+    ):
+        if chars <= 0 or audio_seconds <= 0 or model_seconds <= 0:
+            return
+        # Hız 1.0'a normalize edilir: speed=2 aynı metni yarı sürede okur.
+        chars_per_second = chars / (audio_seconds * max(speed, 0.05))
+        rtf = model_seconds / audio_seconds
+        with self._lock:
+            self.chars_per_second += self.alpha * (
+                chars_per_second - self.chars_per_second
+            )
+            self.rtf = (
+                rtf if self.rtf is None else self.rtf + self.alpha * (rtf - self.rtf)
+            )
+
+    def estimate(self, chars: int, speed: float = 1.0) -> Optional[float]:
+        """Beklenen model süresi (sn); RTF henüz ölçülmediyse None."""
+        if self.rtf is None:
+            return None
+        audio_seconds = chars / (self.chars_per_second * max(speed, 0.05))
+        return audio_seconds * self.rtf
@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger("HISTORY")
+
+# Listeleme sayfası üst sınırı; istemci daha büyüğünü istese de kırpılır.
+MAX_PAGE_SIZE = 200
+# Geçmişte saklanan parametreler (metin ayrı sütunda, akış bayrağı anlamsız).
+_PARAM_KEYS = (
+    "language",
+    "speaker_idx",
+    "temperature",
+    "speed",
+    "top_k",
+    "top_p",
+    "repetition_penalty",
+    "sample_rate",
+    "output_format",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    text TEXT NOT NULL,
+    speaker TEXT,
+    language TEXT,
+    mode TEXT NOT NULL,
+    params TEXT NOT NULL,
+    duration_seconds REAL,
+    size_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (tenant_id, filename)
+);
+CREATE INDEX IF NOT EXISTS idx_history_tenant ON history (tenant_id, id);
+CREATE INDEX IF NOT EXISTS idx_history_speaker ON history (tenant_id, speaker, id);
+CREATE INDEX IF NOT EXISTS idx_history_created ON history (created_at);
+"""
+
+_COLUMNS = (
+    "id, filename, text, speaker, language, mode, params, "
+    "duration_seconds, size_bytes, created_at"
+)
+
+
+class HistoryStore:
+    """
+    Görevi: Studio geçmişinin (metin, konuşmacı, parametreler, süre, boyut, tenant)
+    SQLite dizini.
+
+    - Ses verisi burada tutulmaz: kayıt, ses önbelleğindeki girdiye içerik kimliğiyle
+      (dosya adı = önbellek anahtarı) işaret eder.
+    - Listeleme (tenant_id, id) indeksi üzerinde imleçle sayfalanır: maliyet toplam kayıt
+      sayısına değil sayfa boyutuna bağlıdır (dizin taraması yok).
+    - Aynı içerik yeniden üretilirse kayıt tekrarlanmaz, listenin başına taşınır.
+    - Saklama sınırları (tenant başına kayıt sayısı, yaş) arka plan thread'inde uygulanır.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int = 1000,
+        max_age_days: float = 30.0,
+        evict_interval: float = 300.0,
+        enabled: bool = True,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.evict_interval = evict_interval
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- YAŞAM DÖNGÜSÜ ---
+    def start(self):
+        """Veritabanını açar, saklama sınırlarını bir kez uygular ve temizlik thread'ini başlatır."""
+        if not self.enabled or self._thread is not None:
+            return
+        self.evict()
+        self._thread = threading.Thread(
+            target=self._evict_loop, name="history-evict", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"History store ready: {self.db_path}", extra={"event": "HISTORY_READY"}
+        )
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- YAZMA ---
+    def record(
+        self,
+        tenant_id: Optional[str],
+        filename: str,
+        params: dict,
+        size_bytes: int,
+        duration_seconds: Optional[float] = None,
+        mode: str = "TTS",
+    ):
+        """
+        Üretilen sesi geçmişe ekler. Süre bilinmiyorsa (önbellek isabeti) aynı içeriğin
+        önceki kaydındaki süre korunur. Yazma hatası sentez isteğini düşürmez.
+        """
+        if not self.enabled:
+            return
+        try:
+            self._insert(
+                tenant_id, filename, params, size_bytes, duration_seconds, mode
+            )
+        except sqlite3.Error as e:
+            logger.warning(
+                f"History write failed: {e}", extra={"event": "HISTORY_WRITE_ERROR"}
+            )
+
+    def _insert(self, tenant_id, filename, params, size_bytes, duration_seconds, mode):
+        text = params.get("text") or ""
+        stored = {k: params[k] for k in _PARAM_KEYS if k in params}
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                previous = conn.execute(
+                    "SELECT duration_seconds FROM history WHERE tenant_id = ? AND filename = ?",
+                    (tenant_id or "", filename),
+                ).fetchone()
+                if previous is not None:
+                    if duration_seconds is None:
+                        duration_seconds = previous[0]
+                    conn.execute(
+                        "DELETE FROM history WHERE tenant_id = ? AND filename = ?",
+                        (tenant_id or "", filename),
+                    )
+                conn.execute(
+                    "INSERT INTO history (tenant_id, filename, text, speaker, language, "
+                    "mode, params, duration_seconds, size_bytes, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        tenant_id or "",
+                        filename,
+                        text,
+                        params.get("speaker_idx"),
+                        params.get("language"),
+                        mode,
+                        json.dumps(stored, ensure_ascii=False),
+                        duration_seconds,
+                        size_bytes,
+                        time.time(),
+                    ),
+                )
+
+    def delete(self, tenant_id: Optional[str], filename: str) -> bool:
+        """Yalnızca dizin kaydı silinir; paylaşılan önbellekteki ses başka isteklere hizmet eder."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM history WHERE tenant_id = ? AND filename = ?",
+                    (tenant_id or "", filename),
+                )
+        return cursor.rowcount > 0
+
+    def clear(self, tenant_id: Optional[str]) -> int:
+        if not self.enabled:
+            return 0
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM history WHERE tenant_id = ?", (tenant_id or "",)
+                )
+        return cursor.rowcount
+
+    # --- OKUMA ---
+    def get(self, tenant_id: Optional[str], filename: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    f"SELECT {_COLUMNS} FROM history WHERE tenant_id = ? AND filename = ?",
+                    (tenant_id or "", filename),
+                )
+                .fetchone()
+            )
+        return self._to_entry(row) if row else None
+
+    def list(
+        self,
+        tenant_id: Optional[str],
+        limit: int = 50,
+        before: Optional[int] = None,
+        speaker: Optional[str] = None,
+        language: Optional[str] = None,
+        mode: Optional[str] = None,
+        query: Optional[str] = None,
+        since: Optional[float] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        En yeniden eskiye bir sayfa ve sonraki sayfanın imlecini (yoksa None) döner.
+        İmleç, sayfadaki son kaydın kimliğidir (before=...); OFFSET kullanılmaz.
+        """
+        if not self.enabled:
+            return [], None
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses: List[str] = ["tenant_id = ?"]
+        args: List[object] = [tenant_id or ""]
+        for column, value in (
+            ("speaker", speaker),
+            ("language", language),
+            ("mode", mode),
+        ):
+            if value:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if before is not None:
+            clauses.append("id < ?")
+            args.append(before)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            args.append(since)
+        if query:
+            clauses.append("instr(lower(text), ?) > 0")
+            args.append(query.lower())
+        # Bir fazla satır okunur: varsa sonraki sayfa vardır.
+        sql = (
+            f"SELECT {_COLUMNS} FROM history WHERE {' AND '.join(clauses)} "
+            "ORDER BY id DESC LIMIT ?"
+        )
+        with self._lock:
+            rows = self._connection().execute(sql, (*args, limit + 1)).fetchall()
+        entries = [self._to_entry(row) for row in rows[:limit]]
+        next_cursor = entries[-1]["id"] if len(rows) > limit else None
+        return entries, next_cursor
+
+    # --- SAKLAMA ---
+    def evict(self) -> int:
+        """Yaş ve tenant başına kayıt sınırını aşan kayıtları siler; silinen sayısını döner."""
+        if not self.enabled:
+            return 0
+        removed = 0
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if self.max_age_days > 0:
+                    cutoff = time.time() - self.max_age_days * 86400.0
+                    removed += conn.execute(
+                        "DELETE FROM history WHERE created_at < ?", (cutoff,)
+                    ).rowcount
+                if self.max_entries > 0:
+                    tenants = conn.execute(
+                        "SELECT tenant_id FROM history GROUP BY tenant_id HAVING COUNT(*) > ?",
+                        (self.max_entries,),
+                    ).fetchall()
+                    for (tenant,) in tenants:
+                        removed += conn.execute(
+                            "DELETE FROM history WHERE tenant_id = ? AND id <= ("
+                            "SELECT id FROM history WHERE tenant_id = ? "
+                            "ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                            (tenant, tenant, self.max_entries),
+                        ).rowcount
+        if removed:
+            logger.info(
+                f"History retention removed {removed} entries.",
+                extra={"event": "HISTORY_EVICTED"},
+            )
+        return removed
+
+    def _evict_loop(self):
+        while not self._stop.wait(self.evict_interval):
+            try:
+                self.evict()
+            except sqlite3.Error as e:
+                logger.warning(
+                    f"History eviction failed: {e}",
+                    extra={"event": "HISTORY_EVICT_ERROR"},
+                )
+
+    # --- YARDIMCILAR ---
+    def _connection(self) -> sqlite3.Connection:
+        """self._lock tutulurken çağrılır; bağlantı ilk kullanımda açılır."""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _to_entry(row) -> dict:
+        (
+            entry_id,
+            filename,
+            text,
+            speaker,
+            language,
+            mode,
+            params,
+            duration,
+            size,
+            created_at,
+        ) = row
+        return {
+            "id": entry_id,
+            "filename": filename,
+            "text": text,
+            "speaker": speaker,
+            "language": language,
+            "mode": mode,
+            "params": json.loads(params),
+            "duration_seconds": duration,
+            "size_bytes": size,
+            "created_at": created_at,
+            "date": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at)),
+            "audio_url": f"/api/history/audio/{filename}",
+        }
+
+
+history_store = HistoryStore(
+    settings.HISTORY_DB_PATH,
+    max_entries=settings.HISTORY_MAX_ENTRIES,
+    max_age_days=settings.HISTORY_MAX_AGE_DAYS,
+    evict_interval=settings.HISTORY_EVICT_INTERVAL_SECONDS,
+    enabled=settings.HISTORY_ENABLED,
+)
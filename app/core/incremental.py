@@ -0,0 +1,143 @@
+import queue
+import logging
+import threading
+from typing import Optional
+
+from app.core.config import settings
+from app.core.engine import tts_engine
+from app.core.sentence_splitter import IncrementalSentenceSplitter, chunk_chars
+from app.core.spill_buffer import SpillBuffer
+from app.core.timing import RequestTimings
+from app.core import metrics
+
+logger = logging.getLogger("INCREMENTAL-TTS")
+
+_CLOSE = object()
+
+
+class IncrementalSynthesisSession:
+    """
+    Görevi: Parça parça gelen metni cümle birimlerine bölüp sırayla sentezlemek.
+
+    Metin girişi (feed) ve ses üretimi ayrı thread'lerdedir: önceki cümlenin sesi akarken
+    sonraki token'lar gelmeye devam eder. clear() (barge-in) kuyruktaki tüm metni atar ve
+    çalışan inference'ı bir sonraki chunk sınırında keser.
+
+    Çıkış kuyruğu mesajları (generation, tip, veri):
+      ("segment", {"index", "text"}) | ("audio", bytes) | ("segment_end", {"index"})
+      ("done", None) | ("error", Exception)
+    generation, clear() sonrası eski cümleye ait mesajların tüketici tarafında
+    ayıklanmasını sağlar. Çıkış bir SpillBuffer'dır: worker yavaş tüketiciyi beklemez,
+    model kilidi cümle sentezi biter bitmez bırakılır.
+    """
+
+    def __init__(self, params: dict, front_door: str, tenant_id: Optional[str] = None):
+        self.params = {**params, "split_sentences": False}
+        self.front_door = front_door
+        self.tenant_id = tenant_id
+        self.splitter = IncrementalSentenceSplitter(
+            chunk_chars(params.get("language"), settings.INCREMENTAL_SEGMENT_CHARS),
+            settings.INCREMENTAL_EAGER_CHARS,
+        )
+        self.output = SpillBuffer(front_door)
+        self.generation = 0
+        self._segments: "queue.Queue" = queue.Queue()
+        self._next_index = 0
+        self._closed = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._worker.start()
+        return self
+
+    # --- METİN GİRİŞİ (tüketici/istek thread'i) ---
+    def feed(self, fragment: str) -> int:
+        return self._enqueue(self.splitter.feed(fragment))
+
+    def flush(self) -> int:
+        return self._enqueue(self.splitter.flush())
+
+    def finish(self):
+        """Girdi bitti: kalan metni sentezle, ardından 'done' gönder."""
+        self.flush()
+        self._segments.put(_CLOSE)
+
+    def clear(self) -> int:
+        """Barge-in: bekleyen metni ve sırada bekleyen cümleleri düşürür."""
+        self.generation += 1
+        dropped = 0
+        self.splitter.clear()
+        while True:
+            try:
+                item = self._segments.get_nowait()
+            except queue.Empty:
+                break
+            if item is _CLOSE:
+                self._segments.put(_CLOSE)
+                break
+            dropped += 1
+        metrics.record_stream_abort(self.front_door, "barge_in")
+        logger.info(
+            f"Barge-in: {dropped} queued segments dropped.",
+            extra={"event": "INCREMENTAL_BARGE_IN"},
+        )
+        return dropped
+
+    def abort(self):
+        """Bağlantı koptu: her şeyi bırak, worker'ı sonlandır."""
+        self.generation += 1
+        self._closed.set()
+        self._segments.put(_CLOSE)
+        self.output.close()
+
+    def _enqueue(self, units) -> int:
+        for text in units:
+            # Zamanlama metin tamamlandığı anda başlar: ttfb = "metin hazır -> ilk ses".
+            timings = RequestTimings(self.front_door, self.tenant_id)
+            self._segments.put((self.generation, self._next_index, text, timings))
+            self._next_index += 1
+        return len(units)
+
+    # --- SES ÜRETİMİ (worker thread) ---
+    def _is_stale(self, generation: int) -> bool:
+        return self._closed.is_set() or generation != self.generation
+
+    def _put(self, generation: int, kind: str, payload) -> bool:
+        if self._is_stale(generation):
+            return False
+        self.output.put((generation, kind, payload))
+        return True
+
+    def _run(self):
+        while True:
+            item = self._segments.get()
+            if item is _CLOSE:
+                if not self._closed.is_set():
+                    self._put(self.generation, "done", None)
+                return
+
+            generation, index, text, timings = item
+            if self._is_stale(generation):
+                continue
+
+            self._put(generation, "segment", {"index": index, "text": text})
+            try:
+                for chunk in tts_engine.synthesize_stream(
+                    {**self.params, "text": text},
+                    is_aborted_cb=lambda: self._is_stale(generation),
+                    timings=timings,
+                ):
+                    timings.mark_first_byte()
+                    timings.bytes_sent += len(chunk)
+                    if not self._put(generation, "audio", chunk):
+                        break
+            except Exception as e:
+                if self._is_stale(generation):
+                    continue  # Barge-in sırasında kesilen inference
+                self._put(generation, "error", e)
+                self._closed.set()
+                return
+            finally:
+                metrics.report_request(timings)
+
+            self._put(generation, "segment_end", {"index": index})
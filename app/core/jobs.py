@@ -0,0 +1,441 @@
+import os
+import json
+import time
+import uuid
+import queue
+import shutil
+import logging
+import threading
+import subprocess
+import wave
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.engine import tts_engine
+from app.core.sentence_splitter import chunk_chars, split_sentences
+from app.core.timing import RequestTimings
+from app.core import metrics
+
+logger = logging.getLogger("LONGFORM-JOBS")
+
+TERMINAL_STATES = ("completed", "failed")
+# Yalnızca geçici hatalar (CUDA OOM, G/Ç) yeniden denenir; doğrulama hatası ya da
+# iptal/deadline her denemede aynı sonucu verir.
+RETRYABLE_ERRORS = (RuntimeError, OSError, MemoryError)
+MEDIA_TYPES = {
+    "wav": "audio/wav",
+    "pcm": "application/octet-stream",
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+}
+
+
+class LongFormJobManager:
+    """
+    Görevi: Uzun metinleri (kitap, rapor) arka planda, cümle parçaları halinde sentezlemek.
+
+    - Her parça düşük öncelikle model kilidini alır; gerçek zamanlı istekler öne geçer.
+    - Biten her parça diske (PCM) yazılır; yeniden başlatmada yalnızca eksikler üretilir.
+    - Sonuç dosyası parçalar diskten sırayla okunarak birleştirilir (sınırlı bellek);
+      birleştirme sonrası parça dizini silinir.
+    - Bitmiş işler max_age_hours sonra arka plan thread'inde kaldırılır.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        workers: int = 1,
+        max_age_hours: float = 72.0,
+        evict_interval: float = 300.0,
+    ):
+        self.root_dir = root_dir
+        self.workers = workers
+        self.max_age_hours = max_age_hours
+        self.evict_interval = evict_interval
+        self._jobs: Dict[str, dict] = {}
+        self._cancelled: set = set()
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    # --- PUBLIC API ---
+    def submit(self, params: dict, tenant_id: Optional[str] = None) -> dict:
+        chunks = split_sentences(
+            params["text"],
+            chunk_chars(params.get("language"), settings.LONGFORM_CHUNK_CHARS),
+        )
+        if not chunks:
+            raise ValueError("Text does not contain any speakable content.")
+
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        os.makedirs(os.path.join(job_dir, "chunks"), exist_ok=True)
+        self._write_json(os.path.join(job_dir, "chunks.json"), chunks)
+
+        job_params = {k: v for k, v in params.items() if k != "text"}
+        now = time.time()
+        job = {
+            "id": job_id,
+            "tenant_id": tenant_id,
+            "status": "queued",
+            "params": job_params,
+            "characters": len(params["text"]),
+            "total_chunks": len(chunks),
+            "done_chunks": 0,
+            "audio_seconds": 0.0,
+            "render_seconds": 0.0,
+            "created_at": now,
+            "updated_at": now,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        self._save(job)
+        self._queue.put(job_id)
+        logger.info(
+            f"Long-form job queued: {job_id} ({len(chunks)} chunks, {job['characters']} chars)",
+            extra={"event": "LONGFORM_JOB_QUEUED"},
+        )
+        return self.public_view(job)
+
+    def get(self, job_id: str, tenant_id: Optional[str] = None) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            # Tenant izolasyonu: başka tenant'ın işi "yok" gibi görünür.
+            if job["tenant_id"] and tenant_id and job["tenant_id"] != tenant_id:
+                return None
+            return dict(job)
+
+    def cancel(self, job_id: str, tenant_id: Optional[str] = None) -> bool:
+        job = self.get(job_id, tenant_id)
+        if job is None:
+            return False
+        with self._lock:
+            # Bitmiş iş kuyrukta değildir; işaret yalnızca worker'ın göreceği işler için konur.
+            if job["status"] not in TERMINAL_STATES:
+                self._cancelled.add(job_id)
+            self._jobs.pop(job_id, None)
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+        logger.info(
+            f"Long-form job deleted: {job_id}", extra={"event": "LONGFORM_JOB_DELETED"}
+        )
+        return True
+
+    def result_path(self, job: dict) -> str:
+        return os.path.join(
+            self._job_dir(job["id"]), f"result.{job['params']['output_format']}"
+        )
+
+    @staticmethod
+    def public_view(job: dict) -> dict:
+        done, total = job["done_chunks"], job["total_chunks"]
+        eta = None
+        if 0 < done < total and job["render_seconds"] > 0:
+            eta = round(job["render_seconds"] / done * (total - done), 1)
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "progress": {
+                "done_chunks": done,
+                "total_chunks": total,
+                "percent": round(done / total * 100.0, 1) if total else 0.0,
+                "eta_seconds": eta,
+            },
+            "characters": job["characters"],
+            "audio_seconds": round(job["audio_seconds"], 2),
+            "output_format": job["params"]["output_format"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+            "error": job["error"],
+        }
+
+    # --- YAŞAM DÖNGÜSÜ ---
+    def start(self):
+        """Diskteki yarım kalmış işleri yükler ve worker thread'lerini başlatır."""
+        os.makedirs(self.root_dir, exist_ok=True)
+        resumed = 0
+        for job_id in sorted(os.listdir(self.root_dir)):
+            try:
+                with open(os.path.join(self._job_dir(job_id), "job.json"), "r") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if job["status"] == "running":
+                job["status"] = "queued"
+            with self._lock:
+                self._jobs[job_id] = job
+            if job["status"] == "queued":
+                self._queue.put(job_id)
+                resumed += 1
+
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop, name=f"longform-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        self.evict()
+        evict_thread = threading.Thread(
+            target=self._evict_loop, name="longform-evict", daemon=True
+        )
+        evict_thread.start()
+        self._threads.append(evict_thread)
+        logger.info(
+            f"Long-form job manager started ({self.workers} workers, {resumed} jobs resumed).",
+            extra={"event": "LONGFORM_MANAGER_READY"},
+        )
+
+    def stop(self):
+        self._stop.set()
+
+    def evict(self) -> int:
+        """Süresi dolmuş bitmiş işleri bellekten ve diskten siler; silinen sayısını döner."""
+        if self.max_age_hours <= 0:
+            return 0
+        cutoff = time.time() - self.max_age_hours * 3600.0
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job["status"] in TERMINAL_STATES and job["updated_at"] < cutoff
+            ]
+            for job_id in expired:
+                self._jobs.pop(job_id, None)
+        for job_id in expired:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+        if expired:
+            logger.info(
+                f"Long-form retention removed {len(expired)} jobs.",
+                extra={"event": "LONGFORM_JOBS_EVICTED"},
+            )
+        return len(expired)
+
+    def _evict_loop(self):
+        while not self._stop.wait(self.evict_interval):
+            try:
+                self.evict()
+            except Exception as e:
+                logger.warning(
+                    f"Long-form eviction failed: {e}",
+                    extra={"event": "LONGFORM_EVICT_ERROR"},
+                )
+
+    def _worker_loop(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run_job(job_id)
+            except Exception as e:
+                if job_id not in self._cancelled:
+                    logger.error(
+                        f"Long-form job crashed: {job_id}: {e}",
+                        exc_info=True,
+                        extra={"event": "LONGFORM_JOB_CRASH"},
+                    )
+                # aksi halde iş silinirken dizini kaldırıldı; beklenen durum
+            finally:
+                # İptal worker tarafından görüldü; kimlik bir daha kuyruğa girmez.
+                with self._lock:
+                    self._cancelled.discard(job_id)
+
+    def _run_job(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job_id in self._cancelled:
+            return
+
+        job_dir = self._job_dir(job_id)
+        with open(os.path.join(job_dir, "chunks.json"), "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+
+        # Checkpoint: önceki çalıştırmada tamamlanan parçalar yeniden üretilmez.
+        bytes_per_second = 2 * job["params"]["sample_rate"]
+        done = {}
+        for index in range(len(chunks)):
+            try:
+                done[index] = os.path.getsize(self._chunk_path(job_id, index))
+            except OSError:
+                continue
+        self._update(
+            job,
+            status="running",
+            done_chunks=len(done),
+            audio_seconds=sum(done.values()) / bytes_per_second,
+        )
+
+        for index, text in enumerate(chunks):
+            if job_id in self._cancelled:
+                return
+            if index in done:
+                continue
+            chunk_path = self._chunk_path(job_id, index)
+
+            try:
+                pcm, render_seconds = self._render_chunk(job, text)
+            except Exception as e:
+                metrics.record_longform_chunk("error")
+                logger.error(
+                    f"Long-form chunk {index} failed for {job_id}: {e}",
+                    extra={"event": "LONGFORM_CHUNK_FAIL"},
+                )
+                self._update(job, status="failed", error=f"chunk {index}: {e}")
+                return
+
+            tmp_path = f"{chunk_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, chunk_path)
+            metrics.record_longform_chunk("ok")
+            done[index] = len(pcm)
+            self._update(
+                job,
+                done_chunks=len(done),
+                audio_seconds=job["audio_seconds"] + len(pcm) / bytes_per_second,
+                render_seconds=job["render_seconds"] + render_seconds,
+            )
+
+        if job_id in self._cancelled:
+            return
+        try:
+            self._assemble(job, len(chunks))
+        except Exception as e:
+            logger.error(
+                f"Long-form assembly failed for {job_id}: {e}",
+                extra={"event": "LONGFORM_ASSEMBLY_FAIL"},
+            )
+            self._update(job, status="failed", error=f"assembly: {e}")
+            return
+        # Sonuç dosyası yazıldı; parçalara artık ihtiyaç yok.
+        shutil.rmtree(os.path.join(job_dir, "chunks"), ignore_errors=True)
+
+        self._update(job, status="completed")
+        logger.info(
+            f"Long-form job completed: {job_id} ({job['audio_seconds']:.1f}s audio, "
+            f"{job['render_seconds']:.1f}s render)",
+            extra={"event": "LONGFORM_JOB_COMPLETE"},
+        )
+
+    def _render_chunk(self, job: dict, text: str):
+        params = {**job["params"], "text": text, "output_format": "pcm"}
+        last_error: Optional[Exception] = None
+        for _attempt in range(settings.LONGFORM_CHUNK_RETRIES + 1):
+            timings = RequestTimings("longform", job["tenant_id"])
+            started = time.perf_counter()
+            try:
+                pcm = tts_engine.synthesize(params, timings=timings, background=True)
+            except RETRYABLE_ERRORS as e:
+                last_error = e
+                continue
+            timings.bytes_sent = len(pcm)
+            metrics.report_request(timings)
+            return pcm, time.perf_counter() - started
+        raise last_error or RuntimeError("chunk synthesis failed")
+
+    def _assemble(self, job: dict, chunk_count: int):
+        """Parçaları diskten sırayla okuyarak sonuç dosyasına akıtır."""
+        fmt = job["params"]["output_format"]
+        sample_rate = job["params"]["sample_rate"]
+        gap = b"\x00\x00" * int(sample_rate * settings.LONGFORM_CHUNK_GAP_MS / 1000)
+        result_path = self.result_path(job)
+        tmp_path = f"{result_path}.tmp"
+
+        def pcm_blocks():
+            for index in range(chunk_count):
+                if index:
+                    yield gap
+                with open(self._chunk_path(job["id"], index), "rb") as f:
+                    while True:
+                        block = f.read(1 << 20)
+                        if not block:
+                            break
+                        yield block
+
+        if fmt == "wav":
+            with wave.open(tmp_path, "wb") as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(sample_rate)
+                for block in pcm_blocks():
+                    wav_file.writeframes(block)
+        elif fmt == "pcm":
+            with open(tmp_path, "wb") as f:
+                for block in pcm_blocks():
+                    f.write(block)
+        else:
+            codec = {"mp3": ["-f", "mp3"], "opus": ["-c:a", "libopus", "-f", "ogg"]}[
+                fmt
+            ]
+            process = subprocess.Popen(
+                [
+                    "ffmpeg",
+                    "-loglevel",
+                    "error",
+                    "-y",
+                    "-f",
+                    "s16le",
+                    "-ar",
+                    str(sample_rate),
+                    "-ac",
+                    "1",
+                    "-i",
+                    "pipe:0",
+                    *codec,
+                    tmp_path,
+                ],
+                stdin=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            assert process.stdin is not None and process.stderr is not None
+            try:
+                for block in pcm_blocks():
+                    process.stdin.write(block)
+            finally:
+                process.stdin.close()
+            stderr = process.stderr.read().decode(errors="replace")
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed: {stderr.strip()}")
+
+        os.replace(tmp_path, result_path)
+
+    # --- YARDIMCILAR ---
+    def _update(self, job: dict, **changes):
+        with self._lock:
+            job.update(changes)
+            job["updated_at"] = time.time()
+            snapshot = dict(job)
+        self._save(snapshot)
+
+    def _save(self, job: dict):
+        if job["id"] in self._cancelled:
+            return
+        try:
+            self._write_json(os.path.join(self._job_dir(job["id"]), "job.json"), job)
+        except OSError as e:
+            logger.warning(
+                f"Job checkpoint write failed ({job['id']}): {e}",
+                extra={"event": "LONGFORM_CHECKPOINT_FAIL"},
+            )
+
+    @staticmethod
+    def _write_json(path: str, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root_dir, os.path.basename(job_id))
+
+    def _chunk_path(self, job_id: str, index: int) -> str:
+        return os.path.join(self._job_dir(job_id), "chunks", f"{index:05d}.pcm")
+
+
+job_manager = LongFormJobManager(
+    settings.LONGFORM_JOBS_DIR,
+    settings.LONGFORM_WORKERS,
+    max_age_hours=settings.LONGFORM_JOB_MAX_AGE_HOURS,
+    evict_interval=settings.LONGFORM_EVICT_INTERVAL_SECONDS,
+)
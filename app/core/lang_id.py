@@ -0,0 +1,151 @@
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger("LANG-ID")
+
+SUPPORTED_LANGUAGES = [
+    "en",
+    "es",
+    "fr",
+    "de",
+    "it",
+    "pt",
+    "pl",
+    "tr",
+    "ru",
+    "nl",
+    "cs",
+    "ar",
+    "zh-cn",
+    "ja",
+    "hu",
+    "ko",
+]
+
+# langid 'zh' döndürür, XTTS 'zh-cn' bekler.
+_LANGID_ALIASES = {"zh-cn": "zh"}
+_XTTS_ALIASES = {v: k for k, v in _LANGID_ALIASES.items()}
+
+# (başlangıç, bitiş) Unicode blokları -> script etiketi
+_SCRIPT_RANGES = (
+    (0x0600, 0x06FF, "arabic"),
+    (0x0750, 0x077F, "arabic"),
+    (0x08A0, 0x08FF, "arabic"),
+    (0xFB50, 0xFDFF, "arabic"),
+    (0xFE70, 0xFEFF, "arabic"),
+    (0x0400, 0x04FF, "cyrillic"),
+    (0x3040, 0x30FF, "kana"),
+    (0x1100, 0x11FF, "hangul"),
+    (0x3130, 0x318F, "hangul"),
+    (0xAC00, 0xD7AF, "hangul"),
+    (0x3400, 0x4DBF, "han"),
+    (0x4E00, 0x9FFF, "han"),
+)
+
+
+class LanguageIdentifier:
+    """
+    Görevi: Dil tespitini SADECE desteklenen dillerle sınırlı, önbellekli ve
+    sınırlı bir metin öneki üzerinden yapmak.
+
+    Arapça, CJK ve Kiril yazıları n-gram modeline girmeden script sayımıyla
+    (early-exit) çözülür. langid modeli motor başlatılırken load() ile yüklenir;
+    load() çağrılmadıysa ilk n-gram sınıflandırmasında yüklenir.
+    """
+
+    def __init__(
+        self,
+        prefix_chars: int = settings.LANG_ID_PREFIX_CHARS,
+        cache_size: int = settings.LANG_ID_CACHE_SIZE,
+        script_threshold: float = 0.5,
+    ):
+        self.prefix_chars = prefix_chars
+        self.script_threshold = script_threshold
+        # Motor başlatılırken load() ile doldurulur; _classify_prefix yedek olarak yükler.
+        self._identifier: Any = None
+        self._load_lock = threading.Lock()
+        self._classify_cached = lru_cache(maxsize=cache_size)(self._classify_prefix)
+
+    def load(self):
+        with self._load_lock:
+            if self._identifier is not None:
+                return
+            from langid.langid import LanguageIdentifier as _LangIdModel, model
+
+            identifier = _LangIdModel.from_modelstring(model, norm_probs=True)
+            identifier.set_languages(
+                [_LANGID_ALIASES.get(lang, lang) for lang in SUPPORTED_LANGUAGES]
+            )
+            self._identifier = identifier
+            logger.info(
+                f"🌐 Language identifier loaded ({len(SUPPORTED_LANGUAGES)} languages).",
+                extra={"event": "LANG_ID_READY"},
+            )
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """(dil_kodu, güven) döndürür. Dil kodu daima SUPPORTED_LANGUAGES içindedir."""
+        prefix = (text or "").strip()[: self.prefix_chars]
+        if not prefix:
+            return settings.DEFAULT_LANGUAGE, 0.0
+        return self._classify_cached(prefix)
+
+    def detect(self, text: str, default: Optional[str] = None) -> str:
+        try:
+            return self.classify(text)[0]
+        except Exception as e:
+            logger.warning(
+                f"Language detection failed: {e}", extra={"event": "LANG_ID_FAIL"}
+            )
+            return default or settings.DEFAULT_LANGUAGE
+
+    def cache_info(self):
+        return self._classify_cached.cache_info()
+
+    def _classify_prefix(self, prefix: str) -> Tuple[str, float]:
+        script_lang = self._detect_by_script(prefix)
+        if script_lang:
+            return script_lang
+
+        if self._identifier is None:
+            self.load()
+        lang, confidence = self._identifier.classify(prefix)
+        return _XTTS_ALIASES.get(lang, lang), float(confidence)
+
+    def _detect_by_script(self, prefix: str) -> Optional[Tuple[str, float]]:
+        counts = {"arabic": 0, "cyrillic": 0, "kana": 0, "hangul": 0, "han": 0}
+        letters = 0
+        for ch in prefix:
+            if not ch.isalpha():
+                continue
+            letters += 1
+            cp = ord(ch)
+            if cp < 0x0400:
+                continue
+            for start, end, script in _SCRIPT_RANGES:
+                if start <= cp <= end:
+                    counts[script] += 1
+                    break
+        if not letters:
+            return None
+
+        # Japonca metinler Kanji (Han) + Kana karışımıdır; Kana varlığı belirleyicidir.
+        cjk = counts["kana"] + counts["han"]
+        if counts["kana"] and cjk / letters >= self.script_threshold:
+            return "ja", cjk / letters
+        for script, lang in (
+            ("hangul", "ko"),
+            ("han", "zh-cn"),
+            ("arabic", "ar"),
+            ("cyrillic", "ru"),
+        ):
+            ratio = counts[script] / letters
+            if ratio >= self.script_threshold:
+                return lang, ratio
+        return None
+
+
+language_identifier = LanguageIdentifier()
@@ -62,6 +62,10 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
         log_record["event"] = getattr(record, "event", "LOG_EVENT")
         log_record["message"] = record.getMessage()
 
+        attributes = getattr(record, "attributes", None)
+        if attributes:
+            log_record["attributes"] = attributes
+
         if record.name == "uvicorn.access":
             log_record["event"] = "HTTP_ACCESS"
             log_record["attributes"] = {
@@ -0,0 +1,318 @@
+import logging
+import threading
+from typing import Optional, Set
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+from app.core.lang_id import SUPPORTED_LANGUAGES
+from app.core.timing import RequestTimings
+
+logger = logging.getLogger("METRICS")
+
+# [ARCH-COMPLIANCE] Label kardinalitesi sınırlıdır: front_door sabit küme, dil
+# desteklenen 16 dil + "other", tenant izin listesi / ilk N tenant + "other".
+FRONT_DOORS = ("http", "openai", "grpc", "batch", "longform", "websocket")
+REQUEST_LABELS = ("front_door", "language", "tenant")
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+QUEUE_WAIT = Histogram(
+    "tts_queue_wait_seconds",
+    "Time spent waiting for the model lock.",
+    REQUEST_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+LOCK_HOLD = Histogram(
+    "tts_lock_hold_seconds",
+    "Time the model lock was held by a request.",
+    REQUEST_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+GPT_TIME = Histogram(
+    "tts_gpt_seconds",
+    "GPT (autoregressive) generation time per request.",
+    REQUEST_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+VOCODER_TIME = Histogram(
+    "tts_vocoder_seconds",
+    "HiFi-GAN decoder time per request.",
+    REQUEST_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+RESAMPLE_TIME = Histogram(
+    "tts_resample_seconds",
+    "Resampling time per request.",
+    REQUEST_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+ENCODE_TIME = Histogram(
+    "tts_encode_seconds",
+    "PCM/container encoding time per request.",
+    REQUEST_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+TTFB = Histogram(
+    "tts_time_to_first_byte_seconds",
+    "Time from request start to the first audio byte.",
+    REQUEST_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+RTF = Histogram(
+    "tts_real_time_factor",
+    "Processing time divided by produced audio duration.",
+    REQUEST_LABELS,
+    buckets=RTF_BUCKETS,
+)
+BYTES_STREAMED = Counter(
+    "tts_audio_bytes_sent_total",
+    "Audio bytes delivered to clients.",
+    REQUEST_LABELS,
+)
+STREAM_ABORTS = Counter(
+    "tts_stream_aborts_total",
+    "Streams terminated before completion.",
+    ("front_door", "reason"),
+)
+DEADLINE_DROPS = Counter(
+    "tts_deadline_exceeded_total",
+    "Requests dropped because their deadline could not be met "
+    "(stage: admission, queue, inflight).",
+    ("front_door", "stage"),
+)
+TENANT_QUEUE_DEPTH = Gauge(
+    "tts_tenant_queue_depth",
+    "Requests waiting for the model per tenant.",
+    ("tenant",),
+)
+TENANT_MODEL_SECONDS = Counter(
+    "tts_tenant_model_seconds_total",
+    "Model lock time consumed per tenant.",
+    ("tenant",),
+)
+TENANT_CHARS = Counter(
+    "tts_tenant_chars_total",
+    "Characters admitted for synthesis per tenant.",
+    ("tenant",),
+)
+TENANT_THROTTLED = Counter(
+    "tts_tenant_throttled_total",
+    "Requests over the tenant character quota (action: rejected, delayed).",
+    ("tenant", "action"),
+)
+STREAM_CONSUMER_LAG = Histogram(
+    "tts_stream_consumer_lag_seconds",
+    "Time a generated chunk waited in the stream buffer before delivery.",
+    ("front_door",),
+    buckets=LATENCY_BUCKETS,
+)
+STREAM_SPILLED_BYTES = Counter(
+    "tts_stream_spilled_bytes_total",
+    "Audio bytes spilled to disk because a stream consumer fell behind.",
+    ("front_door",),
+)
+# RAM isabeti mikrosaniye, uzak isabet milisaniye mertebesindedir.
+CACHE_LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+)
+CACHE_LOOKUP_SECONDS = Histogram(
+    "tts_cache_lookup_seconds",
+    "Audio cache lookup latency by tier (ram: local; memory, disk, redis: backend) and "
+    "result (hit, miss, multi_get: one batched backend read).",
+    ("tier", "result"),
+    buckets=CACHE_LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "tts_cache_lookups_total",
+    "Cache lookups by tier and result.",
+    ("tier", "result"),
+)
+BATCH_ITEMS = Counter(
+    "tts_batch_items_total",
+    "Batch endpoint items by outcome.",
+    ("result",),
+)
+LONGFORM_CHUNKS = Counter(
+    "tts_longform_chunks_total",
+    "Long-form job chunks by outcome.",
+    ("result",),
+)
+VOCODER_BATCH_SIZE = Histogram(
+    "tts_vocoder_batch_size",
+    "Number of requests decoded together in one HiFi-GAN call.",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16),
+)
+MEMORY_CLEANUPS = Counter(
+    "tts_memory_cleanups_total",
+    "SmartMemoryManager forced cleanups.",
+    ("kind",),
+)
+
+_STAGE_HISTOGRAMS = {
+    "queue_wait": QUEUE_WAIT,
+    "lock_hold": LOCK_HOLD,
+    "gpt": GPT_TIME,
+    "vocoder": VOCODER_TIME,
+    "resample": RESAMPLE_TIME,
+    "encode": ENCODE_TIME,
+    "ttfb": TTFB,
+}
+
+
+class TenantLabeler:
+    """Tenant ID'lerini sınırlı bir label kümesine indirger."""
+
+    def __init__(self, allowlist: str, max_tenants: int):
+        self.allowlist: Set[str] = {
+            t.strip() for t in allowlist.split(",") if t.strip()
+        }
+        self.max_tenants = max_tenants
+        self._seen: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def label(self, tenant_id: Optional[str]) -> str:
+        if not tenant_id:
+            return "unknown"
+        if self.allowlist:
+            return tenant_id if tenant_id in self.allowlist else "other"
+        if tenant_id in self._seen:
+            return tenant_id
+        with self._lock:
+            if len(self._seen) < self.max_tenants:
+                self._seen.add(tenant_id)
+                return tenant_id
+        return "other"
+
+
+tenant_labeler = TenantLabeler(
+    settings.METRICS_TENANT_ALLOWLIST, settings.METRICS_MAX_TENANTS
+)
+
+
+def request_labels(timings: RequestTimings) -> dict:
+    front_door = timings.front_door if timings.front_door in FRONT_DOORS else "http"
+    language = timings.language if timings.language in SUPPORTED_LANGUAGES else "other"
+    return {
+        "front_door": front_door,
+        "language": language,
+        "tenant": tenant_labeler.label(timings.tenant_id),
+    }
+
+
+def record_cache_lookup(tier: str, hit: bool, seconds: Optional[float] = None):
+    result = "hit" if hit else "miss"
+    CACHE_LOOKUPS.labels(tier=tier, result=result).inc()
+    if seconds is not None:
+        record_cache_latency(tier, result, seconds)
+
+
+def record_cache_latency(tier: str, result: str, seconds: float):
+    CACHE_LOOKUP_SECONDS.labels(tier=tier, result=result).observe(seconds)
+
+
+def record_batch_item(result: str, count: int = 1):
+    BATCH_ITEMS.labels(result=result).inc(count)
+
+
+def record_longform_chunk(result: str):
+    LONGFORM_CHUNKS.labels(result=result).inc()
+
+
+def record_vocoder_batch(size: int):
+    VOCODER_BATCH_SIZE.observe(size)
+
+
+def record_consumer_lag(front_door: str, seconds: float):
+    STREAM_CONSUMER_LAG.labels(
+        front_door=front_door if front_door in FRONT_DOORS else "http"
+    ).observe(seconds)
+
+
+def record_stream_spill(front_door: str, size: int):
+    STREAM_SPILLED_BYTES.labels(
+        front_door=front_door if front_door in FRONT_DOORS else "http"
+    ).inc(size)
+
+
+def record_deadline_drop(front_door: str, stage: str):
+    DEADLINE_DROPS.labels(
+        front_door=front_door if front_door in FRONT_DOORS else "http", stage=stage
+    ).inc()
+
+
+def record_tenant_queue(tenant_id: Optional[str], delta: int):
+    TENANT_QUEUE_DEPTH.labels(tenant=tenant_labeler.label(tenant_id)).inc(delta)
+
+
+def record_tenant_usage(tenant_id: Optional[str], seconds: float):
+    TENANT_MODEL_SECONDS.labels(tenant=tenant_labeler.label(tenant_id)).inc(seconds)
+
+
+def record_tenant_chars(tenant_id: Optional[str], chars: int):
+    TENANT_CHARS.labels(tenant=tenant_labeler.label(tenant_id)).inc(chars)
+
+
+def record_tenant_throttle(tenant_id: Optional[str], action: str):
+    TENANT_THROTTLED.labels(tenant=tenant_labeler.label(tenant_id), action=action).inc()
+
+
+def record_stream_abort(front_door: str, reason: str):
+    STREAM_ABORTS.labels(front_door=front_door, reason=reason).inc()
+
+
+def report_request(timings: RequestTimings):
+    """İstek sonunda aşama sürelerini histogramlara işler ve yapısal log üretir."""
+    timings.finish()
+    try:
+        labels = request_labels(timings)
+        for stage, histogram in _STAGE_HISTOGRAMS.items():
+            if stage in timings.stages:
+                histogram.labels(**labels).observe(timings.stages[stage] / 1000.0)
+        rtf = timings.rtf()
+        if rtf is not None:
+            RTF.labels(**labels).observe(rtf)
+        if timings.bytes_sent:
+            BYTES_STREAMED.labels(**labels).inc(timings.bytes_sent)
+    except Exception as e:
+        logger.warning(
+            f"Metric observation failed: {e}", extra={"event": "METRICS_OBSERVE_FAIL"}
+        )
+
+    logger.info(
+        f"Request stage timings ({timings.front_door}).",
+        extra={
+            "event": "TTS_REQUEST_TIMINGS",
+            "attributes": {
+                "front_door": timings.front_door,
+                "language": timings.language,
+                "stages_ms": timings.as_dict(),
+            },
+        },
+    )
@@ -0,0 +1,81 @@
+from functools import lru_cache
+
+import numpy as np
+
+PCM16_SCALE = 32767
+TRIM_THRESHOLD = 0.025
+TRIM_FADE_LEN = 2400
+# Sondaki sessizlik geriye doğru bu boyutta bloklarla taranır (tam dizi maskesi yerine).
+_TRIM_SCAN_BLOCK = 4096
+
+
+@lru_cache(maxsize=8)
+def _fade_curve(length: int) -> np.ndarray:
+    curve = np.linspace(1.0, 0.0, length)
+    curve.flags.writeable = False
+    return curve
+
+
+def _last_loud_index(samples: np.ndarray, threshold: float) -> int:
+    end = len(samples)
+    while end > 0:
+        start = max(end - _TRIM_SCAN_BLOCK, 0)
+        hits = np.flatnonzero(np.abs(samples[start:end]) > threshold)
+        if hits.size:
+            return start + int(hits[-1])
+        end = start
+    return -1
+
+
+def trim_tail(
+    samples: np.ndarray,
+    threshold: float = TRIM_THRESHOLD,
+    fade_len: int = TRIM_FADE_LEN,
+) -> np.ndarray:
+    """
+    Son yüksek örnekten fade_len sonrasını keser ve kesilen bölüme lineer fade uygular.
+    Kopya üretmez: dönen dizi girdinin görünümüdür ve fade yerinde uygulanır.
+    Eşiği aşan örnek yoksa girdi olduğu gibi döner.
+    """
+    samples = samples.reshape(-1)
+    last_index = _last_loud_index(samples, threshold)
+    if last_index < 0:
+        return samples
+
+    trimmed = samples[: min(last_index + fade_len, len(samples))]
+    actual_fade_len = min(fade_len, len(trimmed))
+    if actual_fade_len > 10:
+        trimmed[-actual_fade_len:] *= _fade_curve(actual_fade_len)
+    return trimmed
+
+
+class PcmEncoder:
+    """
+    Görevi: float [-1, 1] örnekleri 16-bit PCM'e çevirmek.
+
+    Dönüşüm yeniden kullanılan tek bir int16 tampona yerinde yapılır (ara float kopyası
+    yok) ve tampon üzerinde bir memoryview döner. Görünüm bir sonraki encode() çağrısına
+    kadar geçerlidir; saklamak isteyen tüketici kopyalamalıdır (SpillBuffer bunu yapar).
+    Akış başına bir örnek kullanılır; thread-safe değildir.
+    """
+
+    def __init__(self, initial_samples: int = 0):
+        self._buffer = np.empty(initial_samples, dtype=np.int16)
+
+    @property
+    def capacity(self) -> int:
+        return self._buffer.size
+
+    def encode(self, samples: np.ndarray) -> memoryview:
+        samples = samples.reshape(-1)
+        if samples.size > self._buffer.size:
+            # Büyüme nadirdir (ilk chunk / daha uzun son chunk); üstel büyüme yeniden
+            # tahsisi sınırlar.
+            self._buffer = np.empty(
+                max(samples.size, self._buffer.size * 2), dtype=np.int16
+            )
+        out = self._buffer[: samples.size]
+        # astype(np.int16) ile aynı sonuç (sıfıra doğru kesme); çarpım float32'de yapılır
+        # ve doğrudan çıkışa yazılır.
+        np.multiply(samples, PCM16_SCALE, out=out, casting="unsafe")
+        return out.data.cast("B")
@@ -0,0 +1,181 @@
+import logging
+import threading
+import types
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Optional, Tuple
+
+import torch
+from transformers.modeling_outputs import CausalLMOutputWithCrossAttentions
+
+from app.core import metrics
+
+logger = logging.getLogger("PREFIX-KV-CACHE")
+
+PastKeyValues = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+
+
+def _past_nbytes(past: PastKeyValues) -> int:
+    return sum(t.numel() * t.element_size() for layer in past for t in layer)
+
+
+class PrefixKVCache:
+    """
+    Görevi: Konuşmacı koşullandırma önekinin (gpt_cond_latent) GPT key/value durumunu
+    saklamak ve üretimin ilk adımında yeniden kullanmak.
+
+    XTTS GPT girdisi [cond_latent | metin | start_audio] dizisidir. Model konum gömmesi
+    eklemediği ve dikkat nedensel olduğu için ilk cond_len pozisyonun KV'si yalnızca
+    konuşmacıya bağlıdır. İlk adımda sadece metin + start_audio kısmı işlenir; KV
+    tensörleri salt okunur kullanılır (GPT-2 geçmişi torch.cat ile yeni tensöre kopyalar).
+    Bellek bütçesi bayt cinsindendir; en az kullanılan konuşmacı önce düşer.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, PastKeyValues]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Metotları yerinde değiştirilen GPT2InferenceModel (install() öncesi None).
+        self._inference_model: Any = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._inference_model is not None and self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[PastKeyValues]:
+        with self._lock:
+            past = self._entries.get(key)
+            if past is not None:
+                self._entries.move_to_end(key)
+            return past
+
+    def put(self, key: str, past: PastKeyValues):
+        size = _past_nbytes(past)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= _past_nbytes(old)
+            self._entries[key] = past
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _past_nbytes(evicted)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- MODEL ENTEGRASYONU ---
+    def install(self, model) -> bool:
+        """GPT2InferenceModel'in ilk adımını önbellekli öneki kullanacak şekilde sarar."""
+        inference_model = getattr(getattr(model, "gpt", None), "gpt_inference", None)
+        if inference_model is None or not hasattr(inference_model, "store_prefix_emb"):
+            logger.warning(
+                "GPT inference model not found; prefix KV cache disabled.",
+                extra={"event": "PREFIX_KV_CACHE_UNSUPPORTED"},
+            )
+            return False
+
+        original_prepare = inference_model.prepare_inputs_for_generation
+        original_forward = inference_model.forward
+        inference_model._prefix_past = None
+
+        def prepare_inputs_for_generation(
+            self, input_ids, past_key_values=None, **kwargs
+        ):
+            inputs = original_prepare(
+                input_ids, past_key_values=past_key_values, **kwargs
+            )
+            prefix_past = self._prefix_past
+            if (
+                past_key_values is None
+                and prefix_past is not None
+                and input_ids.shape[0] == prefix_past[0][0].shape[0]
+            ):
+                inputs["past_key_values"] = prefix_past
+                if inputs.get("position_ids") is not None:
+                    inputs["position_ids"] = inputs["position_ids"][
+                        :, prefix_past[0][0].shape[-2] :
+                    ]
+            return inputs
+
+        def forward(
+            self, input_ids=None, past_key_values=None, attention_mask=None, **kwargs
+        ):
+            prefix_past = self._prefix_past
+            if prefix_past is None or past_key_values is not prefix_past:
+                return original_forward(
+                    input_ids=input_ids,
+                    past_key_values=past_key_values,
+                    attention_mask=attention_mask,
+                    **kwargs,
+                )
+
+            cond_len = prefix_past[0][0].shape[-2]
+            prefix_len = self.cached_prefix_emb.shape[1]
+            gen_emb = self.embeddings(input_ids[:, prefix_len:])
+            gen_emb = gen_emb + self.pos_embedding(gen_emb)
+            emb = torch.cat(
+                [self.cached_prefix_emb[:, cond_len:].to(gen_emb.dtype), gen_emb], dim=1
+            )
+            outputs = self.transformer(
+                inputs_embeds=emb,
+                past_key_values=prefix_past,
+                attention_mask=attention_mask,
+                position_ids=kwargs.get("position_ids"),
+                use_cache=True,
+                output_attentions=kwargs.get("output_attentions"),
+                output_hidden_states=kwargs.get("output_hidden_states"),
+                return_dict=True,
+            )
+            return CausalLMOutputWithCrossAttentions(
+                loss=None,
+                logits=self.lm_head(outputs.last_hidden_state),
+                past_key_values=outputs.past_key_values,
+                hidden_states=outputs.hidden_states,
+                attentions=outputs.attentions,
+                cross_attentions=outputs.cross_attentions,
+            )
+
+        inference_model.prepare_inputs_for_generation = types.MethodType(
+            prepare_inputs_for_generation, inference_model
+        )
+        inference_model.forward = types.MethodType(forward, inference_model)
+        self._inference_model = inference_model
+        logger.info(
+            f"Prefix KV cache enabled ({self.max_bytes // (1024 * 1024)} MB budget).",
+            extra={"event": "PREFIX_KV_CACHE_READY"},
+        )
+        return True
+
+    def _compute(self, gpt_cond_latent: torch.Tensor) -> PastKeyValues:
+        transformer = self._inference_model.transformer
+        dtype = next(transformer.parameters()).dtype
+        outputs = transformer(
+            inputs_embeds=gpt_cond_latent.to(dtype), use_cache=True, return_dict=True
+        )
+        return outputs.past_key_values
+
+    @contextmanager
+    def bind(self, voice_key: Optional[str], gpt_cond_latent: torch.Tensor):
+        """
+        Model kilidi altında çağrılmalıdır: önbellekli KV bu blok boyunca her generate
+        çağrısının (cümle bölme dahil) ilk adımında kullanılır.
+        """
+        if not self.enabled or not voice_key:
+            yield
+            return
+
+        past = self.get(voice_key)
+        metrics.record_cache_lookup("prefix_kv", past is not None)
+        if past is None:
+            past = self._compute(gpt_cond_latent)
+            self.put(voice_key, past)
+
+        self._inference_model._prefix_past = past
+        try:
+            yield
+        finally:
+            self._inference_model._prefix_past = None
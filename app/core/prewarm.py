@@ -0,0 +1,171 @@
+import os
+import csv
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+import yaml
+
+from app.api.schemas import TTSRequest
+from app.core.audio_cache import audio_cache
+from app.core.engine import tts_engine
+from app.core.timing import RequestTimings
+from app.core import metrics
+
+logger = logging.getLogger("PREWARM")
+
+# Katalog sütunları -> TTSRequest alanları
+FIELD_ALIASES = {"speaker": "speaker_idx", "format": "output_format"}
+TRUE_VALUES = {"1", "true", "yes", "y", "evet"}
+
+
+@dataclass
+class CatalogEntry:
+    id: str
+    params: dict
+    pin: bool = False
+
+
+@dataclass
+class PrewarmResult:
+    id: str
+    key: str
+    status: str  # cached | rendered | error
+    render_ms: float = 0.0
+    bytes: int = 0
+    pinned: bool = False
+    error: Optional[str] = None
+
+
+def _read_rows(path: str) -> List[dict]:
+    if path.endswith((".yaml", ".yml")):
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+        # Hem düz liste hem de {"defaults": {...}, "prompts": [...]} biçimi desteklenir.
+        if isinstance(data, dict):
+            defaults = data.get("defaults") or {}
+            return [{**defaults, **row} for row in data.get("prompts") or []]
+        return list(data)
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [
+            {k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+            for row in csv.DictReader(f)
+        ]
+
+
+def load_catalog(path: str) -> List[CatalogEntry]:
+    """YAML veya CSV katalogunu doğrular. Geçersiz satırlar loglanır ve atlanır."""
+    entries = []
+    for index, row in enumerate(_read_rows(path)):
+        row = {FIELD_ALIASES.get(k, k): v for k, v in row.items()}
+        entry_id = str(row.pop("id", index))
+        pin = str(row.pop("pin", row.pop("pinned", ""))).strip().lower() in TRUE_VALUES
+        row["stream"] = False
+        try:
+            params = TTSRequest(**row).model_dump()
+        except Exception as e:
+            logger.warning(
+                f"Catalog entry '{entry_id}' is invalid and skipped: {e}",
+                extra={"event": "PREWARM_ENTRY_INVALID"},
+            )
+            continue
+        entries.append(CatalogEntry(id=entry_id, params=params, pin=pin))
+    return entries
+
+
+def _render(entry: CatalogEntry, force: bool) -> PrewarmResult:
+    key = audio_cache.key(entry.params, entry.params["output_format"])
+    result = PrewarmResult(id=entry.id, key=key, status="cached", pinned=entry.pin)
+
+    if not force and audio_cache.contains(key):
+        if entry.pin:
+            audio_cache.pin(key)
+        return result
+
+    timings = RequestTimings("batch")
+    started = time.perf_counter()
+    try:
+        audio = tts_engine.synthesize(dict(entry.params), timings=timings)
+    except Exception as e:
+        result.status, result.error = "error", str(e)
+        result.render_ms = (time.perf_counter() - started) * 1000.0
+        return result
+
+    audio_cache.put(key, audio, pin=entry.pin)
+    timings.bytes_sent = len(audio)
+    metrics.report_request(timings)
+    result.status = "rendered"
+    result.render_ms = (time.perf_counter() - started) * 1000.0
+    result.bytes = len(audio)
+    return result
+
+
+def prewarm(
+    entries: List[CatalogEntry], workers: int = 2, force: bool = False
+) -> List[PrewarmResult]:
+    """
+    Girdileri paralel işler. GPU kilidi modeli sıraya sokar; paralellik normalizasyon,
+    resample, encode ve disk yazımını model çalışmasıyla örtüştürür.
+    """
+    started = time.perf_counter()
+    # Aynı konuşmacı ardışık: latent önbelleği sıcak kalır.
+    ordered = sorted(
+        entries,
+        key=lambda e: (
+            e.params.get("speaker_idx") or "",
+            e.params.get("language") or "",
+        ),
+    )
+    results: List[PrewarmResult] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for result in pool.map(lambda e: _render(e, force), ordered):
+            results.append(result)
+            if result.status == "error":
+                logger.warning(
+                    f"Prewarm failed for '{result.id}': {result.error}",
+                    extra={"event": "PREWARM_ENTRY_FAIL"},
+                )
+            else:
+                logger.info(
+                    f"Prewarm '{result.id}': {result.status} in {result.render_ms:.0f} ms",
+                    extra={
+                        "event": "PREWARM_ENTRY",
+                        "attributes": {
+                            "id": result.id,
+                            "status": result.status,
+                            "render_ms": round(result.render_ms, 1),
+                            "bytes": result.bytes,
+                            "pinned": result.pinned,
+                        },
+                    },
+                )
+
+    rendered = sum(1 for r in results if r.status == "rendered")
+    cached = sum(1 for r in results if r.status == "cached")
+    failed = sum(1 for r in results if r.status == "error")
+    logger.info(
+        f"Prewarm finished: {rendered} rendered, {cached} already cached, {failed} failed "
+        f"in {time.perf_counter() - started:.1f}s.",
+        extra={"event": "PREWARM_COMPLETE"},
+    )
+    return results
+
+
+def prewarm_from_file(
+    path: str, workers: int = 2, force: bool = False
+) -> List[PrewarmResult]:
+    if not os.path.exists(path):
+        logger.error(
+            f"Prewarm catalog not found: {path}",
+            extra={"event": "PREWARM_CATALOG_MISSING"},
+        )
+        return []
+    entries = load_catalog(path)
+    logger.info(
+        f"Prewarm catalog loaded: {len(entries)} entries from {path}",
+        extra={"event": "PREWARM_START"},
+    )
+    return prewarm(entries, workers=workers, force=force)
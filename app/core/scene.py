@@ -0,0 +1,173 @@
+import struct
+import logging
+from typing import Callable, Dict, List, Optional
+
+from app.core.batch import BatchJob, BatchResult, plan_batch
+from app.core.cache import MemoryLRUCache
+from app.core.config import settings
+
+logger = logging.getLogger("SCENE")
+
+# Bloklar bu parametreleri sahneden devralır; blok alanları (metin, konuşmacı, hız) ayrıdır.
+_SHARED_KEYS = ("temperature", "top_k", "top_p", "repetition_penalty", "sample_rate")
+
+
+def scene_items(scene: dict) -> List[dict]:
+    """Sahne isteğini blok başına sentez parametrelerine çevirir (çıkış her zaman ham PCM)."""
+    items = []
+    for index, block in enumerate(scene["blocks"]):
+        speaker = block.get("speaker") or settings.DEFAULT_SPEAKER
+        style = block.get("style")
+        if style and style != "default":
+            speaker = f"{speaker}/{style}"
+        items.append(
+            {
+                **{k: scene[k] for k in _SHARED_KEYS},
+                "id": block.get("id") or str(index),
+                "text": block["text"],
+                "language": block.get("language") or scene["language"],
+                "speaker_idx": speaker,
+                "speed": block["speed"],
+                "output_format": "pcm",
+                "split_sentences": True,
+            }
+        )
+    return items
+
+
+def plan_scene(
+    items: List[dict], key_fn: Callable[[dict, str], str], window: int
+) -> List[BatchJob]:
+    """
+    plan_batch gibi tekrarlanan blokları tek işe indirir, ama konuşmacıya göre gruplamayı
+    `window` bloklık pencerelerle sınırlar: pencere içinde aynı konuşmacının blokları art
+    arda sentezlenir (latent ve önek önbelleği sıcak kalır), pencereler ise sahne sırasıyla
+    ilerler. Böylece miks, sahnenin tamamı beklenmeden baştan itibaren akıtılabilir.
+    """
+    window = max(window, 1)
+    return sorted(
+        plan_batch(items, key_fn),
+        key=lambda j: (
+            j.indices[0] // window,
+            j.params.get("speaker_idx") or "",
+            j.params.get("language") or "",
+            j.indices[0],
+        ),
+    )
+
+
+def streaming_wav_header(sample_rate: int) -> bytes:
+    """
+    Uzunluğu baştan bilinmeyen 16-bit mono WAV başlığı: RIFF ve data boyutları en büyük
+    değere ayarlanır (akış halinde WAV için yaygın kullanım); okuyucular dosya sonuna kadar okur.
+    """
+    return b"".join(
+        (
+            b"RIFF",
+            struct.pack("<I", 0xFFFFFFFF),
+            b"WAVEfmt ",
+            struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16),
+            b"data",
+            struct.pack("<I", 0xFFFFFFFF - 36),
+        )
+    )
+
+
+class SceneMixer:
+    """
+    Görevi: Sıra dışı gelen blok seslerini sahne sırasına dizip tek bir PCM akışına
+    eklemek ve blok başına zaman çizelgesini (ofset, süre, durum) tutmak.
+
+    - Sonuçlar plan sırasıyla (konuşmacı grupları) gelir; bir blok, kendisinden önceki
+      tüm bloklar hazır olduğunda akışa yazılır.
+    - Her bloktan sonra gap_ms sessizlik eklenir (son blok hariç).
+    - Sentezi başarısız olan blok atlanır; çizelgede status="error" olarak görünür.
+    """
+
+    def __init__(
+        self,
+        scene_id: str,
+        items: List[dict],
+        gaps_ms: List[int],
+        sample_rate: int,
+        output_format: str,
+        tenant_id: Optional[str] = None,
+    ):
+        self.scene_id = scene_id
+        self.items = items
+        self.gaps_ms = gaps_ms
+        self.sample_rate = sample_rate
+        self.output_format = output_format
+        self.tenant_id = tenant_id
+        self.status = "running"
+        self.samples_written = 0
+        self.blocks: List[dict] = []
+        self._pending: Dict[int, BatchResult] = {}
+        self._next = 0
+
+    def add(self, result: BatchResult) -> List[bytes]:
+        """Sonucu kaydeder; sırası gelen blokların PCM parçalarını (aralar dahil) döner."""
+        for index in result.job.indices:
+            self._pending[index] = result
+        pieces: List[bytes] = []
+        while self._next in self._pending:
+            pieces.extend(self._emit(self._next, self._pending.pop(self._next)))
+            self._next += 1
+        return pieces
+
+    def finish(self, status: str = "completed"):
+        self.status = status
+        if self._pending:
+            logger.warning(
+                f"Scene {self.scene_id} finished with {len(self._pending)} blocks unmixed.",
+                extra={"event": "SCENE_INCOMPLETE"},
+            )
+
+    def timeline(self) -> dict:
+        return {
+            "scene_id": self.scene_id,
+            "status": self.status,
+            "format": self.output_format,
+            "sample_rate": self.sample_rate,
+            "total_blocks": len(self.items),
+            "duration_ms": self._ms(self.samples_written),
+            "blocks": list(self.blocks),
+        }
+
+    def _emit(self, index: int, result: BatchResult) -> List[bytes]:
+        pieces = []
+        if index and self.samples_written:
+            gap_samples = int(self.sample_rate * self.gaps_ms[index - 1] / 1000)
+            if gap_samples:
+                pieces.append(b"\x00\x00" * gap_samples)
+                self.samples_written += gap_samples
+
+        item = self.items[index]
+        entry = {
+            "index": index,
+            "id": item["id"],
+            "speaker": item["speaker_idx"],
+            "offset_ms": self._ms(self.samples_written),
+            "duration_ms": 0.0,
+            "status": "ok",
+            "cache": "hit" if result.cache_hit else "miss",
+        }
+        if result.error:
+            entry.update(status="error", error=result.error)
+        else:
+            assert result.audio is not None
+            samples = len(result.audio) // 2
+            pieces.append(result.audio)
+            self.samples_written += samples
+            entry["duration_ms"] = self._ms(samples)
+        self.blocks.append(entry)
+        return pieces
+
+    def _ms(self, samples: int) -> float:
+        return round(samples * 1000.0 / self.sample_rate, 1)
+
+
+# GET /api/scene/{id}: render sürerken de okunabilir (bloklar yazıldıkça eklenir).
+scene_timelines: "MemoryLRUCache[SceneMixer]" = MemoryLRUCache(
+    settings.SCENE_TIMELINE_ITEMS
+)
@@ -0,0 +1,254 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger("SCHEDULER")
+
+# Tenant'ı olmayan iç işlerin (ör. prewarm) kuyruk anahtarı; bu işler kotaya tabi değildir.
+INTERNAL_TENANT = "_internal"
+# Süre tahmini yokken (soğuk başlangıç) bir isteğin sanal maliyeti (sn).
+DEFAULT_COST_SECONDS = 1.0
+# Bu kadar tenant kaydı birikince sanal zamanın gerisinde kalanlar silinir.
+_PRUNE_THRESHOLD = 1024
+
+
+def parse_tenant_map(raw: str) -> Dict[str, float]:
+    """'tenant_a=4,tenant_b=0.5' -> {'tenant_a': 4.0, 'tenant_b': 0.5}. Hatalı öğe atlanır."""
+    values: Dict[str, float] = {}
+    for item in raw.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        try:
+            values[name.strip()] = float(value)
+        except ValueError:
+            logger.warning(
+                f"Ignoring invalid tenant setting: '{item.strip()}'",
+                extra={"event": "TENANT_CONFIG_INVALID"},
+            )
+    return values
+
+
+class QuotaExceeded(Exception):
+    """Tenant'ın karakter kotası tükendi; retry_after (sn) sonra yeniden denenebilir."""
+
+    abort_reason = "quota"
+
+    def __init__(self, tenant_id: str, retry_after: float):
+        super().__init__(
+            f"Character quota exceeded for tenant '{tenant_id}'. "
+            f"Retry in {retry_after:.1f}s."
+        )
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Borçlanabilen token kovası: bakiye negatif değilse istek kabul edilir ve maliyetin
+    tamamı düşülür. Böylece kovadan büyük tek bir istek de geçer, ama tenant'ın uzun
+    vadeli hızı `rate` ile sınırlı kalır (borç ödenene kadar yeni istek alınmaz).
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, amount: float) -> float:
+        """Kabul edilirse 0, edilmezse bakiyenin sıfıra dönmesine kalan süre (sn)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 0:
+            return -self.tokens / self.rate
+        self.tokens -= amount
+        return 0.0
+
+
+class _Ticket:
+    __slots__ = ("tenant_id", "tenant", "background", "cost", "start", "seq")
+
+    def __init__(
+        self,
+        tenant_id: Optional[str],
+        background: bool,
+        cost: float,
+        start: float,
+        seq: int,
+    ):
+        self.tenant_id = tenant_id
+        self.tenant = tenant_id or INTERNAL_TENANT
+        self.background = background
+        self.cost = cost
+        self.start = start
+        self.seq = seq
+
+    def key(self):
+        return (self.background, self.start, self.seq)
+
+
+class FairScheduler:
+    """
+    Görevi: Tek model kilidini tenant'lar arasında ağırlıklı adil kuyrukla (WFQ)
+    dağıtmak ve tenant başına karakter/sn kotası uygulamak.
+
+    Start-time fair queuing: kuyruğa giren istek max(sanal zaman, tenant'ın son bitiş
+    etiketi) başlangıç etiketini alır; tenant'ın bitiş etiketi maliyet / ağırlık kadar
+    ilerler. Kilit boşaldığında en küçük başlangıç etiketli istek alır, yani bir tenant'ın
+    kuyruğa yığdığı işler diğer tenant'ların önüne geçemez. Maliyet tahmini sentez
+    süresidir; kilit bırakılırken gerçek tutma süresiyle düzeltilir. Arka plan işleri
+    (long-form) her zaman gerçek zamanlı isteklerin arkasında kalır.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        default_weight: float = 1.0,
+        quotas: Optional[Dict[str, float]] = None,
+        default_quota: float = 0.0,
+        burst_seconds: float = 10.0,
+    ):
+        self.weights = weights or {}
+        self.default_weight = default_weight
+        self.quotas = quotas or {}
+        self.default_quota = default_quota
+        self.burst_seconds = burst_seconds
+        self._cv = threading.Condition()
+        self._busy = False
+        self._waiting: List[_Ticket] = []
+        self._vtime = 0.0
+        self._finish: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "FairScheduler":
+        return cls(
+            weights=parse_tenant_map(settings.TENANT_WEIGHTS),
+            default_weight=settings.TENANT_DEFAULT_WEIGHT,
+            quotas=parse_tenant_map(settings.TENANT_QUOTAS),
+            default_quota=settings.TENANT_QUOTA_CHARS_PER_SEC,
+            burst_seconds=settings.TENANT_QUOTA_BURST_SECONDS,
+        )
+
+    def weight(self, tenant: str) -> float:
+        return max(self.weights.get(tenant, self.default_weight), 1e-3)
+
+    # --- KOTA ---
+
+    def charge(self, tenant_id: Optional[str], chars: int, wait: bool = False):
+        """
+        Karakter kotasından düşer. Kota doluysa wait=False iken QuotaExceeded fırlatır;
+        wait=True (arka plan işleri) ise kova borcunu ödeyene kadar bekler.
+        """
+        # Tenant'sız (iç) istekler kotaya tabi değildir; anahtar, acquire() ile aynı kuraldır.
+        tenant = tenant_id or INTERNAL_TENANT
+        rate = self.quotas.get(tenant, self.default_quota) if tenant_id else 0.0
+        if rate <= 0 or chars <= 0:
+            return
+        delayed = False
+        while True:
+            with self._buckets_lock:
+                bucket = self._buckets.get(tenant)
+                if bucket is None or bucket.rate != rate:
+                    bucket = TokenBucket(rate, rate * self.burst_seconds)
+                    self._buckets[tenant] = bucket
+                retry_after = bucket.take(chars)
+            if retry_after <= 0:
+                metrics.record_tenant_chars(tenant, chars)
+                return
+            if not wait:
+                metrics.record_tenant_throttle(tenant, "rejected")
+                raise QuotaExceeded(tenant, retry_after)
+            if not delayed:
+                delayed = True
+                metrics.record_tenant_throttle(tenant, "delayed")
+            time.sleep(retry_after)
+
+    # --- MODEL KİLİDİ ---
+
+    def acquire(
+        self,
+        tenant_id: Optional[str],
+        cost: Optional[float] = None,
+        background: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Optional[_Ticket]:
+        """
+        Sıra gelince kilidi alır ve bileti döner; timeout (sn) dolarsa None döner ve
+        tenant'ın etiketi geri alınır (düşürülen iş sonraki isteklerini geciktirmez).
+        """
+        tenant = tenant_id or INTERNAL_TENANT
+        cost = DEFAULT_COST_SECONDS if cost is None else cost
+        with self._cv:
+            start = max(self._vtime, self._finish.get(tenant, 0.0))
+            ticket = _Ticket(tenant_id, background, cost, start, next(self._seq))
+            self._finish[tenant] = start + cost / self.weight(tenant)
+            if self._wait_turn(ticket, timeout):
+                return ticket
+            self._finish[tenant] -= cost / self.weight(tenant)
+            return None
+
+    def pause(self):
+        """Kilidi geçici bırakır (vocoder batch beklemesi); bilet sırasını korur."""
+        with self._cv:
+            self._busy = False
+            self._cv.notify_all()
+
+    def resume(self, ticket: _Ticket):
+        """pause() sonrası kilidi aynı başlangıç etiketiyle geri alır."""
+        with self._cv:
+            self._wait_turn(ticket, None)
+
+    def release(self, ticket: _Ticket, held_seconds: float):
+        with self._cv:
+            self._busy = False
+            # Tahmin hatası düzeltmesi: tenant gerçekte kullandığı model süresiyle ilerler.
+            if ticket.tenant in self._finish:
+                self._finish[ticket.tenant] += (
+                    held_seconds - ticket.cost
+                ) / self.weight(ticket.tenant)
+            if len(self._finish) > _PRUNE_THRESHOLD:
+                self._prune()
+            self._cv.notify_all()
+        metrics.record_tenant_usage(ticket.tenant_id, held_seconds)
+
+    def queue_depth(self) -> int:
+        with self._cv:
+            return len(self._waiting)
+
+    def _wait_turn(self, ticket: _Ticket, timeout: Optional[float]) -> bool:
+        """self._cv tutulurken çağrılır."""
+        self._waiting.append(ticket)
+        metrics.record_tenant_queue(ticket.tenant_id, 1)
+        granted = False
+        try:
+            granted = self._cv.wait_for(
+                lambda: (
+                    not self._busy and min(self._waiting, key=_Ticket.key) is ticket
+                ),
+                None if timeout is None else max(timeout, 0.0),
+            )
+            if granted:
+                self._busy = True
+                self._vtime = max(self._vtime, ticket.start)
+            return granted
+        finally:
+            self._waiting.remove(ticket)
+            metrics.record_tenant_queue(ticket.tenant_id, -1)
+            if not granted:
+                # Sıranın başındaki bekleyen ayrıldıysa sıradaki uyanmalı.
+                self._cv.notify_all()
+
+    def _prune(self):
+        waiting = {t.tenant for t in self._waiting}
+        for tenant, finish in list(self._finish.items()):
+            if finish <= self._vtime and tenant not in waiting:
+                del self._finish[tenant]
@@ -0,0 +1,210 @@
+import re
+from typing import List, Optional
+
+# Cümle sonu: . ! ? … (ardından boşluk/satır sonu), tam genişlikli 。！？； (CJK metinde
+# boşluk yoktur; kapanış tırnağı/parantezi cümleye dahil edilir) veya paragraf arası.
+_SENTENCE_END = re.compile(
+    r"(?<=[.!?…])\s+|(?<=[.!?…][\"')\]])\s+"
+    r"|(?<=[。！？；])(?![」』”’）)])\s*|(?<=[。！？；][」』”’）)])\s*"
+    r"|\n{2,}"
+)
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+|(?<=[，、；：])\s*")
+# Kelimeler arasında boşluk kullanılmayan yazılar (Çince, Japonca): parçalar boşluksuz birleşir.
+_NO_SPACE_SCRIPT = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+# XTTS'in dil bazlı karakter sınırları (tokenizer uyarı eşiği); aşılırsa kalite düşer.
+LANGUAGE_CHAR_LIMITS = {
+    "en": 250,
+    "de": 253,
+    "fr": 273,
+    "es": 239,
+    "it": 213,
+    "pt": 203,
+    "pl": 224,
+    "zh-cn": 82,
+    "ar": 166,
+    "cs": 186,
+    "ru": 182,
+    "nl": 251,
+    "tr": 226,
+    "ja": 71,
+    "hu": 224,
+    "ko": 95,
+}
+# Noktayla biten ama cümleyi bitirmeyen kısaltmalar (küçük harf karşılaştırılır).
+_ABBREVIATIONS = {
+    "dr.",
+    "prof.",
+    "doç.",
+    "av.",
+    "sn.",
+    "no.",
+    "vb.",
+    "vs.",
+    "örn.",
+    "bkz.",
+    "mr.",
+    "mrs.",
+    "ms.",
+    "st.",
+    "etc.",
+    "e.g.",
+    "i.e.",
+}
+
+
+def chunk_chars(language: Optional[str], max_chars: int) -> int:
+    """Parça boyutu: yapılandırılan sınır ile dilin XTTS sınırının küçüğü."""
+    return min(max_chars, LANGUAGE_CHAR_LIMITS.get(language or "", max_chars))
+
+
+def _join(left: str, right: str) -> str:
+    if _NO_SPACE_SCRIPT.match(left[-1]) or _NO_SPACE_SCRIPT.match(right[0]):
+        return left + right
+    return f"{left} {right}"
+
+
+def _ends_with_abbreviation(text: str) -> bool:
+    words = text.rsplit(None, 1)
+    return bool(words) and words[-1].lower() in _ABBREVIATIONS
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """
+    max_chars'ı aşan cümleyi önce virgül/noktalı virgülden, sonra kelimeden böler.
+    Boşluk içermeyen (CJK ya da noktalamasız) uzun dizi max_chars'tan sert kesilir.
+    """
+    parts: List[str] = []
+    for clause in _CLAUSE_END.split(sentence):
+        if len(clause) <= max_chars:
+            parts.append(clause)
+            continue
+        current = ""
+        for word in clause.split():
+            while len(word) > max_chars:
+                if current:
+                    parts.append(current)
+                    current = ""
+                parts.append(word[:max_chars])
+                word = word[max_chars:]
+            if current and len(current) + 1 + len(word) > max_chars:
+                parts.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current:
+            parts.append(current)
+    return _merge(parts, max_chars)
+
+
+def _merge(parts: List[str], max_chars: int) -> List[str]:
+    """Kısa parçaları max_chars sınırına kadar birleştirir (model çağrısı sayısını azaltır)."""
+    chunks: List[str] = []
+    current = ""
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if current and len(_join(current, part)) > max_chars:
+            chunks.append(current)
+            current = part
+        else:
+            current = _join(current, part) if current else part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_sentences(text: str, max_chars: int = 220) -> List[str]:
+    """
+    Metni cümle sınırlarından, her parça max_chars'ı aşmayacak şekilde böler.
+    XTTS'in dil bazlı karakter sınırı (~250) aşılırsa kalite düşer.
+    """
+    pieces: List[str] = []
+    carry = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = f"{carry} {sentence.strip()}".strip() if carry else sentence.strip()
+        carry = ""
+        if not sentence:
+            continue
+        if _ends_with_abbreviation(sentence):
+            carry = sentence
+            continue
+        if len(sentence) > max_chars:
+            pieces.extend(_split_long(sentence, max_chars))
+        else:
+            pieces.append(sentence)
+    if carry:
+        pieces.append(carry)
+    return _merge(pieces, max_chars)
+
+
+class IncrementalSentenceSplitter:
+    """
+    Parça parça gelen metinden (LLM token akışı) konuşulabilir birimler çıkarır.
+
+    Bir cümle ancak sonundaki noktalama işaretinden sonra boşluk (CJK'da herhangi bir
+    karakter) geldiğinde tamamlanmış sayılır ("3.5" veya "Dr.Ahmet" gibi yarım token'lar,
+    "。」" gibi kapanış işaretleri erken bölünmez). İlk birim, gecikmeyi düşürmek için
+    eager_chars'ı geçtiği anda virgülden de kesilebilir. Boşluksuz uzun akış max_chars'ta
+    zorla kesilir.
+    """
+
+    def __init__(self, max_chars: int = 220, eager_chars: int = 60):
+        self.max_chars = max_chars
+        self.eager_chars = eager_chars
+        self._buffer = ""
+        self._emitted = 0
+
+    @property
+    def pending(self) -> str:
+        return self._buffer
+
+    def feed(self, fragment: str) -> List[str]:
+        self._buffer += fragment
+        units: List[str] = []
+
+        last_end = None
+        for match in _SENTENCE_END.finditer(self._buffer):
+            if match.end() == len(self._buffer) and match.start() == match.end():
+                continue  # Tampon sonundaki CJK noktalama: kapanış işareti gelebilir
+            if not _ends_with_abbreviation(self._buffer[: match.start()]):
+                last_end = match
+        if last_end is not None:
+            units.extend(
+                split_sentences(self._buffer[: last_end.start()], self.max_chars)
+            )
+            self._buffer = self._buffer[last_end.end() :]
+
+        if not units and not self._emitted and len(self._buffer) >= self.eager_chars:
+            last_clause = None
+            for match in _CLAUSE_END.finditer(self._buffer):
+                if match.end() < len(self._buffer):
+                    last_clause = match
+            if last_clause is not None:
+                units.extend(
+                    split_sentences(self._buffer[: last_clause.start()], self.max_chars)
+                )
+                self._buffer = self._buffer[last_clause.end() :]
+
+        if len(self._buffer) > self.max_chars:
+            # Noktalamasız uzun akış: son (muhtemelen yarım) kelime ya da boşluksuz dizinin
+            # max_chars'a sığmayan kalanı tamponda kalır.
+            pieces = _split_long(self._buffer, self.max_chars)
+            if len(pieces) > 1:
+                units.extend(pieces[:-1])
+                self._buffer = pieces[-1]
+
+        self._emitted += len(units)
+        return units
+
+    def flush(self) -> List[str]:
+        """Girdi bitti: tamponda kalan metni (noktalama beklemeden) döndürür."""
+        units = split_sentences(self._buffer, self.max_chars)
+        self._buffer = ""
+        self._emitted += len(units)
+        return units
+
+    def clear(self):
+        """Barge-in: tamponu atar; sonraki ilk birim yine erken kesilebilir."""
+        self._buffer = ""
+        self._emitted = 0
@@ -0,0 +1,181 @@
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("SPEAKER-REGISTRY")
+
+FALLBACK_SPEAKER = "system_default"
+
+
+@dataclass(frozen=True)
+class SpeakerSnapshot:
+    """Değiştirilemez speaker indeksi. Handler'lar kilitsiz okur, tarayıcı atomik olarak değiştirir."""
+
+    version: int = 0
+    # speaker -> sıralı stil listesi (UI / API gösterimi)
+    styles: Dict[str, List[str]] = field(default_factory=dict)
+    # speaker -> stil -> (wav_path, mtime_ns)
+    folders: Dict[str, Dict[str, Tuple[str, int]]] = field(default_factory=dict)
+    # kök dizindeki eski tip "<speaker>.wav" dosyaları
+    root_files: Dict[str, Tuple[str, int]] = field(default_factory=dict)
+
+
+class SpeakerRegistry:
+    """
+    Görevi: /app/speakers dizinini bir kez indeksleyip, sonrasında arka planda
+    mtime-diff ile artımlı güncellemek. İstek yolunda dosya sistemine dokunulmaz.
+    """
+
+    def __init__(self, root_dir: str, scan_interval: float = 5.0):
+        self.root_dir = root_dir
+        self.scan_interval = scan_interval
+        self._snapshot = SpeakerSnapshot()
+        self._dir_mtimes: Dict[str, int] = {}
+        self._root_mtime: Optional[int] = None
+        self._scan_lock = threading.Lock()
+        self._listeners: List[Callable[[SpeakerSnapshot], None]] = []
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def snapshot(self) -> SpeakerSnapshot:
+        return self._snapshot
+
+    def subscribe(self, listener: Callable[[SpeakerSnapshot], None]):
+        self._listeners.append(listener)
+        listener(self._snapshot)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._watch_loop, name="speaker-registry", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def rescan(self, force: bool = False) -> SpeakerSnapshot:
+        """Değişen klasörleri yeniden tarar. force=True tüm mtime önbelleğini yok sayar."""
+        with self._scan_lock:
+            try:
+                root_mtime = os.stat(self.root_dir).st_mtime_ns
+            except OSError:
+                return self._snapshot
+
+            current = self._snapshot
+            folders = dict(current.folders)
+            root_files = dict(current.root_files)
+            root_changed = force or root_mtime != self._root_mtime
+            changed = root_changed
+            seen_dirs = set()
+
+            try:
+                entries = list(os.scandir(self.root_dir))
+            except OSError:
+                return self._snapshot
+
+            if root_changed:
+                root_files = {}
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        seen_dirs.add(entry.name)
+                        dir_mtime = entry.stat().st_mtime_ns
+                        if not force and self._dir_mtimes.get(entry.name) == dir_mtime:
+                            continue
+                        self._dir_mtimes[entry.name] = dir_mtime
+                        styles = self._scan_folder(entry.path)
+                        if styles:
+                            folders[entry.name] = styles
+                        else:
+                            folders.pop(entry.name, None)
+                        changed = True
+                    elif root_changed and entry.name.endswith(".wav"):
+                        name = os.path.splitext(entry.name)[0]
+                        root_files[name] = (entry.path, entry.stat().st_mtime_ns)
+                except OSError:
+                    continue
+
+            for name in list(folders):
+                if name not in seen_dirs:
+                    folders.pop(name)
+                    self._dir_mtimes.pop(name, None)
+                    changed = True
+
+            self._root_mtime = root_mtime
+            if not changed:
+                return current
+
+            styles_map = {name: sorted(styles) for name, styles in folders.items()}
+            for name in root_files:
+                styles_map.setdefault(name, ["default"])
+
+            snapshot = SpeakerSnapshot(
+                version=current.version + 1,
+                styles=styles_map,
+                folders=folders,
+                root_files=root_files,
+            )
+            self._snapshot = snapshot
+
+        logger.info(
+            f"🔊 Speakers refreshed. Total: {len(snapshot.styles)}",
+            extra={"event": "SPEAKERS_REFRESHED"},
+        )
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.warning(
+                    f"Speaker registry listener failed: {e}",
+                    extra={"event": "SPEAKER_LISTENER_FAIL"},
+                )
+        return snapshot
+
+    def resolve(self, speaker_id: Optional[str]) -> Optional[Tuple[str, int]]:
+        """'isim' veya 'isim/stil' -> (wav_path, mtime_ns). Dosya sistemine dokunmaz."""
+        snapshot = self._snapshot
+        if not speaker_id:
+            return None
+        if "/" in speaker_id:
+            spk_name, spk_style = speaker_id.split("/", 1)
+        else:
+            spk_name, spk_style = speaker_id, "default"
+
+        styles = snapshot.folders.get(spk_name)
+        if styles:
+            if spk_style in styles:
+                return styles[spk_style]
+            return styles[sorted(styles)[0]]
+        return snapshot.root_files.get(spk_name)
+
+    def _scan_folder(self, path: str) -> Dict[str, Tuple[str, int]]:
+        styles = {}
+        with os.scandir(path) as it:
+            for f in it:
+                if f.name.endswith(".wav") and f.is_file():
+                    style_name = os.path.splitext(f.name)[0]
+                    styles[style_name] = (f.path, f.stat().st_mtime_ns)
+        return styles
+
+    def _watch_loop(self):
+        while not self._stop_event.wait(self.scan_interval):
+            started = time.perf_counter()
+            try:
+                self.rescan()
+            except Exception as e:
+                logger.warning(
+                    f"Speaker scan failed: {e}", extra={"event": "SPEAKER_SCAN_FAIL"}
+                )
+            elapsed = time.perf_counter() - started
+            if elapsed > self.scan_interval:
+                logger.warning(
+                    f"Speaker scan took {elapsed:.2f}s (> interval).",
+                    extra={"event": "SPEAKER_SCAN_SLOW"},
+                )
@@ -0,0 +1,140 @@
+import os
+import queue
+import logging
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import BinaryIO, Deque, Optional, Tuple
+
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger("SPILL-BUFFER")
+
+_BYTES_TYPES = (bytes, bytearray, memoryview)
+
+
+class StreamOverflowError(RuntimeError):
+    """Tüketici, disk taşma sınırını da dolduracak kadar geride kaldı."""
+
+    abort_reason = "consumer_lag"
+
+
+class SpillBuffer:
+    """
+    Görevi: Sentez thread'i (üretici) ile ağ yazıcısı (tüketici) arasında sıralı ve
+    bloklamayan bir kuyruk olmak.
+
+    put() hiçbir zaman tüketiciyi beklemez: üretim model kilidi altında bittiği anda kilit
+    bırakılır, yavaş istemci kendi hızında boşaltır. Öğelerin son elemanı bayt ise bellek
+    sınırı aşıldığında diske (silinmiş geçici dosya) yazılır; sıra korunur. Disk sınırı da
+    aşılırsa put() StreamOverflowError fırlatır ve akış kesilir.
+
+    get() queue.Queue.get ile aynı imzadadır (zaman aşımında queue.Empty). Her öğenin
+    kuyrukta beklediği süre tüketici gecikmesi (consumer lag) metriği olarak işlenir.
+    """
+
+    def __init__(
+        self,
+        front_door: str = "http",
+        memory_limit: Optional[int] = None,
+        disk_limit: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+    ):
+        self.front_door = front_door
+        self.memory_limit = (
+            settings.STREAM_BUFFER_MEMORY_KB * 1024
+            if memory_limit is None
+            else memory_limit
+        )
+        self.disk_limit = (
+            settings.STREAM_SPILL_MAX_MB * 1024 * 1024
+            if disk_limit is None
+            else disk_limit
+        )
+        self.spill_dir = spill_dir or settings.STREAM_SPILL_DIR or None
+        # (kuyruğa girdiği an, öğe ya da bayt hariç başlık, disk ofseti, uzunluk)
+        self._entries: Deque[Tuple[float, tuple, int, int]] = deque()
+        self._cv = threading.Condition()
+        self._memory_bytes = 0
+        self._file: Optional[BinaryIO] = None
+        self._write_offset = 0
+        self._disk_entries = 0
+        self._closed = False
+        self.spilled_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def put(self, item: tuple, block: bool = True, timeout: Optional[float] = None):
+        """Bloklamaz; block/timeout yalnızca queue.Queue ile imza uyumu içindir."""
+        payload = item[-1]
+        is_bytes = isinstance(payload, _BYTES_TYPES)
+        with self._cv:
+            if self._closed:
+                return
+            if is_bytes and self._memory_bytes + len(payload) > self.memory_limit:
+                offset = self._spill(payload)
+                self._entries.append(
+                    (time.perf_counter(), item[:-1], offset, len(payload))
+                )
+            else:
+                if isinstance(payload, memoryview):
+                    # Üretici tamponu yeniden kullanabilir; bellekte kalan kopya bağımsız olmalı.
+                    item = item[:-1] + (payload.tobytes(),)
+                size = len(payload) if is_bytes else 0
+                self._memory_bytes += size
+                self._entries.append((time.perf_counter(), item, -1, size))
+            self._cv.notify()
+
+    def _spill(self, payload) -> int:
+        if self._write_offset + len(payload) > self.disk_limit:
+            raise StreamOverflowError(
+                f"Stream consumer too slow: spill limit of {self.disk_limit} bytes exceeded."
+            )
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix="tts-spill-", dir=self.spill_dir)
+            logger.info(
+                f"Stream consumer lagging; spilling to disk ({self.front_door}).",
+                extra={"event": "STREAM_SPILL_START"},
+            )
+        offset = self._write_offset
+        os.pwrite(self._file.fileno(), payload, offset)
+        self._write_offset += len(payload)
+        self._disk_entries += 1
+        self.spilled_bytes += len(payload)
+        metrics.record_stream_spill(self.front_door, len(payload))
+        return offset
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> tuple:
+        with self._cv:
+            if not self._cv.wait_for(lambda: self._entries, timeout if block else 0):
+                raise queue.Empty
+            enqueued_at, item, offset, size = self._entries.popleft()
+            if offset >= 0:
+                assert self._file is not None  # Diskteki öğe varsa dosya açıktır
+                item = item + (os.pread(self._file.fileno(), size, offset),)
+                self._disk_entries -= 1
+                if self._disk_entries == 0:
+                    # Diskte okunmamış öğe kalmadı: dosya baştan kullanılır.
+                    self._file.truncate(0)
+                    self._write_offset = 0
+            else:
+                self._memory_bytes -= size
+        metrics.record_consumer_lag(self.front_door, time.perf_counter() - enqueued_at)
+        return item
+
+    def close(self):
+        """Tüketici ayrıldı: bekleyen öğeler düşer, sonraki put() çağrıları yok sayılır."""
+        with self._cv:
+            self._closed = True
+            self._entries.clear()
+            self._memory_bytes = 0
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,117 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Server-Timing çıktısındaki sabit aşama sırası (bilinmeyen aşamalar sona eklenir)
+STAGE_ORDER = (
+    "queue_wait",
+    "normalize",
+    "lang_id",
+    "latents",
+    "gpt",
+    "vocoder",
+    "vocoder_concurrent",
+    "resample",
+    "encode",
+    "ttfb",
+)
+
+
+class RequestTimings:
+    """
+    Görevi: Tek bir sentez isteğinin aşama sürelerini (ms) ve metrik label'larını toplamak.
+    Thread'ler arasında parametre olarak taşınır (contextvars thread'e geçmez).
+    timeout (sn) verilirse istek bu süre sonunda geçersizdir (gRPC deadline, HTTP başlığı).
+    """
+
+    def __init__(
+        self,
+        front_door: str = "http",
+        tenant_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.started_at = time.perf_counter()
+        self.deadline: Optional[float] = (
+            self.started_at + timeout if timeout is not None else None
+        )
+        self.finished_at: Optional[float] = None
+        self.front_door = front_door
+        self.tenant_id = tenant_id
+        self.language: Optional[str] = None
+        self.stages: Dict[str, float] = {}
+        self.audio_samples = 0
+        self.sample_rate = 0
+        self.bytes_sent = 0
+
+    @contextmanager
+    def measure(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - t0)
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds * 1000.0
+
+    def mark_first_byte(self):
+        if "ttfb" not in self.stages:
+            self.stages["ttfb"] = self.elapsed() * 1000.0
+
+    def add_audio(self, samples: int, sample_rate: int):
+        self.audio_samples += samples
+        self.sample_rate = sample_rate
+
+    def finish(self):
+        """Toplam süreyi dondurur; sonraki elapsed()/rtf() çağrıları sabit kalır."""
+        if self.finished_at is None:
+            self.finished_at = time.perf_counter()
+
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def time_remaining(self) -> Optional[float]:
+        """Deadline'a kalan süre (sn, geçtiyse negatif); deadline yoksa None."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.perf_counter()
+
+    def audio_seconds(self) -> float:
+        if not self.sample_rate:
+            return 0.0
+        return self.audio_samples / self.sample_rate
+
+    def rtf(self) -> Optional[float]:
+        duration = self.audio_seconds()
+        if duration <= 0:
+            return None
+        return self.elapsed() / duration
+
+    def ordered_stages(self) -> List[Tuple[str, float]]:
+        known = [
+            (name, self.stages[name]) for name in STAGE_ORDER if name in self.stages
+        ]
+        extra = sorted(
+            (name, ms) for name, ms in self.stages.items() if name not in STAGE_ORDER
+        )
+        return known + extra
+
+    def server_timing(self) -> str:
+        """RFC 'Server-Timing' başlık değeri: 'gpt;dur=812.4, vocoder;dur=95.1, total;dur=..'"""
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.ordered_stages()]
+        parts.append(f"total;dur={self.elapsed() * 1000.0:.1f}")
+        return ", ".join(parts)
+
+    def grpc_trailing_metadata(self) -> Tuple[Tuple[str, str], ...]:
+        rtf = self.rtf()
+        return (
+            ("server-timing", self.server_timing()),
+            ("x-vca-rtf", f"{rtf:.4f}" if rtf is not None else "0"),
+            ("x-vca-audio-ms", f"{self.audio_seconds() * 1000.0:.1f}"),
+        )
+
+    def as_dict(self) -> Dict[str, float]:
+        data = {name: round(ms, 3) for name, ms in self.stages.items()}
+        data["total"] = round(self.elapsed() * 1000.0, 3)
+        return data
@@ -0,0 +1,377 @@
+import os
+import math
+import queue
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Callable, ContextManager, List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+from app.core import metrics
+
+logger = logging.getLogger("VOCODER-BATCH")
+
+VOCODER_BACKENDS = ("eager", "compile", "torchscript", "onnx")
+# Derlenmiş çıktı eager'dan bu kadar saparsa backend reddedilir (tanh çıkışı, [-1, 1]).
+PARITY_TOLERANCE = 1e-3
+
+# (latents [1, T, C], speaker_embedding [1, C_g, 1], sonuç)
+_Job = Tuple[torch.Tensor, torch.Tensor, Future]
+
+
+class VocoderBatcher:
+    """
+    Görevi: Eşzamanlı isteklerin HiFi-GAN çağrılarını tek bir dolgulu (padded) batch'te
+    çözmek ve sesi her isteğe geri dağıtmak.
+
+    Tek bir worker thread ilk işi aldıktan sonra `wait_ms` boyunca (en fazla `max_batch`
+    işe kadar) diğer istekleri bekler. `expected_jobs` o an motorda kaç isteğin vocoder'a
+    gelebileceğini söyler; tek istek varken hiç beklenmez. Worker aynı zamanda akış
+    hattının vocoder aşamasıdır: `num_threads` > 0 ise kendi intra-op thread bütçesiyle
+    çalışır (OpenMP thread sayısı çağıran thread'e özgüdür).
+
+    Dolgu son latent çerçevesinin tekrarıdır: doğrusal interpolasyon gerçek bölgede
+    tekli çözümle birebir aynıdır. HiFi-GAN konvolüsyonları nedensel olmadığı için kısa
+    isteklerin yalnızca son ~1000 örneği (~45 ms) dolgudan etkilenir; bu, inference_stream'in
+    zaten geri tuttuğu 1024 örneklik çakışma (overlap) bölgesiyle hemen hemen örtüşür.
+    """
+
+    def __init__(
+        self,
+        decoder: nn.Module,
+        max_batch: int,
+        wait_ms: float,
+        expected_jobs: Optional[Callable[[], int]] = None,
+        num_threads: int = 0,
+    ):
+        self.decoder = decoder
+        self.num_threads = num_threads
+        # Aşama doluluğu (benchmark/diagnostik): worker'ın decode ile geçirdiği toplam süre.
+        self.busy_seconds = 0.0
+        self.max_batch = max(1, max_batch)
+        self.wait_s = max(0.0, wait_ms) / 1000.0
+        self.expected_jobs = expected_jobs or (lambda: self.max_batch)
+        self._jobs: "queue.Queue[_Job]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def decode(self, latents: torch.Tensor, g: torch.Tensor) -> torch.Tensor:
+        """Bloklar; çıktı tekli `decoder(latents, g=g)` çağrısıyla aynı şekildedir."""
+        if self.max_batch == 1 or latents.shape[0] != 1:
+            return self.decoder(latents, g=g)
+        return self.submit(latents, g).result()
+
+    def submit(self, latents: torch.Tensor, g: torch.Tensor) -> Future:
+        self._ensure_worker()
+        future: Future = Future()
+        self._jobs.put((latents, g, future))
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="vocoder-batcher", daemon=True
+                )
+                self._worker.start()
+
+    # --- WORKER ---
+    def _collect(self) -> List[_Job]:
+        batch = [self._jobs.get()]
+        deadline = time.perf_counter() + self.wait_s
+        while len(batch) < self.max_batch:
+            # Motorda bu batch'e katılabilecek başka istek yoksa beklemek saf gecikmedir.
+            if len(batch) >= self.expected_jobs():
+                break
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        if self.num_threads > 0:
+            torch.set_num_threads(self.num_threads)
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                outputs = self._decode_batch(batch)
+            except Exception as e:
+                logger.error(
+                    f"Batched vocoder decode failed ({len(batch)} items): {e}",
+                    extra={"event": "VOCODER_BATCH_FAILED"},
+                )
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+            self.busy_seconds += elapsed
+            for (_, _, future), output in zip(batch, outputs):
+                future.decode_seconds = elapsed
+                future.set_result(output)
+
+    def _decode_batch(self, batch: List[_Job]) -> List[torch.Tensor]:
+        metrics.record_vocoder_batch(len(batch))
+        with torch.inference_mode():
+            if len(batch) == 1:
+                latents, g, _ = batch[0]
+                return [self.decoder(latents, g=g)]
+
+            frames = [latents.shape[1] for latents, _, _ in batch]
+            max_frames = max(frames)
+            padded = torch.cat(
+                [
+                    F.pad(
+                        latents.transpose(1, 2),
+                        (0, max_frames - latents.shape[1]),
+                        mode="replicate",
+                    ).transpose(1, 2)
+                    for latents, _, _ in batch
+                ],
+                dim=0,
+            )
+            speaker = torch.cat([g for _, g, _ in batch], dim=0)
+            wav = self.decoder(padded, g=speaker)
+
+        total = wav.shape[-1]
+        return [
+            wav[i : i + 1, :, : self.output_length(n, max_frames, total)].clone()
+            for i, n in enumerate(frames)
+        ]
+
+    def output_length(
+        self, frames: int, padded_frames: int, padded_samples: int
+    ) -> int:
+        """Tekli çözümde `frames` latent çerçevesinin üreteceği örnek sayısı."""
+        d = self.decoder
+        if not hasattr(d, "ar_mel_length_compression"):
+            return padded_samples * frames // padded_frames
+        # HifiDecoder.forward: iki F.interpolate (floor) + sabit oranlı yukarı örnekleme.
+        n = math.floor(
+            float(frames * (d.ar_mel_length_compression / d.output_hop_length))
+        )
+        n_padded = math.floor(
+            float(padded_frames * (d.ar_mel_length_compression / d.output_hop_length))
+        )
+        if d.output_sample_rate != d.input_sample_rate:
+            ratio = d.output_sample_rate / d.input_sample_rate
+            n = math.floor(float(n * ratio))
+            n_padded = math.floor(float(n_padded * ratio))
+        return n * (padded_samples // n_padded)
+
+
+class BatchedVocoder(nn.Module):
+    """
+    `Xtts.hifigan_decoder` yerine geçen vekil modül. XTTS'in kendi `inference` /
+    `inference_stream` döngüleri değişmeden kalır; yalnızca decoder çağrısı batcher'a
+    yönlendirilir. `release` bağlam yöneticisi çağrı süresince model kilidini bırakır
+    (böylece diğer istekler GPT adımlarını çalıştırıp aynı batch'e katılabilir) ve
+    çağıranın RequestTimings nesnesini (ya da None) döndürür.
+    """
+
+    def __init__(
+        self,
+        batcher: VocoderBatcher,
+        release: Optional[Callable[[], ContextManager]] = None,
+    ):
+        super().__init__()
+        self.inner = batcher.decoder
+        self.batcher = batcher
+        self.release = release or nullcontext
+
+    def __getattr__(self, name):
+        try:
+            return super().__getattr__(name)
+        except AttributeError:
+            return getattr(super().__getattr__("inner"), name)
+
+    def forward(self, latents, g=None):
+        with self.release() as timings:
+            started = time.perf_counter()
+            wav = self.batcher.decode(latents, g)
+            if timings is not None:
+                timings.add("vocoder", time.perf_counter() - started)
+        return wav
+
+
+# --- DERLENMİŞ BACKEND'LER ---
+class OnnxWaveformDecoder(nn.Module):
+    """Dışa aktarılmış HifiganGenerator grafiğini onnxruntime ile çalıştırır."""
+
+    def __init__(self, path: str, device: torch.device):
+        super().__init__()
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "ONNX vocoder backend requires onnxruntime (pip install onnxruntime)."
+            ) from e
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        providers = ["CPUExecutionProvider"]
+        if device.type == "cuda":
+            providers.insert(0, "CUDAExecutionProvider")
+        self.session = ort.InferenceSession(path, options, providers=providers)
+
+    def forward(self, x, g=None):
+        wav = self.session.run(
+            None,
+            {
+                "z": x.detach().cpu().float().numpy(),
+                "g": g.detach().cpu().float().numpy(),
+            },
+        )[0]
+        return torch.from_numpy(wav).to(x.device)
+
+
+class CompiledWaveformDecoder(nn.Module):
+    """
+    HifiDecoder.waveform_decoder yerine geçer. HifiDecoder B=1'de girdiyi [C, T]'ye
+    sıkıştırır; derlenmiş grafikler [B, C, T] bekler. Çalışma anında derlenmiş yol hata
+    verirse eager modüle kalıcı olarak geri düşülür.
+    """
+
+    def __init__(self, compiled: nn.Module, eager: nn.Module, backend: str):
+        super().__init__()
+        self.compiled = compiled
+        self.eager = eager
+        self.backend = backend
+        self.failed = False
+
+    def forward(self, x, g=None):
+        if x.dim() == 2:
+            x = x.unsqueeze(0)
+        if not self.failed:
+            try:
+                return self.compiled(x, g)
+            except Exception as e:
+                self.failed = True
+                logger.error(
+                    f"{self.backend} vocoder failed at runtime, falling back to eager: {e}",
+                    extra={"event": "VOCODER_BACKEND_FALLBACK"},
+                )
+        return self.eager(x, g=g)
+
+
+def _artifact_path(generator: nn.Module, backend: str, cache_dir: str, ext: str) -> str:
+    """Ağırlıklar, torch sürümü ve cihaz değişirse artefakt da değişir."""
+    digest = hashlib.sha256(f"{backend}:{torch.__version__}".encode())
+    for name, tensor in generator.state_dict().items():
+        digest.update(name.encode())
+        digest.update(str(tensor.device.type).encode())
+        digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    return os.path.join(cache_dir, f"hifigan-{backend}-{digest.hexdigest()[:16]}.{ext}")
+
+
+def _build_compile(generator, example, cache_dir):
+    # Inductor'ın ürettiği çekirdekler yeniden başlatmalar arasında diskte kalır.
+    os.environ.setdefault(
+        "TORCHINDUCTOR_CACHE_DIR", os.path.join(cache_dir, "inductor")
+    )
+    return torch.compile(generator, dynamic=True)
+
+
+def _build_torchscript(generator, example, cache_dir):
+    path = _artifact_path(generator, "torchscript", cache_dir, "pt")
+    if os.path.exists(path):
+        return torch.jit.load(path, map_location=example[0].device)
+    with torch.no_grad():
+        traced = torch.jit.trace(generator, example, check_trace=False)
+    tmp = f"{path}.tmp"
+    torch.jit.save(traced, tmp)
+    os.replace(tmp, path)
+    return traced
+
+
+def _build_onnx(generator, example, cache_dir):
+    path = _artifact_path(generator, "onnx", cache_dir, "onnx")
+    if not os.path.exists(path):
+        tmp = f"{path}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                generator,
+                example,
+                tmp,
+                input_names=["z", "g"],
+                output_names=["wav"],
+                dynamic_axes={
+                    "z": {0: "batch", 2: "frames"},
+                    "g": {0: "batch"},
+                    "wav": {0: "batch", 2: "samples"},
+                },
+                opset_version=17,
+            )
+        os.replace(tmp, path)
+    return OnnxWaveformDecoder(path, example[0].device)
+
+
+_BUILDERS = {
+    "compile": _build_compile,
+    "torchscript": _build_torchscript,
+    "onnx": _build_onnx,
+}
+
+
+def install_vocoder_backend(decoder: nn.Module, backend: str, cache_dir: str) -> str:
+    """
+    HifiDecoder'ın konvolüsyon yığınını (waveform_decoder) seçilen backend ile değiştirir.
+    Interpolasyon adımları eager kalır: çıktı boyları latent uzunluğuna bağlıdır ve iz
+    (trace) sırasında sabitlenirdi. Derleme ya da eşitlik kontrolü başarısız olursa eager
+    korunur. Geçerli backend adını döndürür.
+    """
+    generator = getattr(decoder, "waveform_decoder", None)
+    if backend == "eager" or generator is None:
+        return "eager"
+    if backend not in _BUILDERS:
+        logger.warning(
+            f"Unknown vocoder backend '{backend}', using eager.",
+            extra={"event": "VOCODER_BACKEND_FALLBACK"},
+        )
+        return "eager"
+
+    device = next(generator.parameters()).device
+    example = (
+        torch.randn(1, generator.conv_pre.in_channels, 64, device=device),
+        torch.randn(1, generator.cond_layer.in_channels, 1, device=device),
+    )
+    started = time.perf_counter()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        compiled = _BUILDERS[backend](generator, example, cache_dir)
+        with torch.inference_mode():
+            reference = generator(*example)
+            # İki farklı uzunluk: dinamik eksenlerin gerçekten dinamik olduğunu doğrular.
+            output = compiled(*example)
+            longer = (torch.cat([example[0], example[0]], dim=2), example[1])
+            diff = max(
+                float((reference - output).abs().max()),
+                float((generator(*longer) - compiled(*longer)).abs().max()),
+            )
+        if diff > PARITY_TOLERANCE:
+            raise RuntimeError(f"parity check failed (max abs diff {diff:.2e})")
+    except Exception as e:
+        logger.warning(
+            f"Vocoder backend '{backend}' unavailable, falling back to eager: {e}",
+            extra={"event": "VOCODER_BACKEND_FALLBACK"},
+        )
+        return "eager"
+
+    decoder.waveform_decoder = CompiledWaveformDecoder(compiled, generator, backend)
+    logger.info(
+        f"Vocoder backend '{backend}' ready in {time.perf_counter() - started:.1f}s "
+        f"(max abs diff {diff:.2e}).",
+        extra={"event": "VOCODER_BACKEND_READY"},
+    )
+    return backend
@@ -10,22 +10,189 @@ import threading
 from sentiric.tts.v1 import coqui_pb2
 from sentiric.tts.v1 import coqui_pb2_grpc
 
-from app.core.engine import tts_engine
+from app.core.engine import DeadlineExceeded, tts_engine
+from app.core.audio_cache import audio_cache
+from app.core.incremental import IncrementalSynthesisSession
+from app.core.scheduler import QuotaExceeded
 from app.core.config import settings
+from app.core.spill_buffer import SpillBuffer, StreamOverflowError
+from app.core.timing import RequestTimings
+from app.core import metrics
 
 logger = logging.getLogger("GRPC-SERVER")
 
+# Artımlı (LLM token) akış için çift yönlü RPC. Kontrat paketinde henüz tanımı olmadığından
+# mevcut CoquiSynthesizeStream mesajlarıyla aynı servis adı altında elle kaydedilir.
+INCREMENTAL_METHOD = "CoquiSynthesizeIncremental"
+# İstek metni tam olarak bu kontrol karakteri ise (ASCII CAN) barge-in uygulanır.
+BARGE_IN_TEXT = "\x18"
 
-class TtsCoquiServicer(coqui_pb2_grpc.TtsCoquiServiceServicer):
-    async def CoquiSynthesize(self, request, context):
+
+# Kontrat sürümüne göre konuşmacı alanının adı değişebilir; ilk dolu alan kullanılır.
+SPEAKER_FIELDS = ("speaker_id", "voice_id", "speaker")
+
+
+def _requested_speaker(request, metadata: dict) -> str:
+    """
+    Konuşmacıyı mesaj alanından veya 'x-speaker-id' metadata'sından okur ve
+    engine'in konuşmacı indeksinde doğrular. Bilinmeyen ID varsayılana düşer.
+    """
+    fields = request.DESCRIPTOR.fields_by_name
+    speaker_id = next(
+        (
+            getattr(request, f)
+            for f in SPEAKER_FIELDS
+            if f in fields and getattr(request, f)
+        ),
+        None,
+    ) or metadata.get("x-speaker-id")
+    if not speaker_id:
+        return settings.DEFAULT_SPEAKER
+    if tts_engine.speaker_registry.resolve(speaker_id) is None:
         logger.warning(
-            "Deprecated CoquiSynthesize RPC called. Client should migrate to streaming.",
-            extra={"event": "DEPRECATED_RPC_CALL"},
+            f"Unknown speaker '{speaker_id}', falling back to default.",
+            extra={"event": "GRPC_SPEAKER_UNKNOWN"},
         )
-        await context.abort(
-            grpc.StatusCode.UNIMPLEMENTED,
-            "Unary synthesis is deprecated, use streaming for low latency.",
+        return settings.DEFAULT_SPEAKER
+    return speaker_id
+
+
+def _error_status(error: Exception) -> grpc.StatusCode:
+    # ValueError: istemci girdisi (örn. çözülemeyen speaker_wav)
+    # StreamOverflowError: istemci akışı okuyamayacak kadar yavaş (taşma tamponu doldu)
+    # DeadlineExceeded: çağıranın deadline'ı sentezi kapsamıyor (modele girmeden düşürüldü)
+    # QuotaExceeded: tenant'ın karakter/sn kotası tükendi
+    if isinstance(error, (StreamOverflowError, QuotaExceeded)):
+        return grpc.StatusCode.RESOURCE_EXHAUSTED
+    if isinstance(error, DeadlineExceeded):
+        return grpc.StatusCode.DEADLINE_EXCEEDED
+    return (
+        grpc.StatusCode.INVALID_ARGUMENT
+        if isinstance(error, ValueError)
+        else grpc.StatusCode.INTERNAL
+    )
+
+
+def _stream_params(request, metadata: dict) -> dict:
+    """Unary ve stream istek mesajları aynı alan adlarını paylaşır."""
+    return {
+        "text": request.text,
+        "language": request.language_code,
+        "speaker_idx": _requested_speaker(request, metadata),
+        "temperature": request.temperature or 0.75,
+        "speed": request.speed or 1.0,
+        "top_k": int(request.top_k) if request.top_k else 50,
+        "top_p": request.top_p or 0.85,
+        "repetition_penalty": request.repetition_penalty or 2.0,
+        "output_format": "pcm",
+        "speaker_wav": request.speaker_wav if request.speaker_wav else None,
+        "sample_rate": int(request.sample_rate)
+        if request.sample_rate > 0
+        else tts_engine.native_sample_rate,
+    }
+
+
+class TtsCoquiServicer(coqui_pb2_grpc.TtsCoquiServiceServicer):
+    async def CoquiSynthesize(self, request, context):
+        """
+        Kısa, sık tekrarlanan anonslar için: önce ses önbelleği, yoksa tek seferde sentez.
+        Tüm PCM tek yanıtta döner; sınırı aşan istekler akışa yönlendirilir.
+        """
+        metadata = dict(context.invocation_metadata())
+        tenant_id = metadata.get("x-tenant-id")
+        log_extra = {
+            "trace_id": metadata.get("x-trace-id", "unknown"),
+            "span_id": metadata.get("x-span-id"),
+            "tenant_id": tenant_id,
+        }
+        if not tenant_id or tenant_id == "unknown":
+            logger.error(
+                "Tenant ID is missing in gRPC metadata. Request rejected.",
+                extra={**log_extra, "event": "MISSING_TENANT_ID"},
+            )
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                "tenant_id is strictly required for isolation",
+            )
+        if not request.text.strip():
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "text is empty")
+        if len(request.text) > settings.GRPC_UNARY_MAX_CHARS:
+            await context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                f"text exceeds {settings.GRPC_UNARY_MAX_CHARS} chars for unary synthesis, "
+                "use CoquiSynthesizeStream",
+            )
+
+        timings = RequestTimings("grpc", tenant_id, timeout=context.time_remaining())
+        params = _stream_params(request, metadata)
+        key_params = params
+        if params["speaker_wav"]:
+            # Satır içi referans ses: anahtar ses içeriğinin özetiyle ayrışır.
+            key_params = {
+                **params,
+                "speaker_idx": tts_engine.inline_voice_id(params["speaker_wav"]),
+            }
+        key = audio_cache.key(key_params, "pcm")
+        cancel_event = threading.Event()
+        try:
+            audio = audio_cache.get_memory(key)
+            if audio is None:
+                audio = await asyncio.to_thread(audio_cache.get_remote, key)
+            cache_hit = audio is not None
+            if not cache_hit:
+                audio = await asyncio.to_thread(
+                    tts_engine.synthesize,
+                    params,
+                    timings=timings,
+                    is_aborted_cb=cancel_event.is_set,
+                )
+        except asyncio.CancelledError:
+            # İstemci iptali: sentez bir sonraki GPT adımında durur, kilit bırakılır.
+            metrics.record_stream_abort("grpc", "cancelled")
+            cancel_event.set()
+            raise
+        except DeadlineExceeded as e:
+            logger.warning(
+                f"gRPC unary synthesis dropped: {e}",
+                extra={**log_extra, "event": "REQUEST_DEADLINE_EXCEEDED"},
+            )
+            await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, str(e))
+        except QuotaExceeded as e:
+            logger.warning(
+                f"gRPC unary synthesis throttled: {e}",
+                extra={**log_extra, "event": "TENANT_QUOTA_EXCEEDED"},
+            )
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+        except Exception as e:
+            metrics.record_stream_abort("grpc", "error")
+            logger.error(
+                f"gRPC unary synthesis failed: {e}",
+                exc_info=True,
+                extra={**log_extra, "event": "GRPC_UNARY_ERROR"},
+            )
+            await context.abort(_error_status(e), str(e))
+
+        if not cache_hit:
+            # Sınırı aşan ses de saklanır: tekrar eden istek yeniden sentezlenmeden
+            # önbellekten reddedilir.
+            await asyncio.to_thread(audio_cache.put, key, audio)
+        if len(audio) > settings.GRPC_UNARY_MAX_AUDIO_BYTES:
+            await context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                f"audio exceeds {settings.GRPC_UNARY_MAX_AUDIO_BYTES} bytes for unary "
+                "synthesis, use CoquiSynthesizeStream",
+            )
+        if not cache_hit:
+            timings.mark_first_byte()
+            timings.bytes_sent = len(audio)
+            metrics.report_request(timings)
+            context.set_trailing_metadata(timings.grpc_trailing_metadata())
+
+        logger.info(
+            f"gRPC unary synthesis served ({'cache' if cache_hit else 'engine'}, {len(audio)} bytes).",
+            extra={**log_extra, "event": "GRPC_UNARY_COMPLETE"},
         )
+        return coqui_pb2.CoquiSynthesizeResponse(audio_content=audio)
 
     async def CoquiSynthesizeStream(self, request, context):
         metadata = dict(context.invocation_metadata())
@@ -51,38 +218,20 @@ class TtsCoquiServicer(coqui_pb2_grpc.TtsCoquiServiceServicer):
         )
 
         abort_event = threading.Event()
+        timings = RequestTimings("grpc", tenant_id, timeout=context.time_remaining())
+        # [ARCH-COMPLIANCE FIX] Asenkron I/O ve Senkron CUDA arasındaki köprü.
+        # Üretici hiç beklemez: yavaş istemci model kilidini tutmaz, fazlası diske taşar.
+        q = SpillBuffer("grpc")
 
         try:
-            params = {
-                "text": request.text,
-                "language": request.language_code,
-                "speaker_idx": settings.DEFAULT_SPEAKER,
-                "temperature": request.temperature or 0.75,
-                "speed": request.speed or 1.0,
-                "top_k": int(request.top_k) if request.top_k else 50,
-                "top_p": request.top_p or 0.85,
-                "repetition_penalty": request.repetition_penalty or 2.0,
-                "output_format": "pcm",
-                "speaker_wav": request.speaker_wav if request.speaker_wav else None,
-                "sample_rate": int(request.sample_rate)
-                if request.sample_rate > 0
-                else tts_engine.native_sample_rate,
-            }
-
-            # [ARCH-COMPLIANCE FIX] Asenkron I/O ve Senkron CUDA arasındaki köprü
-            q = queue.Queue(maxsize=5)
+            params = _stream_params(request, metadata)
 
             def producer():
                 try:
                     for chunk in tts_engine.synthesize_stream(
-                        params, is_aborted_cb=abort_event.is_set
+                        params, is_aborted_cb=abort_event.is_set, timings=timings
                     ):
-                        while not abort_event.is_set():
-                            try:
-                                q.put(("chunk", chunk), timeout=0.1)
-                                break
-                            except queue.Full:
-                                continue
+                        q.put(("chunk", chunk))
                     if not abort_event.is_set():
                         q.put(("done", None))
                 except Exception as ex:
@@ -98,6 +247,7 @@ class TtsCoquiServicer(coqui_pb2_grpc.TtsCoquiServiceServicer):
                         "gRPC Client disconnected during stream (Barge-in/Interrupt).",
                         extra={**log_extra, "event": "GRPC_CLIENT_DISCONNECT"},
                     )
+                    metrics.record_stream_abort("grpc", "client_disconnect")
                     abort_event.set()
                     break
 
@@ -111,11 +261,14 @@ class TtsCoquiServicer(coqui_pb2_grpc.TtsCoquiServiceServicer):
                 elif msg_type == "done":
                     break
                 else:
+                    timings.mark_first_byte()
+                    timings.bytes_sent += len(payload)
                     yield coqui_pb2.CoquiSynthesizeStreamResponse(
                         audio_chunk=payload, is_final=False
                     )
 
             if not context.cancelled():
+                context.set_trailing_metadata(timings.grpc_trailing_metadata())
                 yield coqui_pb2.CoquiSynthesizeStreamResponse(is_final=True)
                 logger.info(
                     "gRPC Stream finished successfully.",
@@ -127,16 +280,141 @@ class TtsCoquiServicer(coqui_pb2_grpc.TtsCoquiServiceServicer):
                 "gRPC Stream cancelled by client context.",
                 extra={**log_extra, "event": "GRPC_STREAM_CANCELLED"},
             )
+            metrics.record_stream_abort("grpc", "cancelled")
             abort_event.set()
             raise
         except Exception as e:
+            metrics.record_stream_abort("grpc", getattr(e, "abort_reason", "error"))
             abort_event.set()
             logger.error(
                 f"gRPC Stream Error: {e}",
                 exc_info=True,
                 extra={**log_extra, "event": "GRPC_STREAM_ERROR"},
             )
-            await context.abort(grpc.StatusCode.INTERNAL, str(e))
+            await context.abort(_error_status(e), str(e))
+        finally:
+            q.close()
+            metrics.report_request(timings)
+
+    async def CoquiSynthesizeIncremental(self, request_iterator, context):
+        """
+        Çift yönlü akış: her istek bir metin parçası taşır, ilk isteğin parametreleri
+        oturum boyunca geçerlidir. İstemci akışı kapatınca (half-close) kalan metin
+        seslendirilir. Barge-in: BARGE_IN_TEXT göndermek kuyruğu boşaltır, çağrıyı
+        iptal etmek ise oturumu tamamen sonlandırır.
+        """
+        metadata = dict(context.invocation_metadata())
+        tenant_id = metadata.get("x-tenant-id")
+        log_extra = {
+            "trace_id": metadata.get("x-trace-id", "unknown"),
+            "span_id": metadata.get("x-span-id"),
+            "tenant_id": tenant_id,
+        }
+        if not tenant_id or tenant_id == "unknown":
+            logger.error(
+                "Tenant ID is missing in gRPC metadata. Request rejected.",
+                extra={**log_extra, "event": "MISSING_TENANT_ID"},
+            )
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                "tenant_id is strictly required for isolation",
+            )
+
+        requests = request_iterator.__aiter__()
+        try:
+            first = await requests.__anext__()
+        except StopAsyncIteration:
+            return
+
+        session = IncrementalSynthesisSession(
+            {**_stream_params(first, metadata), "text": ""}, "grpc", tenant_id
+        ).start()
+        logger.info(
+            f"gRPC incremental session started | Lang: {first.language_code}",
+            extra={**log_extra, "event": "GRPC_INCREMENTAL_START"},
+        )
+
+        async def pump_requests():
+            request = first
+            while True:
+                if request.text == BARGE_IN_TEXT:
+                    session.clear()
+                elif request.text:
+                    session.feed(request.text)
+                try:
+                    request = await requests.__anext__()
+                except StopAsyncIteration:
+                    session.finish()
+                    return
+
+        reader = asyncio.create_task(pump_requests())
+        try:
+            while True:
+                if context.cancelled():
+                    logger.warning(
+                        "gRPC Client disconnected during incremental stream (Barge-in/Interrupt).",
+                        extra={**log_extra, "event": "GRPC_CLIENT_DISCONNECT"},
+                    )
+                    metrics.record_stream_abort("grpc", "client_disconnect")
+                    break
+                if reader.done() and reader.exception() is not None:
+                    raise reader.exception()
+
+                try:
+                    generation, msg_type, payload = await asyncio.to_thread(
+                        session.output.get, True, 0.1
+                    )
+                except queue.Empty:
+                    continue
+                if generation != session.generation:
+                    continue
+
+                if msg_type == "error":
+                    raise payload
+                elif msg_type == "done":
+                    yield coqui_pb2.CoquiSynthesizeStreamResponse(is_final=True)
+                    logger.info(
+                        "gRPC incremental stream finished successfully.",
+                        extra={**log_extra, "event": "GRPC_INCREMENTAL_COMPLETE"},
+                    )
+                    break
+                elif msg_type == "audio":
+                    yield coqui_pb2.CoquiSynthesizeStreamResponse(
+                        audio_chunk=payload, is_final=False
+                    )
+
+        except asyncio.CancelledError:
+            logger.warning(
+                "gRPC incremental stream cancelled by client context.",
+                extra={**log_extra, "event": "GRPC_STREAM_CANCELLED"},
+            )
+            metrics.record_stream_abort("grpc", "cancelled")
+            raise
+        except Exception as e:
+            metrics.record_stream_abort("grpc", getattr(e, "abort_reason", "error"))
+            logger.error(
+                f"gRPC incremental stream error: {e}",
+                exc_info=True,
+                extra={**log_extra, "event": "GRPC_STREAM_ERROR"},
+            )
+            await context.abort(_error_status(e), str(e))
+        finally:
+            session.abort()
+            reader.cancel()
+
+
+def _incremental_handler(servicer: TtsCoquiServicer):
+    service_name = coqui_pb2.DESCRIPTOR.services_by_name["TtsCoquiService"].full_name
+    return grpc.method_handlers_generic_handler(
+        service_name,
+        {
+            INCREMENTAL_METHOD: grpc.stream_stream_rpc_method_handler(
+                servicer.CoquiSynthesizeIncremental,
+                request_deserializer=coqui_pb2.CoquiSynthesizeStreamRequest.FromString,
+                response_serializer=coqui_pb2.CoquiSynthesizeStreamResponse.SerializeToString,
+            )
+        },
+    )
 
 
 def load_tls_credentials():
@@ -163,7 +441,9 @@ def load_tls_credentials():
 
 async def serve_grpc():
     server = grpc.aio.server(futures.ThreadPoolExecutor(max_workers=4))
-    coqui_pb2_grpc.add_TtsCoquiServiceServicer_to_server(TtsCoquiServicer(), server)
+    servicer = TtsCoquiServicer()
+    coqui_pb2_grpc.add_TtsCoquiServiceServicer_to_server(servicer, server)
+    server.add_generic_rpc_handlers((_incremental_handler(servicer),))
     listen_addr = f"[::]:{settings.GRPC_PORT}"
 
     use_tls = all(
@@ -12,6 +12,10 @@ from prometheus_client import start_http_server
 from app.core.config import settings
 from app.core.logging_utils import setup_logging
 from app.core.engine import tts_engine
+from app.core.audio_cache import audio_cache
+from app.core.prewarm import prewarm_from_file
+from app.core.jobs import job_manager
+from app.core.history import history_store
 from app.api.endpoints import router as api_router
 from app.core.middleware import RequestContextMiddleware
 from app.grpc_server import serve_grpc
@@ -74,12 +78,32 @@ async def lifespan(app: FastAPI):
         )
         raise e
 
+    await asyncio.to_thread(audio_cache.load)
+    # Yarım kalan uzun metin işleri kaldığı parçadan devam eder.
+    await asyncio.to_thread(job_manager.start)
+    await asyncio.to_thread(history_store.start)
+
+    prewarm_task = None
+    if settings.PREWARM_CATALOG:
+        # Arka planda: servis hemen trafik alır, katalog sırayla önbelleğe işlenir.
+        prewarm_task = asyncio.create_task(
+            asyncio.to_thread(
+                prewarm_from_file,
+                settings.PREWARM_CATALOG,
+                workers=settings.PREWARM_WORKERS,
+            )
+        )
+
     grpc_task = asyncio.create_task(serve_grpc())
 
     yield
 
     logger.info("Shutting down...", extra={"event": "SERVICE_SHUTDOWN"})
     grpc_task.cancel()
+    if prewarm_task:
+        prewarm_task.cancel()
+    job_manager.stop()
+    history_store.stop()
     logger.info("Service fully stopped.", extra={"event": "SERVICE_STOPPED"})
 
 
@@ -100,7 +124,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-VCA-Chars", "X-VCA-Time", "X-VCA-RTF", "X-Trace-ID"],
+    expose_headers=[
+        "X-VCA-Chars",
+        "X-VCA-Time",
+        "X-VCA-RTF",
+        "X-Trace-ID",
+        "X-Scene-Id",
+        "X-Scene-Blocks",
+        "X-Content-Id",
+        "Content-Location",
+        "ETag",
+        "Content-Range",
+        "X-Next-Cursor",
+        "Server-Timing",
+    ],
 )
 
 app.include_router(api_router)
@@ -118,5 +155,6 @@ async def health_check(response: Response):
         "version": settings.APP_VERSION,
         "device": settings.DEVICE,
         "loaded_model": settings.MODEL_NAME,
+        "vocoder_backend": tts_engine.vocoder_backend,
         "mode": "standalone" if settings.API_KEY else "cluster",
     }
@@ -48,6 +48,12 @@ class API {
         return response.ok;
     }
 
+    static async getHistoryAudio(filename) {
+        const response = await fetch(`/api/history/audio/${filename}`, { headers: getHeaders() });
+        if (!response.ok) return null;
+        return URL.createObjectURL(await response.blob());
+    }
+
     static async deleteAllHistory() {
         const response = await fetch('/api/history/all', { method: 'DELETE', headers: getHeaders() });
         return await response.json();
@@ -74,6 +80,30 @@ class API {
         return response;
     }
 
+    static async renderScene(scene, signal) {
+        const response = await fetch('/api/scene', {
+            method: 'POST',
+            headers: getHeaders(),
+            body: JSON.stringify(scene),
+            signal: signal
+        });
+        if (!response.ok) {
+            let detail = response.statusText;
+            try {
+                const errorData = await response.json();
+                detail = errorData.error || errorData.detail || detail;
+            } catch (e) {}
+            throw new Error(typeof detail === 'string' ? detail : "Scene rendering failed");
+        }
+        return response;
+    }
+
+    static async getSceneTimeline(sceneId) {
+        const response = await fetch(`/api/scene/${sceneId}`, { headers: getHeaders() });
+        if (!response.ok) return null;
+        return await response.json();
+    }
+
     static async generateClone(formData, signal) {
         const response = await fetch('/api/tts/clone', {
             method: 'POST',
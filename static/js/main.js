@@ -81,9 +81,11 @@ const Controllers = {
         } catch (e) { UI.showToast("Delete failed", "error"); }
     },
 
-    playHistory(filename) {
+    async playHistory(filename) {
         if (State.isPlaying) this.stopPlayback(true);
-        const url = `/api/history/audio/${filename}`;
+        // <audio src> tenant başlığını gönderemez: ses başlıklarla alınıp blob olarak çalınır.
+        const url = await API.getHistoryAudio(filename);
+        if (!url) return UI.showToast("Audio is no longer available", "error");
         const player = document.getElementById('classicPlayer');
         if (player) {
             player.src = url;
@@ -5,7 +5,7 @@
 
 const Studio = {
     blocks: [],
-    generatedBlobs: {}, // Mix işlemi için sesleri tutar
+    sceneBlob: null, // Sunucuda miks edilmiş sahne (WAV)
     sortable: null,
 
     init() {
@@ -156,7 +156,7 @@ const Studio = {
             setTimeout(() => el.remove(), 200);
         }
         this.blocks = this.blocks.filter(b => b.id !== id);
-        delete this.generatedBlobs[id];
+        this.sceneBlob = null;
     },
 
     updateBlock(id, key, value) {
@@ -182,7 +182,7 @@ const Studio = {
                 <p class="text-gray-500 text-xs mt-2 max-w-xs font-mono">Write script on left or add manually.</p>
             </div>`;
         this.blocks = [];
-        this.generatedBlobs = {};
+        this.sceneBlob = null;
     },
 
     // --- DYNAMIC DROPDOWNS ---
@@ -247,7 +247,7 @@ const Studio = {
         domBlocks.forEach(el => {
             const id = el.id.replace('block-', '');
             const blockData = this.blocks.find(b => b.id === id);
-            if(blockData) orderedBlocks.push(blockData);
+            if(blockData && blockData.text.trim() && blockData.speaker) orderedBlocks.push(blockData);
         });
 
         if(orderedBlocks.length === 0) return UI.showToast("Timeline empty!", "error");
@@ -259,47 +259,39 @@ const Studio = {
         btn.innerHTML = `<span class="animate-spin">↻</span> RENDERING...`;
         btn.disabled = true;
         dlBtn.disabled = true;
-        this.generatedBlobs = {}; // Önceki renderları temizle
+        this.sceneBlob = null; // Önceki renderı temizle
+        orderedBlocks.forEach(b => document.getElementById(`block-${b.id}`).classList.add('border-blue-500', 'shadow-lg'));
 
         try {
-            const audioQueue = [];
-            
-            for(let i=0; i<orderedBlocks.length; i++) {
-                const block = orderedBlocks[i];
-                if(!block.text.trim() || !block.speaker) continue;
-
-                // UI Highlight
-                const el = document.getElementById(`block-${block.id}`);
-                el.classList.add('border-blue-500', 'shadow-lg');
-
-                // Prepare Params
-                let finalSpeakerID = block.speaker;
-                if(block.style && block.style !== 'default') {
-                    finalSpeakerID = `${block.speaker}/${block.style}`;
-                }
-
-                const params = {
-                    text: block.text,
-                    language: document.getElementById('global-lang').value || 'en',
-                    speaker_idx: finalSpeakerID,
-                    temperature: 0.75,
-                    speed: parseFloat(block.speed) || 1.0,
-                    stream: false
-                };
-
-                const response = await API.generateTTS(params);
-                if(!response.ok) throw new Error("API Error");
-                
-                const blob = await response.blob();
-                this.generatedBlobs[block.id] = blob; // Mix için sakla
-                audioQueue.push({blob: blob, elementId: `block-${block.id}`});
-
+            // Tek istek: sunucu blokları sentezler ve tek WAV olarak miks eder.
+            const response = await API.renderScene({
+                language: document.getElementById('global-lang').value || 'en',
+                temperature: 0.75,
+                output_format: 'wav',
+                blocks: orderedBlocks.map(b => ({
+                    id: b.id,
+                    text: b.text,
+                    speaker: b.speaker,
+                    style: b.style,
+                    speed: parseFloat(b.speed) || 1.0
+                }))
+            });
+            const sceneId = response.headers.get('X-Scene-Id');
+            this.sceneBlob = this.finalizeWav(await response.arrayBuffer());
+
+            const timeline = await API.getSceneTimeline(sceneId);
+            const entries = timeline ? timeline.blocks : [];
+            entries.forEach(entry => {
+                const el = document.getElementById(`block-${entry.id}`);
+                if(!el) return;
                 el.classList.remove('border-blue-500', 'shadow-lg');
-                el.classList.add('border-green-500/50');
-            }
+                el.classList.add(entry.status === 'ok' ? 'border-green-500/50' : 'border-red-500/50');
+            });
+            const failed = entries.filter(e => e.status !== 'ok').length;
+            if(failed) UI.showToast(`${failed} block(s) failed and were skipped.`, "error");
 
             btn.innerHTML = `▶ PLAYING SCENE...`;
-            await this.playQueue(audioQueue);
+            await this.playScene(this.sceneBlob, entries);
             
             // Enable Download
             dlBtn.disabled = false;
@@ -309,31 +301,48 @@ const Studio = {
             console.error(e);
             UI.showToast("Rendering failed: " + e.message, "error");
         } finally {
+            orderedBlocks.forEach(b => {
+                const el = document.getElementById(`block-${b.id}`);
+                if(el) el.classList.remove('border-blue-500', 'shadow-lg');
+            });
             btn.innerHTML = originalText;
             btn.disabled = false;
         }
     },
 
-    async playQueue(queue) {
-        // Init Audio Context (User gesture gerektirir, butona basıldığı için sorun yok)
-        if (window.initAudioContext) window.initAudioContext();
-
-        for(const item of queue) {
-            const el = document.getElementById(item.elementId);
-            if(el) el.classList.add('playing'); // Görsel efekt
-
-            await new Promise((resolve) => {
-                const url = URL.createObjectURL(item.blob);
-                const audio = new Audio(url);
-                audio.onended = resolve;
-                audio.play().catch(e => {
-                    console.error("Playback error", e);
-                    resolve(); // Hata olsa da devam et
-                });
-            });
+    // Akış halinde gelen WAV'ın boyut alanları bilinmiyordu: gerçek uzunlukla düzelt.
+    finalizeWav(arrayBuffer) {
+        const view = new DataView(arrayBuffer);
+        view.setUint32(4, arrayBuffer.byteLength - 8, true);
+        view.setUint32(40, arrayBuffer.byteLength - 44, true);
+        return new Blob([arrayBuffer], { type: 'audio/wav' });
+    },
 
-            if(el) el.classList.remove('playing');
-        }
+    async playScene(blob, entries) {
+        // Sunucunun döndürdüğü blok ofsetleriyle çalan satırı vurgula.
+        const url = URL.createObjectURL(blob);
+        const audio = new Audio(url);
+        let current = null;
+
+        audio.ontimeupdate = () => {
+            const ms = audio.currentTime * 1000;
+            const entry = entries.find(e => e.status === 'ok' && ms >= e.offset_ms && ms < e.offset_ms + e.duration_ms);
+            const id = entry ? entry.id : null;
+            if(id === current) return;
+            if(current) document.getElementById(`block-${current}`)?.classList.remove('playing');
+            if(id) document.getElementById(`block-${id}`)?.classList.add('playing');
+            current = id;
+        };
+
+        await new Promise((resolve) => {
+            audio.onended = resolve;
+            audio.play().catch(e => {
+                console.error("Playback error", e);
+                resolve();
+            });
+        });
+        if(current) document.getElementById(`block-${current}`)?.classList.remove('playing');
+        URL.revokeObjectURL(url);
     },
 
     async playSingle(id) {
@@ -379,118 +388,18 @@ const Studio = {
         }
     },
 
-    // --- MIXING ENGINE (Browser-Based) ---
+    // --- MIX DOWNLOAD (Server-Side) ---
 
-    async downloadMix() {
-        // DOM sırasına göre blob'ları topla
-        const domBlocks = document.querySelectorAll('.studio-block');
-        const blobsToMix = [];
-        
-        domBlocks.forEach(el => {
-            const id = el.id.replace('block-', '');
-            if(this.generatedBlobs[id]) {
-                blobsToMix.push(this.generatedBlobs[id]);
-            }
-        });
+    downloadMix() {
+        if (!this.sceneBlob) return UI.showToast("No audio to mix. Render first.", "error");
 
-        if (blobsToMix.length === 0) return UI.showToast("No audio to mix. Render first.", "error");
-
-        UI.showToast("Mixing audio...", "info");
-        
-        try {
-            const audioContext = new (window.AudioContext || window.webkitAudioContext)();
-            const audioBuffers = [];
-
-            // 1. Blob'ları decode et
-            for (const blob of blobsToMix) {
-                const arrayBuffer = await blob.arrayBuffer();
-                const audioBuffer = await audioContext.decodeAudioData(arrayBuffer);
-                audioBuffers.push(audioBuffer);
-            }
-
-            // 2. Toplam uzunluğu hesapla
-            const totalLength = audioBuffers.reduce((acc, buf) => acc + buf.length, 0);
-            
-            // 3. Çıktı buffer'ı oluştur (Mono)
-            const outputBuffer = audioContext.createBuffer(
-                1, 
-                totalLength,
-                audioBuffers[0].sampleRate
-            );
-            
-            // 4. Birleştir (Merge)
-            const channelData = outputBuffer.getChannelData(0);
-            let offset = 0;
-            for (const buf of audioBuffers) {
-                // Eğer buffer stereo ise sadece ilk kanalı al (mixdown), mono ise direkt al
-                const inputData = buf.getChannelData(0);
-                channelData.set(inputData, offset);
-                offset += buf.length;
-            }
-
-            // 5. WAV olarak encode et
-            const wavBytes = this.bufferToWav(outputBuffer, totalLength);
-            const wavBlob = new Blob([wavBytes], { type: 'audio/wav' });
-
-            // 6. İndir
-            const url = URL.createObjectURL(wavBlob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = `sentiric_director_mix_${Date.now()}.wav`;
-            a.click();
-            
-            UI.showToast("Download started!", "success");
-
-        } catch(e) {
-            console.error(e);
-            UI.showToast("Mixing failed. Browser mismatch?", "error");
-        }
-    },
-
-    // WAV Encoder Helper (PCM 16-bit)
-    bufferToWav(abuffer, len) {
-        const numOfChan = abuffer.numberOfChannels;
-        const length = len * numOfChan * 2 + 44;
-        const buffer = new ArrayBuffer(length);
-        const view = new DataView(buffer);
-        const channels = [];
-        let i;
-        let sample;
-        let offset = 0;
-        let pos = 0;
-
-        // Header yazma
-        function setUint16(data) { view.setUint16(pos, data, true); pos += 2; }
-        function setUint32(data) { view.setUint32(pos, data, true); pos += 4; }
-
-        setUint32(0x46464952); // "RIFF"
-        setUint32(length - 8); // file length - 8
-        setUint32(0x45564157); // "WAVE"
-        setUint32(0x20746d66); // "fmt " chunk
-        setUint32(16); // length = 16
-        setUint16(1); // PCM (uncompressed)
-        setUint16(numOfChan);
-        setUint32(abuffer.sampleRate);
-        setUint32(abuffer.sampleRate * 2 * numOfChan); // avg. bytes/sec
-        setUint16(numOfChan * 2); // block-align
-        setUint16(16); // 16-bit
-        setUint32(0x61746164); // "data" - chunk
-        setUint32(length - pos - 4); // chunk length
-
-        for(i = 0; i < abuffer.numberOfChannels; i++) channels.push(abuffer.getChannelData(i));
-
-        while(pos < length) {
-            for(i = 0; i < numOfChan; i++) {
-                // Sıkıştırma/Clipping
-                sample = Math.max(-1, Math.min(1, channels[i][offset])); 
-                // 16-bit dönüşümü
-                sample = (0.5 + sample < 0 ? sample * 32768 : sample * 32767) | 0; 
-                view.setInt16(pos, sample, true); 
-                pos += 2;
-            }
-            offset++;
-        }
+        const url = URL.createObjectURL(this.sceneBlob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = `sentiric_director_mix_${Date.now()}.wav`;
+        a.click();
+        setTimeout(() => URL.revokeObjectURL(url), 1000);
 
-        return buffer;
+        UI.showToast("Download started!", "success");
     }
 };
\ No newline at end of file
@@ -0,0 +1,439 @@
+"""
+Açık döngü (open-loop) yük üreteci.
+
+İstekler, yanıtlar beklenmeden hedef Poisson geliş hızında gönderilir; böylece kuyruk
+birikmesi kuyruk gecikmesine (tail latency) yansır. Gecikmeler isteğin PLANLANAN
+gönderim anından ölçülür (coordinated omission düzeltmesi).
+
+Senaryolar:
+    tts         -> POST /api/tts (stream=false)
+    tts_stream  -> POST /api/tts (stream=true, pcm)
+    openai      -> POST /v1/audio/speech
+    grpc        -> CoquiSynthesizeStream
+
+Kullanım:
+    python3 tests/stub_server.py &                        # stub modelli yerel sunucu
+    python3 tests/load_generator.py --rate 4 --duration 60
+    python3 tests/load_generator.py --mix tts=1,tts_stream=1 --rate 10 --duration 30
+"""
+
+import os
+import csv
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from datetime import datetime
+
+import httpx
+from rich.console import Console
+from rich.table import Table
+
+OUTPUT_DIR = "/tmp/sentiric-tts-tests"
+SCENARIOS = ("tts", "tts_stream", "openai", "grpc")
+RESULT_FIELDS = (
+    "scenario",
+    "language",
+    "length",
+    "offset_s",
+    "send_lag_ms",
+    "status",
+    "ttfb_ms",
+    "latency_ms",
+    "audio_s",
+    "rtf",
+    "bytes",
+)
+STREAM_SAMPLE_RATE = 24000
+GRPC_SAMPLE_RATE = 16000
+
+# Gerçekçi karışım: Türkçe ağırlıklı trafik, çoğunlukla kısa IVR cümleleri.
+LANGUAGE_MIX = {"tr": 0.6, "en": 0.3, "de": 0.1}
+LENGTH_MIX = {"short": 0.5, "medium": 0.35, "long": 0.15}
+TEXTS = {
+    "tr": {
+        "short": ["Lütfen bekleyiniz.", "Sizi temsilciye aktarıyorum.", "Teşekkür ederiz."],
+        "medium": [
+            "Başvurunuz alınmıştır, sonuç en geç iki iş günü içinde size bildirilecektir.",
+            "Hesabınızla ilgili işlem yapmak için lütfen kimlik numaranızı tuşlayınız.",
+        ],
+        "long": [
+            "Değerli müşterimiz, aradığınız için teşekkür ederiz. Görüşmeniz kalite standartları "
+            "gereği kayıt altına alınmaktadır. Fatura işlemleri için bire, teknik destek için "
+            "ikiye, diğer tüm işlemler için lütfen sıfıra basınız."
+        ],
+    },
+    "en": {
+        "short": ["Please hold.", "Thank you for calling.", "One moment please."],
+        "medium": [
+            "Your request has been received and will be processed within two business days.",
+            "To continue, please enter the last four digits of your account number.",
+        ],
+        "long": [
+            "Thank you for calling. This call may be recorded for quality purposes. For billing, "
+            "press one. For technical support, press two. For all other inquiries, please stay "
+            "on the line and the next available agent will assist you."
+        ],
+    },
+    "de": {
+        "short": ["Bitte warten.", "Vielen Dank."],
+        "medium": ["Ihre Anfrage wurde empfangen und wird innerhalb von zwei Werktagen bearbeitet."],
+        "long": [
+            "Vielen Dank für Ihren Anruf. Dieses Gespräch kann zu Qualitätszwecken aufgezeichnet "
+            "werden. Für Rechnungsfragen drücken Sie bitte die Eins, für technische Unterstützung "
+            "die Zwei."
+        ],
+    },
+}
+
+console = Console()
+
+
+def parse_mix(value):
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        weights[name] = float(weight or 1.0)
+    return weights
+
+
+def weighted_choice(rng, weights):
+    names = list(weights)
+    return rng.choices(names, weights=[weights[n] for n in names], k=1)[0]
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "mean": round(statistics.mean(ordered), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def build_schedule(rng, rate, duration, mix):
+    """Poisson süreci: ardışık gelişler arası süre üstel dağılımlıdır."""
+    schedule, t = [], 0.0
+    while True:
+        t += rng.expovariate(rate)
+        if t >= duration:
+            return schedule
+        language = weighted_choice(rng, LANGUAGE_MIX)
+        length = weighted_choice(rng, LENGTH_MIX)
+        schedule.append(
+            {
+                "offset": t,
+                "scenario": weighted_choice(rng, mix),
+                "language": language,
+                "length": length,
+                "text": rng.choice(TEXTS[language][length]),
+            }
+        )
+
+
+def new_result(item):
+    result = dict.fromkeys(RESULT_FIELDS)
+    result.update(
+        scenario=item["scenario"],
+        language=item["language"],
+        length=item["length"],
+        offset_s=round(item["offset"], 4),
+        status="ok",
+        bytes=0,
+    )
+    return result
+
+
+def _finish(result, scheduled_at, first_at, audio_s, header_rtf=None):
+    finished = time.perf_counter()
+    result["latency_ms"] = round((finished - scheduled_at) * 1000.0, 3)
+    if first_at is not None:
+        result["ttfb_ms"] = round((first_at - scheduled_at) * 1000.0, 3)
+    if audio_s:
+        result["audio_s"] = round(audio_s, 4)
+        result["rtf"] = round((finished - scheduled_at) / audio_s, 4)
+    elif header_rtf:
+        result["rtf"] = float(header_rtf)
+    if result["bytes"] == 0:
+        result["status"] = "empty_audio"
+
+
+# --- HTTP ---
+def http_request(item, speaker, tenant_id):
+    headers = {"x-tenant-id": tenant_id, "x-trace-id": f"loadgen-{item['offset']:.4f}"}
+    if item["scenario"] == "openai":
+        return "/v1/audio/speech", {"input": item["text"], "voice": "alloy"}, headers
+    payload = {
+        "text": item["text"],
+        "language": item["language"],
+        "speaker_idx": speaker,
+        "stream": item["scenario"] == "tts_stream",
+    }
+    if payload["stream"]:
+        payload.update({"output_format": "pcm", "sample_rate": STREAM_SAMPLE_RATE})
+    return "/api/tts", payload, headers
+
+
+async def run_http(client, item, scheduled_at, result, speaker, tenant_id):
+    path, payload, headers = http_request(item, speaker, tenant_id)
+    first_at = None
+    async with client.stream("POST", path, json=payload, headers=headers) as response:
+        if response.status_code != 200:
+            await response.aread()
+            result["status"] = f"http_{response.status_code}"
+            return
+        async for chunk in response.aiter_bytes():
+            if chunk:
+                if first_at is None:
+                    first_at = time.perf_counter()
+                result["bytes"] += len(chunk)
+    audio_s = None
+    if item["scenario"] == "tts_stream":
+        audio_s = result["bytes"] / 2 / STREAM_SAMPLE_RATE
+    _finish(result, scheduled_at, first_at, audio_s, response.headers.get("X-VCA-RTF"))
+
+
+# --- gRPC ---
+class GrpcTarget:
+    def __init__(self, target, ca_path=None, cert_path=None, key_path=None):
+        import grpc
+        from sentiric.tts.v1 import coqui_pb2, coqui_pb2_grpc
+
+        self.pb2 = coqui_pb2
+        if ca_path:
+            with open(ca_path, "rb") as f:
+                root_ca = f.read()
+            private_key = certificate_chain = None
+            if cert_path and key_path:
+                with open(key_path, "rb") as f:
+                    private_key = f.read()
+                with open(cert_path, "rb") as f:
+                    certificate_chain = f.read()
+            credentials = grpc.ssl_channel_credentials(root_ca, private_key, certificate_chain)
+            self.channel = grpc.aio.secure_channel(target, credentials)
+        else:
+            self.channel = grpc.aio.insecure_channel(target)
+        self.stub = coqui_pb2_grpc.TtsCoquiServiceStub(self.channel)
+
+    async def close(self):
+        await self.channel.close()
+
+
+async def run_grpc(grpc_target, item, scheduled_at, result, tenant_id, timeout):
+    import grpc
+
+    request = grpc_target.pb2.CoquiSynthesizeStreamRequest(
+        text=item["text"], language_code=item["language"], sample_rate=GRPC_SAMPLE_RATE
+    )
+    metadata = (("x-tenant-id", tenant_id), ("x-trace-id", f"loadgen-{item['offset']:.4f}"))
+    call = grpc_target.stub.CoquiSynthesizeStream(request, metadata=metadata, timeout=timeout)
+    first_at = None
+    try:
+        async for message in call:
+            if message.audio_chunk:
+                if first_at is None:
+                    first_at = time.perf_counter()
+                result["bytes"] += len(message.audio_chunk)
+    except grpc.aio.AioRpcError as e:
+        result["status"] = f"grpc_{e.code().name}"
+        return
+    trailers = dict(await call.trailing_metadata() or ())
+    audio_s = result["bytes"] / 2 / GRPC_SAMPLE_RATE
+    _finish(result, scheduled_at, first_at, audio_s, trailers.get("x-vca-rtf"))
+
+
+# --- DRIVER ---
+async def fire(item, scheduled_at, ctx, results):
+    result = new_result(item)
+    result["send_lag_ms"] = round((time.perf_counter() - scheduled_at) * 1000.0, 3)
+    try:
+        if item["scenario"] == "grpc":
+            await run_grpc(
+                ctx["grpc"], item, scheduled_at, result, ctx["tenant_id"], ctx["timeout"]
+            )
+        else:
+            await run_http(
+                ctx["http"], item, scheduled_at, result, ctx["speaker"], ctx["tenant_id"]
+            )
+    except httpx.TimeoutException:
+        result["status"] = "timeout"
+    except httpx.TransportError as e:
+        result["status"] = f"transport_{type(e).__name__}"
+    except Exception as e:
+        result["status"] = f"client_{type(e).__name__}"
+    results.append(result)
+
+
+async def drive(schedule, ctx, max_inflight):
+    results, tasks = [], set()
+    started = time.perf_counter()
+    for item in schedule:
+        scheduled_at = started + item["offset"]
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_inflight:
+            # İstemci tarafı koruma: sunucu değil, yük üreteci tıkandı.
+            dropped = new_result(item)
+            dropped["status"] = "client_overload"
+            results.append(dropped)
+            continue
+        task = asyncio.create_task(fire(item, scheduled_at, ctx, results))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    return results, time.perf_counter() - started
+
+
+def summarize(results, wall_time, args):
+    summary = {}
+    for scenario in sorted({r["scenario"] for r in results}):
+        rows = [r for r in results if r["scenario"] == scenario]
+        ok = [r for r in rows if r["status"] == "ok"]
+        errors = {}
+        for r in rows:
+            if r["status"] != "ok":
+                errors[r["status"]] = errors.get(r["status"], 0) + 1
+        summary[scenario] = {
+            "requests": len(rows),
+            "ok": len(ok),
+            "error_rate": round(1 - len(ok) / len(rows), 4) if rows else 0.0,
+            "errors": errors,
+            "throughput_rps": round(len(ok) / wall_time, 3) if wall_time else 0.0,
+            "ttfb_ms": percentiles([r["ttfb_ms"] for r in ok if r["ttfb_ms"] is not None]),
+            "latency_ms": percentiles([r["latency_ms"] for r in ok]),
+            "rtf": percentiles([r["rtf"] for r in ok if r["rtf"] is not None]),
+            "send_lag_ms": percentiles(
+                [r["send_lag_ms"] for r in rows if r["send_lag_ms"] is not None]
+            ),
+        }
+    return {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "target_url": args.url,
+            "grpc_target": args.grpc_target if "grpc" in args.mix else None,
+            "rate_rps": args.rate,
+            "duration_s": args.duration,
+            "wall_time_s": round(wall_time, 3),
+            "mix": args.mix,
+            "seed": args.seed,
+            "total_requests": len(results),
+        },
+        "scenarios": summary,
+    }
+
+
+def write_outputs(report, results, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    json_path = os.path.join(output_dir, f"load_{stamp}.json")
+    csv_path = os.path.join(output_dir, f"load_{stamp}.csv")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(sorted(results, key=lambda r: r["offset_s"]))
+    return json_path, csv_path
+
+
+
+def print_summary(report):
+    table = Table(title=f"Open-loop load @ {report['meta']['rate_rps']} req/s")
+    for column in ("Scenario", "OK/Total", "TTFB p50/p90/p99", "Latency p50/p90/p99", "RTF p50/p99", "Errors"):
+        table.add_column(column)
+
+    def fmt(p, keys=("p50", "p90", "p99")):
+        return " / ".join(f"{p[k]:.0f}" if k in p else "-" for k in keys) if p else "-"
+
+    for name, s in report["scenarios"].items():
+        rtf = s["rtf"]
+        table.add_row(
+            name,
+            f"{s['ok']}/{s['requests']}",
+            fmt(s["ttfb_ms"]),
+            fmt(s["latency_ms"]),
+            f"{rtf['p50']:.3f} / {rtf['p99']:.3f}" if rtf else "-",
+            ", ".join(f"{k}={v}" for k, v in sorted(s["errors"].items())) or "-",
+        )
+    console.print(table)
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    schedule = build_schedule(rng, args.rate, args.duration, args.mix)
+    console.print(
+        f"[bold cyan]🚀 {len(schedule)} requests scheduled over {args.duration}s "
+        f"(target {args.rate} req/s, mix {args.mix})[/bold cyan]"
+    )
+
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=args.max_inflight)
+    ctx = {
+        "speaker": args.speaker,
+        "tenant_id": args.tenant_id,
+        "timeout": args.timeout,
+        "grpc": None,
+    }
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        ctx["http"] = client
+        if "grpc" in args.mix:
+            ctx["grpc"] = GrpcTarget(args.grpc_target, args.grpc_ca, args.grpc_cert, args.grpc_key)
+
+        for i in range(args.warmup):
+            await fire({**schedule[i % len(schedule)], "scenario": "tts"}, time.perf_counter(), ctx, [])
+
+        results, wall_time = await drive(schedule, ctx, args.max_inflight)
+        if ctx["grpc"]:
+            await ctx["grpc"].close()
+
+    report = summarize(results, wall_time, args)
+    json_path, csv_path = write_outputs(report, results, args.output_dir)
+    print_summary(report)
+    console.print(f"[bold green]📄 Report written: {json_path}\n📄 Raw samples: {csv_path}[/bold green]")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sentiric TTS open-loop load generator")
+    parser.add_argument("--url", default=os.getenv("TTS_SERVICE_URL", "http://localhost:14030"))
+    parser.add_argument(
+        "--grpc-target",
+        default=f"{os.getenv('TTS_SERVICE_HOST', 'localhost')}:{os.getenv('TTS_SERVICE_PORT', '14031')}",
+    )
+    parser.add_argument("--grpc-ca", default=os.getenv("GRPC_TLS_CA_PATH"), help="Enables TLS")
+    parser.add_argument("--grpc-cert", default=None, help="Client certificate (mTLS)")
+    parser.add_argument("--grpc-key", default=None, help="Client private key (mTLS)")
+    parser.add_argument("--rate", type=float, default=2.0, help="Target Poisson arrival rate (req/s)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Arrival window in seconds")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("tts=1,tts_stream=1,openai=1,grpc=1"),
+        help="Scenario weights, e.g. tts=2,tts_stream=1,openai=1,grpc=0.5",
+    )
+    parser.add_argument("--speaker", default="F_TR_Kurumsal_Ece")
+    parser.add_argument("--tenant-id", default="loadgen")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-inflight", type=int, default=256)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(run(parse_args())))
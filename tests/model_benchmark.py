@@ -0,0 +1,384 @@
+"""
+Gerçek XTTS modeliyle (CPU) motor içi optimizasyon benchmark'ı.
+
+offline_benchmark.py'nin aksine burada ölçülen şey modelin kendisidir; indirilmiş
+XTTS ağırlıkları gerekir (servis ilk açılışta ~/.local/share/tts altına indirir).
+
+Senaryolar:
+    prefix_kv   Konuşmacı koşullandırma öneki KV önbelleği: ilk chunk süresi (TTFB)
+                açık/kapalı karşılaştırması ve token eşitliği kontrolü.
+    vocoder_batch
+                Eşzamanlı isteklerin HiFi-GAN chunk'larını tek batch'te çözmek: batch
+                boyutuna göre throughput (chunk/s), eklenen gecikme ve tekli çözümle fark.
+    vocoder_backend
+                HiFi-GAN backend'leri (eager / compile / torchscript / onnx): kurulum
+                süresi, RTF ve eager çıktısıyla en büyük mutlak fark.
+    pipeline    GPT/vocoder iki aşamalı akış hattı açık/kapalı: duvar saati, TTFB,
+                aşama doluluğu (gpt/vocoder meşguliyeti ÷ duvar saati) ve throughput kazancı.
+                Thread bütçeleri TTS_COQUI_SERVICE_GPT_THREADS / _VOCODER_THREADS ile.
+
+Kullanım:
+    python3 tests/model_benchmark.py --scenario prefix_kv --runs 10
+    python3 tests/model_benchmark.py --scenario vocoder_batch --batch-sizes 1,2,4,8
+    python3 tests/model_benchmark.py --scenario vocoder_backend --backends eager,torchscript
+    TTS_COQUI_SERVICE_GPT_THREADS=6 TTS_COQUI_SERVICE_VOCODER_THREADS=2 \
+        python3 tests/model_benchmark.py --scenario pipeline --runs 5
+    python3 tests/model_benchmark.py --model-dir /models/xtts_v2 --speaker-wav ref.wav
+"""
+
+import os
+import sys
+import json
+import time
+import copy
+import argparse
+import platform
+import statistics
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault("TTS_COQUI_SERVICE_DEVICE", "cpu")
+
+import torch  # noqa: E402
+from rich.console import Console  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.prefix_cache import PrefixKVCache  # noqa: E402
+from app.core.vocoder import (  # noqa: E402
+    VOCODER_BACKENDS,
+    VocoderBatcher,
+    install_vocoder_backend,
+)
+
+OUTPUT_DIR = "/tmp/sentiric-tts-tests"
+PROMPTS = [
+    ("tr", "Lütfen bekleyiniz, sizi müşteri temsilcimize aktarıyorum."),
+    ("tr", "Hesabınızla ilgili işlem başarıyla tamamlandı."),
+    ("en", "Thank you for calling, how can I help you today?"),
+    ("de", "Bitte warten Sie, Ihr Anruf wird weitergeleitet."),
+]
+
+console = Console()
+
+
+def percentiles(values):
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {"p50": pick(0.5), "p90": pick(0.9), "mean": round(statistics.mean(ordered), 2)}
+
+
+def load_model(model_dir):
+    from TTS.tts.configs.xtts_config import XttsConfig
+    from TTS.tts.models.xtts import Xtts
+    from TTS.utils.generic_utils import get_user_data_dir
+
+    model_dir = model_dir or os.path.join(
+        get_user_data_dir("tts"), settings.MODEL_NAME.replace("/", "--")
+    )
+    if not os.path.exists(os.path.join(model_dir, "model.pth")):
+        raise SystemExit(f"XTTS checkpoint not found in {model_dir} (use --model-dir).")
+
+    config = XttsConfig()
+    config.load_json(os.path.join(model_dir, "config.json"))
+    model = Xtts.init_from_config(config)
+    model.load_checkpoint(config, checkpoint_dir=model_dir, eval=True)
+    return model
+
+
+def reference_latents(model, speaker_wav):
+    if not speaker_wav:
+        import torchaudio
+
+        speaker_wav = os.path.join(OUTPUT_DIR, "model_benchmark_ref.wav")
+        t = torch.arange(0, 22050 * 3) / 22050.0
+        tone = 0.2 * torch.sin(2 * torch.pi * 180.0 * t) * torch.sin(2 * torch.pi * 3.0 * t)
+        torchaudio.save(speaker_wav, tone.unsqueeze(0), 22050)
+    return model.get_conditioning_latents(
+        audio_path=[speaker_wav], gpt_cond_len=30, gpt_cond_chunk_len=4, max_ref_length=60
+    )
+
+
+def first_chunk(model, language, text, latents, seed):
+    gpt_cond_latent, speaker_embedding = latents
+    torch.manual_seed(seed)
+    started = time.perf_counter()
+    stream = model.inference_stream(
+        text, language, gpt_cond_latent, speaker_embedding, enable_text_splitting=False
+    )
+    chunk = next(stream)
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    stream.close()
+    return elapsed_ms, chunk
+
+
+def bench_prefix_kv(model, latents, runs):
+    cache = PrefixKVCache(settings.PREFIX_KV_CACHE_MB * 1024 * 1024)
+    if not cache.install(model):
+        raise SystemExit("Prefix KV cache could not be installed on this model.")
+
+    results = {"off": [], "on": []}
+    max_diff = 0.0
+    with torch.inference_mode():
+        # Isınma + önek KV'sinin ilk hesaplanması ölçüme dahil edilmez.
+        with cache.bind("benchmark", latents[0]):
+            first_chunk(model, *PROMPTS[0], latents, seed=0)
+
+        for run in range(runs):
+            for index, (language, text) in enumerate(PROMPTS):
+                seed = run * 100 + index
+                # Sıra değiştirilir: ısıl/önbellek etkisi iki tarafa eşit dağılır.
+                order = ("off", "on") if run % 2 == 0 else ("on", "off")
+                chunks = {}
+                for mode in order:
+                    if mode == "on":
+                        with cache.bind("benchmark", latents[0]):
+                            ms, chunks[mode] = first_chunk(model, language, text, latents, seed)
+                    else:
+                        ms, chunks[mode] = first_chunk(model, language, text, latents, seed)
+                    results[mode].append(ms)
+                if chunks["off"].shape == chunks["on"].shape:
+                    max_diff = max(
+                        max_diff, float((chunks["off"] - chunks["on"]).abs().max())
+                    )
+                else:
+                    max_diff = float("inf")
+
+    off, on = percentiles(results["off"]), percentiles(results["on"])
+    return {
+        "ttfb_ms_cache_off": off,
+        "ttfb_ms_cache_on": on,
+        "ttfb_p50_reduction_pct": round((1 - on["p50"] / off["p50"]) * 100.0, 1),
+        "first_chunk_max_abs_diff": max_diff,
+    }
+
+
+def bench_vocoder_batch(model, latents, runs, batch_sizes=(1, 2, 4, 8)):
+    decoder = model.hifigan_decoder
+    speaker_embedding = latents[1]
+    # Akıştaki tipik chunk'lar: 20 token'lık adımlarla büyüyen latent dizileri.
+    frame_mix = [20, 40, 60, 80, 20, 40, 60, 80]
+    generator = torch.Generator().manual_seed(0)
+    chunks = [torch.randn(1, n, 1024, generator=generator) for n in frame_mix]
+
+    with torch.inference_mode():
+        decoder(chunks[0], g=speaker_embedding)  # Isınma
+        solo_ms, solo_out = [], []
+        for _ in range(runs):
+            for chunk in chunks:
+                started = time.perf_counter()
+                solo_out.append(decoder(chunk, g=speaker_embedding))
+                solo_ms.append((time.perf_counter() - started) * 1000.0)
+    solo_out = solo_out[: len(chunks)]
+
+    results = {"solo_decode_ms": percentiles(solo_ms)}
+    solo_throughput = 1000.0 / statistics.mean(solo_ms)
+    for size in batch_sizes:
+        batcher = VocoderBatcher(
+            decoder, size, settings.VOCODER_BATCH_WAIT_MS, expected_jobs=lambda: size
+        )
+        latency_ms, tail_diff, body_diff = [], 0.0, 0.0
+        started = time.perf_counter()
+        for _ in range(runs):
+            for offset in range(0, len(chunks), size):
+                group = chunks[offset : offset + size]
+                submitted = time.perf_counter()
+                futures = [batcher.submit(chunk, speaker_embedding) for chunk in group]
+                for index, future in enumerate(futures):
+                    wav = future.result()
+                    latency_ms.append((time.perf_counter() - submitted) * 1000.0)
+                    reference = solo_out[offset + index]
+                    diff = (wav - reference).abs().flatten()
+                    tail_diff = max(tail_diff, float(diff.max()))
+                    # inference_stream son 1024 örneği (overlap) bir sonraki chunk'a bırakır.
+                    body_diff = max(body_diff, float(diff[:-1024].max()))
+        elapsed = time.perf_counter() - started
+        throughput = runs * len(chunks) / elapsed
+        results[f"batch_{size}"] = {
+            "throughput_chunks_per_s": round(throughput, 2),
+            "speedup_vs_solo": round(throughput / solo_throughput, 2),
+            "latency_ms": percentiles(latency_ms),
+            "added_p50_latency_ms": round(
+                percentiles(latency_ms)["p50"] - results["solo_decode_ms"]["p50"], 2
+            ),
+            "max_abs_diff": tail_diff,
+            "max_abs_diff_excl_overlap": body_diff,
+        }
+    return results
+
+
+def bench_vocoder_backend(model, latents, runs, backends=VOCODER_BACKENDS):
+    speaker_embedding = latents[1]
+    generator = torch.Generator().manual_seed(0)
+    # Kısa telefon cevabı ve uzun cümle (~1 sn ve ~4 sn ses).
+    inputs = [torch.randn(1, n, 1024, generator=generator) for n in (22, 86)]
+    cache_dir = os.path.join(OUTPUT_DIR, "vocoder")
+    sample_rate = getattr(model.hifigan_decoder, "output_sample_rate", 24000)
+
+    with torch.inference_mode():
+        references = [model.hifigan_decoder(x, g=speaker_embedding) for x in inputs]
+
+    results = {}
+    for backend in backends:
+        decoder = copy.deepcopy(model.hifigan_decoder)
+        started = time.perf_counter()
+        effective = install_vocoder_backend(decoder, backend, cache_dir)
+        setup_s = time.perf_counter() - started
+
+        rtf, max_diff = [], 0.0
+        with torch.inference_mode():
+            for x, reference in zip(inputs, references):
+                decoder(x, g=speaker_embedding)  # Isınma (compile: ilk şekil)
+                for _ in range(runs):
+                    t0 = time.perf_counter()
+                    wav = decoder(x, g=speaker_embedding)
+                    rtf.append((time.perf_counter() - t0) / (wav.shape[-1] / sample_rate))
+                max_diff = max(max_diff, float((wav - reference).abs().max()))
+        results[backend] = {
+            "effective_backend": effective,
+            "setup_s": round(setup_s, 2),
+            "rtf": {k: round(v, 4) for k, v in percentiles(rtf).items()},
+            "max_abs_diff_vs_eager": max_diff,
+        }
+
+    eager_rtf = results.get("eager", {}).get("rtf", {}).get("p50")
+    if eager_rtf:
+        for result in results.values():
+            result["speedup_vs_eager"] = round(eager_rtf / result["rtf"]["p50"], 2)
+    return results
+
+
+def _engine_conf(language, text, latents):
+    return {
+        "text": text,
+        "language": language,
+        "gpt_cond_latent": latents[0],
+        "speaker_embedding": latents[1],
+        "temperature": settings.DEFAULT_TEMPERATURE,
+        "top_k": settings.DEFAULT_TOP_K,
+        "top_p": settings.DEFAULT_TOP_P,
+        "repetition_penalty": settings.DEFAULT_REPETITION_PENALTY,
+        "speed": 1.0,
+        "split_sentences": False,
+    }
+
+
+def bench_pipeline(model, latents, runs):
+    from app.core.engine import SmartMemoryManager, tts_engine
+    from app.core.timing import RequestTimings
+
+    tts_engine.model = model
+    tts_engine.memory_manager = SmartMemoryManager("cpu")
+    tts_engine._install_vocoder_stage()
+    tts_engine._install_stage_hooks()
+    streams = {"sequential": tts_engine._sequential_stream, "pipelined": tts_engine._pipelined_stream}
+
+    def run_stream(mode, language, text, seed):
+        timings = RequestTimings("benchmark")
+        torch.manual_seed(seed)
+        started = time.perf_counter()
+        first_chunk_ms, samples = None, 0
+        with tts_engine._model_slot(timings), torch.inference_mode():
+            for chunk in streams[mode](_engine_conf(language, text, latents), timings):
+                if first_chunk_ms is None:
+                    first_chunk_ms = (time.perf_counter() - started) * 1000.0
+                samples += chunk.shape[-1]
+        wall_ms = (time.perf_counter() - started) * 1000.0
+        return {
+            "wall_ms": wall_ms,
+            "ttfb_ms": first_chunk_ms,
+            "rtf": wall_ms / 1000.0 / (samples / tts_engine.native_sample_rate),
+            "gpt_util": timings.stages.get("gpt", 0.0) / wall_ms,
+            "vocoder_util": timings.stages.get("vocoder", 0.0) / wall_ms,
+        }
+
+    run_stream("pipelined", *PROMPTS[0], seed=0)  # Isınma
+    samples = {mode: [] for mode in streams}
+    for run in range(runs):
+        for index, (language, text) in enumerate(PROMPTS):
+            order = list(streams) if run % 2 == 0 else list(reversed(list(streams)))
+            for mode in order:
+                samples[mode].append(run_stream(mode, language, text, run * 100 + index))
+
+    results = {}
+    for mode, rows in samples.items():
+        results[mode] = {
+            metric: percentiles([row[metric] for row in rows])
+            for metric in ("wall_ms", "ttfb_ms", "rtf", "gpt_util", "vocoder_util")
+        }
+    results["throughput_gain"] = round(
+        results["sequential"]["wall_ms"]["mean"] / results["pipelined"]["wall_ms"]["mean"], 3
+    )
+    results["threads"] = {"gpt": settings.GPT_THREADS, "vocoder": settings.VOCODER_THREADS}
+    return results
+
+
+SCENARIOS = {
+    "prefix_kv": bench_prefix_kv,
+    "vocoder_batch": bench_vocoder_batch,
+    "vocoder_backend": bench_vocoder_backend,
+    "pipeline": bench_pipeline,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XTTS in-model CPU benchmark")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads")
+    parser.add_argument("--model-dir", default=None)
+    parser.add_argument("--speaker-wav", default=None)
+    parser.add_argument(
+        "--batch-sizes", default="1,2,4,8", help="vocoder_batch: comma separated"
+    )
+    parser.add_argument(
+        "--backends",
+        default=",".join(VOCODER_BACKENDS),
+        help="vocoder_backend: comma separated",
+    )
+    parser.add_argument("--output", default=os.path.join(OUTPUT_DIR, "model_benchmark.json"))
+    args = parser.parse_args(argv)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    model = load_model(args.model_dir)
+    latents = reference_latents(model, args.speaker_wav)
+
+    report = {
+        "platform": platform.platform(),
+        "torch": torch.__version__,
+        "threads": torch.get_num_threads(),
+        "runs": args.runs,
+        "scenarios": {},
+    }
+    for name in args.scenario or sorted(SCENARIOS):
+        console.print(f"[bold]Running {name}...[/bold]")
+        kwargs = {}
+        if name == "vocoder_batch":
+            kwargs["batch_sizes"] = [int(b) for b in args.batch_sizes.split(",") if b]
+        elif name == "vocoder_backend":
+            kwargs["backends"] = [b for b in args.backends.split(",") if b]
+        report["scenarios"][name] = SCENARIOS[name](model, latents, args.runs, **kwargs)
+
+    table = Table(title="XTTS model benchmark (CPU)")
+    table.add_column("Scenario")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    for name, result in report["scenarios"].items():
+        for metric, value in result.items():
+            table.add_row(name, metric, json.dumps(value))
+    console.print(table)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    console.print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,951 @@
+"""
+Sunucusuz (in-process) benchmark: XTTS yerine deterministik StubXtts kullanır.
+
+Ölçülen şey modelin kendisi DEĞİL, etrafındaki bizim kodumuzdur: normalizasyon,
+dil tespiti, latent arama, kilit, yeniden örnekleme, encode, HTTP/gRPC köprüleri.
+Rapor JSON olarak yazılır ve saklanan baseline ile karşılaştırılır.
+
+Kullanım:
+    python3 tests/offline_benchmark.py
+    python3 tests/offline_benchmark.py --update-baseline
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import asyncio
+import argparse
+import platform
+import shutil
+import tempfile
+import statistics
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault("TTS_COQUI_SERVICE_DEVICE", "cpu")
+
+from rich.console import Console  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+from stub_resp import StubRespServer  # noqa: E402
+from stub_xtts import install_stub_engine  # noqa: E402
+
+OUTPUT_DIR = "/tmp/sentiric-tts-tests"
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, "tests", "baselines", "offline_benchmark.json")
+TENANT_HEADERS = {"x-tenant-id": "benchmark", "x-trace-id": "offline-bench"}
+
+TEXTS = {
+    "short": "Lütfen bekleyiniz.",
+    "medium": "Sentiric XTTS servisi, düşük gecikme ve yüksek kalite hedefleyen bir ses sentez motorudur.",
+    "long": (
+        "Bu metin uzun bir paragrafı temsil eder. Sistem cümleleri böler, her birini "
+        "sırayla sentezler ve sonuçları birleştirir. Amaç, motorun etrafındaki kodun "
+        "ne kadar ek yük getirdiğini ölçmektir. Model süresi stub tarafından sabitlenir."
+    ),
+}
+
+console = Console()
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "mean": round(statistics.mean(ordered), 3),
+    }
+
+
+def stage_summary(timings_list):
+    stages = {}
+    for t in timings_list:
+        for name, ms in t.stages.items():
+            stages.setdefault(name, []).append(ms)
+    return {name: percentiles(values) for name, values in sorted(stages.items())}
+
+
+def overhead_ms(timings):
+    """Bizim kodumuzun eklediği süre: toplam - (GPT + vocoder)."""
+    model_ms = timings.stages.get("gpt", 0.0) + timings.stages.get("vocoder", 0.0)
+    return timings.elapsed() * 1000.0 - model_ms
+
+
+def _params(text_key, **overrides):
+    from app.core.config import settings
+
+    params = {
+        "text": TEXTS[text_key],
+        "language": "tr",
+        "speaker_idx": settings.DEFAULT_SPEAKER,
+        "temperature": settings.DEFAULT_TEMPERATURE,
+        "speed": settings.DEFAULT_SPEED,
+        "top_k": settings.DEFAULT_TOP_K,
+        "top_p": settings.DEFAULT_TOP_P,
+        "repetition_penalty": settings.DEFAULT_REPETITION_PENALTY,
+        "output_format": "wav",
+        "sample_rate": 24000,
+        "split_sentences": True,
+    }
+    params.update(overrides)
+    return params
+
+
+# --- ENGINE ---
+def bench_engine_unary(iterations):
+    from app.core.engine import tts_engine
+    from app.core.timing import RequestTimings
+
+    results = {}
+    for text_key in TEXTS:
+        timings_list = []
+        for _ in range(iterations):
+            timings = RequestTimings("http", "benchmark")
+            tts_engine.synthesize(_params(text_key), timings=timings)
+            timings.finish()
+            timings_list.append(timings)
+        results[text_key] = {
+            "stages_ms": stage_summary(timings_list),
+            "overhead_ms": percentiles([overhead_ms(t) for t in timings_list]),
+            "rtf": percentiles([t.rtf() or 0.0 for t in timings_list]),
+        }
+    return results
+
+
+def bench_engine_stream(iterations, sample_rate=24000):
+    from app.core.engine import tts_engine
+    from app.core.timing import RequestTimings
+
+    results = {}
+    for text_key in TEXTS:
+        timings_list, ttfb = [], []
+        for _ in range(iterations):
+            timings = RequestTimings("grpc", "benchmark")
+            params = _params(text_key, output_format="pcm", sample_rate=sample_rate)
+            for _chunk in tts_engine.synthesize_stream(params, timings=timings):
+                if "ttfb" not in timings.stages:
+                    timings.mark_first_byte()
+            timings.finish()
+            timings_list.append(timings)
+            ttfb.append(timings.stages.get("ttfb", 0.0))
+        results[text_key] = {
+            "ttfb_ms": percentiles(ttfb),
+            "stages_ms": stage_summary(timings_list),
+            "overhead_ms": percentiles([overhead_ms(t) for t in timings_list]),
+            "rtf": percentiles([t.rtf() or 0.0 for t in timings_list]),
+        }
+    return results
+
+
+def bench_allocations(iterations):
+    """İstek başına tepe bellek ve istek sonrası kalıcı blok sayısı (tracemalloc)."""
+    from app.core.engine import tts_engine
+
+    def measure(fn):
+        peaks, retained = [], []
+        for _ in range(iterations):
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            fn()
+            _current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            diff = after.compare_to(before, "filename")
+            retained.append(sum(max(stat.count_diff, 0) for stat in diff))
+            peaks.append(peak / 1024.0)
+        return {"peak_kib": percentiles(peaks), "retained_blocks": percentiles(retained)}
+
+    def unary():
+        tts_engine.synthesize(_params("medium"))
+
+    def stream():
+        for _chunk in tts_engine.synthesize_stream(_params("medium", output_format="pcm")):
+            pass
+
+    return {"engine_unary": measure(unary), "engine_stream": measure(stream)}
+
+
+def _legacy_encode_chunk(chunk, resampler):
+    """Karşılaştırma için eski akış son işlemesi: tensor/numpy gidiş-dönüşleri ve kopyalar."""
+    import numpy as np
+    import torch
+
+    tensor_chunk = torch.from_numpy(chunk.numpy())
+    if resampler:
+        tensor_chunk = resampler(tensor_chunk.unsqueeze(0))
+    samples = tensor_chunk.numpy().flatten()
+    return (samples * 32767).astype(np.int16).tobytes()
+
+
+def bench_stream_postprocess(iterations, chunk_samples=21504):
+    """
+    Chunk başına son işleme (resample + int16 encode) süresi ve numpy tahsisi.
+    copies: chunk başına tepe tahsis / çıkan PCM boyutu (tracemalloc; torch tahsisleri hariç).
+    Varsayılan chunk: 20 GPT token'ı ~ 21.5k örnek (24 kHz).
+    """
+    import torch
+    import torchaudio
+    from app.core.engine import tts_engine
+    from app.core.pcm import PcmEncoder
+    from app.core.timing import RequestTimings
+
+    chunk = (torch.rand(chunk_samples, generator=torch.Generator().manual_seed(0)) - 0.5) * 0.8
+    results = {}
+    for variant, target_sr in (("native", 24000), ("resampled", 16000)):
+        resampler = (
+            torchaudio.transforms.Resample(orig_freq=24000, new_freq=target_sr)
+            if target_sr != 24000
+            else None
+        )
+        encoder = PcmEncoder()
+        paths = {
+            "legacy": lambda: _legacy_encode_chunk(chunk, resampler),
+            "current": lambda: tts_engine._encode_stream_chunk(
+                chunk.numpy(), encoder, resampler, target_sr, RequestTimings()
+            ),
+        }
+        for name, fn in paths.items():
+            fn()  # Isınma (tampon büyümesi, resample çekirdeği)
+            durations, copies = [], []
+            for _ in range(iterations * 10):
+                started = time.perf_counter()
+                out = fn()
+                durations.append((time.perf_counter() - started) * 1e6)
+                tracemalloc.start()
+                fn()
+                _current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                copies.append(peak / len(out))
+            results[f"{variant}_{name}"] = {
+                "us_per_chunk": percentiles(durations),
+                "copies": percentiles(copies),
+            }
+    return results
+
+
+def bench_cancellation(iterations, disconnect_after_ms=120.0):
+    """
+    İstemci kopmasından model kilidinin bırakılmasına kadar geçen süre. İptal, bir chunk
+    üretilirken (GPT adımlarının ortasında) tetiklenir; HTTP uçları bağlantıyı 0.1 sn'de
+    bir yokladığı için uçtan uca süreye en fazla 100 ms eklenir.
+    """
+    import threading
+    from app.core.config import settings
+    from app.core.engine import SynthesisCancelled, tts_engine
+
+    def unary(cancel_event):
+        try:
+            tts_engine.synthesize(_params("long"), is_aborted_cb=cancel_event.is_set)
+        except SynthesisCancelled:
+            pass
+
+    def stream(cancel_event):
+        params = _params("long", output_format="pcm")
+        for _chunk in tts_engine.synthesize_stream(params, is_aborted_cb=cancel_event.is_set):
+            pass
+
+    pipeline_enabled = settings.ENABLE_STAGE_PIPELINE
+    results = {}
+    try:
+        for name, fn, pipelined in (
+            ("unary", unary, pipeline_enabled),
+            ("stream_sequential", stream, False),
+            ("stream_pipelined", stream, True),
+        ):
+            settings.ENABLE_STAGE_PIPELINE = pipelined
+            release_ms = []
+            for _ in range(iterations):
+                cancel_event = threading.Event()
+                worker = threading.Thread(target=fn, args=(cancel_event,))
+                worker.start()
+                time.sleep(disconnect_after_ms / 1000.0)
+                disconnected_at = time.perf_counter()
+                cancel_event.set()
+                ticket = tts_engine.scheduler.acquire("benchmark")
+                release_ms.append((time.perf_counter() - disconnected_at) * 1000.0)
+                tts_engine.scheduler.release(ticket, 0.0)
+                worker.join()
+            results[name] = {"disconnect_to_release_ms": percentiles(release_ms)}
+    finally:
+        settings.ENABLE_STAGE_PIPELINE = pipeline_enabled
+    return results
+
+
+def bench_deadlines(iterations, burst=8, budget_factor=3.0):
+    """
+    Aşırı yük: aynı anda gelen `burst` istek, her biri tek istek süresinin `budget_factor`
+    katı deadline ile. Deadline'ı kaçıracak işler modele girmeden düşer; `wasted_ms`
+    deadline'ı yine de kaçıran isteklerin model kilidinde harcadığı süredir.
+    """
+    import threading
+    from app.core.engine import DeadlineExceeded, tts_engine
+    from app.core.timing import RequestTimings
+
+    single = RequestTimings("http", "benchmark")
+    tts_engine.synthesize(_params("medium"), timings=single)
+    timeout = single.elapsed() * budget_factor
+
+    met, dropped, wasted_ms = [], [], []
+    for _ in range(iterations):
+        outcomes = []
+
+        def request():
+            timings = RequestTimings("http", "benchmark", timeout=timeout)
+            try:
+                tts_engine.synthesize(_params("medium"), timings=timings)
+                outcomes.append(("ok" if timings.time_remaining() >= 0 else "late", timings))
+            except DeadlineExceeded:
+                outcomes.append(("dropped", timings))
+
+        workers = [threading.Thread(target=request) for _ in range(burst)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        met.append(sum(1 for kind, _ in outcomes if kind == "ok"))
+        dropped.append(sum(1 for kind, _ in outcomes if kind == "dropped"))
+        wasted_ms.append(
+            sum(t.stages.get("lock_hold", 0.0) for kind, t in outcomes if kind != "ok")
+        )
+    return {
+        "timeout_ms": round(timeout * 1000.0, 3),
+        "met": percentiles(met),
+        "dropped": percentiles(dropped),
+        "wasted_ms": percentiles(wasted_ms),
+    }
+
+
+def bench_tenant_fairness(iterations, bulk_workers=6):
+    """
+    Bir tenant `bulk_workers` eşzamanlı uzun istekle kuyruğu doldururken başka bir
+    tenant'ın sıralı kısa isteklerinin kilit beklemesi. Adil kuyrukta bekleme en fazla
+    bir bulk işin süresidir; kuyruğun uzunluğuyla büyümez.
+    """
+    import threading
+    from app.core.engine import tts_engine
+    from app.core.timing import RequestTimings
+
+    stop = threading.Event()
+
+    def bulk():
+        while not stop.is_set():
+            tts_engine.synthesize(
+                _params("medium"), timings=RequestTimings("http", "bulk-tenant")
+            )
+
+    workers = [threading.Thread(target=bulk) for _ in range(bulk_workers)]
+    for worker in workers:
+        worker.start()
+    victim = []
+    try:
+        time.sleep(0.2)
+        for _ in range(iterations):
+            timings = RequestTimings("http", "interactive-tenant")
+            tts_engine.synthesize(_params("short"), timings=timings)
+            victim.append(timings)
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+    return {"victim_queue_wait_ms": percentiles([t.stages["queue_wait"] for t in victim])}
+
+
+def _batch_items(round_id, count=40, duplicate_every=4):
+    """Karışık konuşmacılı, her dördüncüsü tekrar olan parti öğeleri."""
+    from app.core.config import settings
+
+    speakers = [settings.DEFAULT_SPEAKER, "F_TR_Kurumsal_Ece"]
+    items = []
+    for i in range(count):
+        n = i - 1 if i % duplicate_every == duplicate_every - 1 else i
+        items.append(
+            {
+                **_params("short", speaker_idx=speakers[n % len(speakers)]),
+                "text": f"{TEXTS['short']} {round_id}-{n}",
+                "id": f"prompt-{i}",
+            }
+        )
+    return items
+
+
+def bench_batch(iterations, count=40):
+    """Toplu sentez hızı (öğe/dk): tekil tekil çağrı vs. parti (soğuk ve sıcak önbellek)."""
+    from app.core.audio_cache import AudioCache
+    from app.core.batch import plan_batch, run_batch
+    from app.core.engine import tts_engine
+
+    def items_per_min(elapsed_list):
+        return round(count / statistics.mean(elapsed_list) * 60.0, 1)
+
+    sequential, cold, warm = [], [], []
+    for round_id in range(iterations):
+        items = _batch_items(f"seq{round_id}", count)
+        started = time.perf_counter()
+        for item in items:
+            tts_engine.synthesize({k: v for k, v in item.items() if k != "id"})
+        sequential.append(time.perf_counter() - started)
+
+        items = _batch_items(f"batch{round_id}", count)
+        cache = AudioCache(
+            tempfile.mkdtemp(prefix="sentiric-batch-"), ram_capacity=count, disk_max_bytes=1 << 30
+        )
+        for bucket in (cold, warm):
+            started = time.perf_counter()
+            for _result in run_batch(
+                plan_batch(items, cache.key),
+                tts_engine.synthesize,
+                cache,
+                tenant_id="benchmark",
+            ):
+                pass
+            bucket.append(time.perf_counter() - started)
+
+    return {
+        name: {
+            "elapsed_ms": percentiles([e * 1000.0 for e in values]),
+            "items_per_min": items_per_min(values),
+        }
+        for name, values in (("sequential", sequential), ("cold", cold), ("warm", warm))
+    }
+
+
+def bench_shared_cache(iterations, keys=32, rtt_ms=0.25):
+    """
+    İki replika (iki AudioCache) aynı arka ucu paylaşır: biri yazar, diğeri okur.
+    Yerel (RAM) isabet, uzak isabet ve `keys` anahtarın tekil okumalarla ya da tek
+    çoklu okumayla (Redis: MGET) alınmasında anahtar başına süre (µs). Redis, komut
+    başına `rtt_ms` ağ gecikmesi ekleyen süreç içi RESP sunucusu (stub_resp) ile ölçülür.
+    """
+    from app.core.audio_cache import AudioCache
+    from app.core.cache_backends import FilesystemBackend, MemoryBackend, RedisBackend
+    from app.core.engine import tts_engine
+
+    audio = tts_engine.synthesize(_params("short"))
+    server = StubRespServer(rtt_ms=rtt_ms)
+    directory = tempfile.mkdtemp(prefix="sentiric-shared-")
+    backends = {
+        "memory": lambda: MemoryBackend(),
+        "filesystem": lambda: FilesystemBackend(directory, 1 << 30),
+        "redis": lambda: RedisBackend(server.url, prefix="bench:"),
+    }
+    results = {}
+    try:
+        for name, make in backends.items():
+            shared = make()
+            local_us, remote_us, single_us, multi_us = [], [], [], []
+            for i in range(iterations):
+                writer = AudioCache("", keys, 0, backend=shared)
+                names = [f"{name}-{i}-{n}.wav" for n in range(keys)]
+                for key in names:
+                    writer.put(key, audio)
+
+                reader = AudioCache("", keys, 0, backend=shared)
+                started = time.perf_counter()
+                reader.get(names[0])
+                remote_us.append((time.perf_counter() - started) * 1e6)
+                started = time.perf_counter()
+                reader.get(names[0])
+                local_us.append((time.perf_counter() - started) * 1e6)
+
+                reader = AudioCache("", keys, 0, backend=shared)
+                started = time.perf_counter()
+                for key in names:
+                    reader.get(key)
+                single_us.append((time.perf_counter() - started) * 1e6 / keys)
+                reader = AudioCache("", keys, 0, backend=shared)
+                started = time.perf_counter()
+                reader.get_many(names)
+                multi_us.append((time.perf_counter() - started) * 1e6 / keys)
+            results[name] = {
+                "local_hit_us": percentiles(local_us),
+                "remote_hit_us": percentiles(remote_us),
+                "single_get_us_per_key": percentiles(single_us),
+                "multi_get_us_per_key": percentiles(multi_us),
+            }
+    finally:
+        server.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def bench_scene(iterations, lines=12):
+    """
+    Studio sahnesi (iki konuşmacılı diyalog, tekrar eden kısa cevaplar): eski akış blok
+    başına ayrı /api/tts isteğini sırayla bekleyip tarayıcıda birleştiriyordu (burada:
+    blok başına tts_engine.synthesize + birleştirme). Sunucu tarafı sahne: tekilleştirme,
+    pencere içi konuşmacı gruplama ve sırası gelen bloğun hemen miks akışına yazılması.
+    Toplam süre ve ilk ses baytına kadar geçen süre (ms).
+    """
+    from app.core.audio_cache import AudioCache
+    from app.core.batch import run_batch
+    from app.core.cache_backends import MemoryBackend
+    from app.core.config import settings
+    from app.core.engine import tts_engine
+    from app.core.scene import SceneMixer, plan_scene, scene_items
+
+    speakers = [settings.DEFAULT_SPEAKER, "F_TR_Kurumsal_Ece"]
+    replies = ["Evet.", "Anlıyorum.", TEXTS["short"]]
+    serial_ms, serial_first_ms, scene_ms, scene_first_ms = [], [], [], []
+    for i in range(iterations):
+        scene = {
+            "blocks": [
+                {
+                    "id": str(n),
+                    "text": f"{TEXTS['medium']} {i}-{n}" if n % 2 == 0 else replies[n % 3],
+                    "speaker": speakers[n % 2],
+                    "speed": 1.0,
+                    "language": None,
+                }
+                for n in range(lines)
+            ],
+            **{k: v for k, v in _params("short").items() if k != "text"},
+        }
+        items = scene_items(scene)
+
+        # Her iki yol da soğuk önbellekle başlar (tekrarlar yalnızca sahne içinde).
+        started = time.perf_counter()
+        first = None
+        pieces = []
+        for item in items:
+            params = {k: v for k, v in item.items() if k != "id"}
+            pieces.append(tts_engine.synthesize({**params, "text": f"{params['text']} s"}))
+            first = first or time.perf_counter()
+        b"".join(pieces)
+        serial_ms.append((time.perf_counter() - started) * 1000.0)
+        serial_first_ms.append((first - started) * 1000.0)
+
+        cache = AudioCache("", 0, 0, backend=MemoryBackend())
+        started = time.perf_counter()
+        first = None
+        jobs = plan_scene(items, cache.key, settings.SCENE_GROUP_WINDOW)
+        mixer = SceneMixer("bench", items, [0] * len(items), 24000, "pcm")
+        for result in run_batch(jobs, tts_engine.synthesize, cache):
+            if mixer.add(result) and first is None:
+                first = time.perf_counter()
+        scene_ms.append((time.perf_counter() - started) * 1000.0)
+        scene_first_ms.append((first - started) * 1000.0)
+
+    return {
+        "blocks": lines,
+        "serial_total_ms": percentiles(serial_ms),
+        "serial_first_audio_ms": percentiles(serial_first_ms),
+        "scene_total_ms": percentiles(scene_ms),
+        "scene_first_audio_ms": percentiles(scene_first_ms),
+    }
+
+
+def bench_history(iterations, sizes=(1000, 10000), page=50):
+    """
+    Geçmiş listeleme: SQLite dizininde (tenant, id) imleciyle ilk ve son sayfa, toplam
+    kayıt sayısı arttıkça sabit kalmalı. Karşılaştırma: aynı sayıda dosyalık bir geçmiş
+    dizinini tarayıp mtime'a göre sıralayarak sayfa çıkarmak (O(n)).
+    """
+    from app.core.history import HistoryStore
+
+    results = {}
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix="sentiric-history-")
+        try:
+            store = HistoryStore(os.path.join(directory, "history.db"), max_entries=0)
+            blobs = os.path.join(directory, "blobs")
+            os.makedirs(blobs)
+            params = _params("short")
+            store.record("benchmark", "seed.wav", params, 1024)
+            # Doldurma tek işlemde: kayıt başına commit ölçümü gereksiz uzatır.
+            with store._lock, store._connection() as conn:
+                conn.executemany(
+                    "INSERT INTO history (tenant_id, filename, text, speaker, language, mode, "
+                    "params, size_bytes, created_at) VALUES (?, ?, ?, ?, 'tr', 'TTS', '{}', 1024, ?)",
+                    (
+                        (
+                            "benchmark",
+                            f"{n:032x}.wav",
+                            f"{params['text']} {n}",
+                            params["speaker_idx"],
+                            time.time(),
+                        )
+                        for n in range(size)
+                    ),
+                )
+            for n in range(size):
+                open(os.path.join(blobs, f"{n:032x}.wav"), "wb").close()
+
+            first_us, last_us, filtered_us, scan_us = [], [], [], []
+            cursor = size - page + 1
+            for _ in range(iterations):
+                started = time.perf_counter()
+                store.list("benchmark", limit=page)
+                first_us.append((time.perf_counter() - started) * 1e6)
+                started = time.perf_counter()
+                store.list("benchmark", limit=page, before=cursor)
+                last_us.append((time.perf_counter() - started) * 1e6)
+                started = time.perf_counter()
+                store.list("benchmark", limit=page, speaker=params["speaker_idx"])
+                filtered_us.append((time.perf_counter() - started) * 1e6)
+                started = time.perf_counter()
+                entries = [
+                    (entry.stat().st_mtime, entry.name) for entry in os.scandir(blobs)
+                ]
+                sorted(entries, reverse=True)[:page]
+                scan_us.append((time.perf_counter() - started) * 1e6)
+            store.stop()
+            results[f"entries_{size}"] = {
+                "first_page_us": percentiles(first_us),
+                "deep_page_us": percentiles(last_us),
+                "filtered_page_us": percentiles(filtered_us),
+                "directory_scan_us": percentiles(scan_us),
+            }
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+# --- HTTP (ASGI, ağ yok) ---
+class FirstByteProbe:
+    """ASGI sarmalayıcı: uygulamanın ilk gövde baytını gönderdiği anı kaydeder."""
+
+    def __init__(self, app):
+        self.app = app
+        self.first_body_at = None
+
+    async def __call__(self, scope, receive, send):
+        async def probe_send(message):
+            if (
+                message["type"] == "http.response.body"
+                and message.get("body")
+                and self.first_body_at is None
+            ):
+                self.first_body_at = time.perf_counter()
+            await send(message)
+
+        await self.app(scope, receive, probe_send)
+
+
+async def _bench_http_async(iterations):
+    import httpx
+    from app.main import app
+
+    probe = FirstByteProbe(app)
+    transport = httpx.ASGITransport(app=probe)
+    scenarios = {
+        "http_tts": ("/api/tts", lambda i: {**_params("medium"), "text": f"{TEXTS['medium']} {i}", "stream": False}),
+        "http_tts_stream": ("/api/tts", lambda i: {**_params("medium", output_format="pcm"), "stream": True}),
+        "openai_speech": ("/v1/audio/speech", lambda i: {"input": f"{TEXTS['medium']} {i}", "voice": "alloy"}),
+        "http_tts_cache_hit": ("/api/tts", lambda i: {**_params("short"), "stream": False}),
+        "http_batch": ("/api/tts/batch", lambda i: {"items": _batch_items(f"http{i}", 10)}),
+    }
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, (path, build) in scenarios.items():
+            latency, ttfb, errors = [], [], 0
+            for i in range(iterations):
+                probe.first_body_at = None
+                started = time.perf_counter()
+                response = await client.post(path, json=build(i), headers=TENANT_HEADERS)
+                finished = time.perf_counter()
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                latency.append((finished - started) * 1000.0)
+                if probe.first_body_at is not None:
+                    ttfb.append((probe.first_body_at - started) * 1000.0)
+            results[name] = {
+                "latency_ms": percentiles(latency),
+                "ttfb_ms": percentiles(ttfb),
+                "errors": errors,
+            }
+
+        # İçerik kimliğiyle yeniden oynatma: tam GET, koşullu GET (304) ve Range (206).
+        created = await client.post(
+            "/api/tts", json={**_params("medium"), "stream": False}, headers=TENANT_HEADERS
+        )
+        audio_url = created.headers["Content-Location"]
+        replays = {
+            "http_audio_get": ({}, 200),
+            "http_audio_not_modified": ({"If-None-Match": created.headers["ETag"]}, 304),
+            "http_audio_range": ({"Range": "bytes=0-16383"}, 206),
+        }
+        for name, (headers, expected) in replays.items():
+            latency, errors = [], 0
+            for _ in range(iterations):
+                started = time.perf_counter()
+                response = await client.get(audio_url, headers={**TENANT_HEADERS, **headers})
+                if response.status_code != expected:
+                    errors += 1
+                    continue
+                latency.append((time.perf_counter() - started) * 1000.0)
+            results[name] = {
+                "latency_ms": percentiles(latency),
+                "bytes": len(response.content),
+                "errors": errors,
+            }
+    return results
+
+
+def bench_http(iterations):
+    return asyncio.run(_bench_http_async(iterations))
+
+
+# --- gRPC (servicer doğrudan, ağ yok) ---
+class FakeServicerContext:
+    def __init__(self, tenant_id="benchmark", timeout=None):
+        self._metadata = (("x-tenant-id", tenant_id), ("x-trace-id", "offline-bench"))
+        self._deadline = time.monotonic() + timeout if timeout else None
+        self.trailing_metadata = ()
+        self.code = None
+        self.details = None
+
+    def invocation_metadata(self):
+        return self._metadata
+
+    def cancelled(self):
+        return False
+
+    def time_remaining(self):
+        if self._deadline is None:
+            return None
+        return max(self._deadline - time.monotonic(), 0.0)
+
+    def set_trailing_metadata(self, metadata):
+        self.trailing_metadata = metadata
+
+    async def abort(self, code, details=""):
+        self.code, self.details = code, details
+        raise RuntimeError(f"aborted: {code} {details}")
+
+
+def grpc_request(text_key="medium", sample_rate=16000, **overrides):
+    fields = {
+        "text": TEXTS[text_key],
+        "language_code": "tr",
+        "sample_rate": sample_rate,
+        "temperature": 0.0,
+        "speed": 0.0,
+        "top_k": 0,
+        "top_p": 0.0,
+        "repetition_penalty": 0.0,
+        "speaker_wav": b"",
+        "speaker_id": "",
+    }
+    fields.update(overrides)
+    return types.SimpleNamespace(**fields)
+
+
+async def _bench_grpc_async(iterations):
+    from app.grpc_server import TtsCoquiServicer
+
+    servicer = TtsCoquiServicer()
+    latency, ttfb, errors = [], [], 0
+    for _ in range(iterations):
+        context = FakeServicerContext()
+        started = time.perf_counter()
+        first = None
+        try:
+            async for message in servicer.CoquiSynthesizeStream(grpc_request(), context):
+                if first is None and message.audio_chunk:
+                    first = time.perf_counter()
+        except Exception:
+            errors += 1
+            continue
+        latency.append((time.perf_counter() - started) * 1000.0)
+        if first is not None:
+            ttfb.append((first - started) * 1000.0)
+    return {
+        "grpc_stream": {
+            "latency_ms": percentiles(latency),
+            "ttfb_ms": percentiles(ttfb),
+            "errors": errors,
+        }
+    }
+
+
+def bench_grpc(iterations):
+    return asyncio.run(_bench_grpc_async(iterations))
+
+
+# --- BASELINE ---
+def flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+# Karşılaştırma için ölçülen eski yollar (tensor gidiş-dönüşü, dizin taraması): servisin
+# çalıştırdığı kod değildir, regresyon kontrolüne girmez.
+REFERENCE_METRICS = ("_legacy.", ".directory_scan_us.")
+# Isınmaya, makine yüküne ve örnek sayısına duyarlı ölçümler (mikrosaniye mikro-benchmark'ları,
+# tracemalloc sayıları): yalnızca tam koşuda, p50 üzerinden ve daha geniş toleransla karşılaştırılır.
+def _is_micro(key):
+    return key.startswith("allocations.") or any(
+        part.endswith("_us") or part.startswith("us_") or "_us_" in part
+        for part in key.split(".")
+    )
+
+
+def compare_to_baseline(report, baseline, tolerance, micro_tolerance, floor_ms, floor_us):
+    """
+    Tüm metrikler 'düşük olan iyidir'. Sınır = baseline * (1 + tolerans) + mutlak pay;
+    baseline'ı 0 olan metrikler yalnızca mutlak payla kontrol edilir. Mutlak pay
+    mikrosaniye metriklerinde floor_us, diğerlerinde floor_ms'tir.
+
+    - ms gecikmeleri: p50 her zaman, p90 yalnızca tam koşuda (baseline kadar iterasyon).
+    - Mikro ölçümler: yalnızca tam koşuda p50, micro_tolerance ile.
+    Baseline'dan az iterasyonlu hızlı koşuda (ör. --iterations 3) yalnızca ms p50'leri kalır.
+    """
+    current = flatten(report["results"])
+    full_run = report["meta"]["iterations"] >= baseline["meta"]["iterations"]
+    regressions = []
+    for key, base_value in flatten(baseline["results"]).items():
+        if key not in current or any(marker in key for marker in REFERENCE_METRICS):
+            continue
+        if _is_micro(key):
+            if not (full_run and key.endswith("p50")):
+                continue
+            relative = micro_tolerance
+            floor = floor_ms if key.startswith("allocations.") else floor_us
+        else:
+            if not key.endswith(("p50", "p90", "errors") if full_run else ("p50", "errors")):
+                continue
+            relative, floor = tolerance, floor_ms
+        limit = max(base_value, 0.0) * (1.0 + relative) + floor
+        if current[key] > limit:
+            regressions.append(
+                {"metric": key, "baseline": base_value, "current": current[key], "limit": round(limit, 3)}
+            )
+    return regressions
+
+
+def print_summary(report):
+    table = Table(title="Offline Benchmark (StubXtts)")
+    table.add_column("Scenario")
+    table.add_column("p50")
+    table.add_column("p90")
+    table.add_column("p99")
+    flat = flatten(report["results"])
+    for key in sorted(flat):
+        if key.endswith(".p50") and ("overhead_ms" in key or "ttfb_ms" in key or "latency_ms" in key):
+            base = key[: -len(".p50")]
+            table.add_row(
+                base,
+                f"{flat[key]:.2f}",
+                f"{flat.get(base + '.p90', 0):.2f}",
+                f"{flat.get(base + '.p99', 0):.2f}",
+            )
+    console.print(table)
+
+
+def run(args):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="sentiric-bench-")
+    install_stub_engine(
+        work_dir, token_cost_ms=args.token_ms, chunk_cost_ms=args.chunk_ms
+    )
+
+    # Isınma: latent hesaplama ve ilk import maliyetleri ölçüme girmesin.
+    from app.core.engine import tts_engine
+
+    tts_engine.synthesize(_params("short"))
+
+    results = {
+        "engine_unary": bench_engine_unary(args.iterations),
+        "engine_stream": bench_engine_stream(args.iterations),
+        "engine_stream_resampled": bench_engine_stream(args.iterations, sample_rate=16000),
+        "allocations": bench_allocations(max(3, args.iterations // 5)),
+        "stream_postprocess": bench_stream_postprocess(args.iterations),
+        "cancellation": bench_cancellation(max(5, args.iterations // 2)),
+        "deadlines": bench_deadlines(max(3, args.iterations // 5)),
+        "tenant_fairness": bench_tenant_fairness(args.iterations),
+        "shared_cache": bench_shared_cache(max(5, args.iterations // 2)),
+        "history": bench_history(max(5, args.iterations // 2)),
+        "scene": bench_scene(max(3, args.iterations // 5)),
+        "batch": bench_batch(max(2, args.iterations // 10)),
+    }
+    for name, bench in (("http", bench_http), ("grpc", bench_grpc)):
+        if name in args.skip:
+            continue
+        try:
+            results.update(bench(args.iterations))
+        except ImportError as e:
+            console.print(f"[yellow]⚠️ {name} benchmark skipped: {e}[/yellow]")
+
+    import torch
+
+    report = {
+        "meta": {
+            "token_cost_ms": args.token_ms,
+            "chunk_cost_ms": args.chunk_ms,
+            "iterations": args.iterations,
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    console.print(f"[bold green]📄 Report written: {args.output}[/bold green]")
+    print_summary(report)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        console.print(f"[bold green]📌 Baseline updated: {args.baseline}[/bold green]")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        console.print("[yellow]ℹ️ No baseline found, run with --update-baseline.[/yellow]")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(
+        report, baseline, args.tolerance, args.micro_tolerance, args.floor_ms, args.floor_us
+    )
+    if regressions:
+        console.print(f"[bold red]❌ {len(regressions)} regression(s) vs baseline:[/bold red]")
+        for r in regressions:
+            console.print(
+                f"   {r['metric']}: {r['current']} > {r['limit']} (baseline {r['baseline']})"
+            )
+        return 1
+    console.print("[bold green]✅ No regressions vs baseline.[/bold green]")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sentiric TTS offline benchmark (stub model)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--token-ms", type=float, default=2.0, help="Stub GPT cost per token")
+    parser.add_argument("--chunk-ms", type=float, default=5.0, help="Stub vocoder cost per chunk")
+    parser.add_argument("--output", default=os.path.join(OUTPUT_DIR, "offline_benchmark.json"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown")
+    parser.add_argument(
+        "--micro-tolerance", type=float, default=1.0, help="Allowed relative slowdown for micro-benchmarks"
+    )
+    parser.add_argument("--floor-ms", type=float, default=5.0, help="Absolute slack for millisecond metrics")
+    parser.add_argument("--floor-us", type=float, default=250.0, help="Absolute slack for microsecond metrics")
+    parser.add_argument("--skip", nargs="*", default=[], choices=["http", "grpc"])
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args()))
@@ -0,0 +1,98 @@
+"""
+Redis protokolü (RESP2) konuşan süreç içi sunucu.
+
+RedisBackend'i gerçek Redis olmadan ölçmek için yerel yerine geçen: yalnızca önbelleğin
+kullandığı komutları (GET, SET [EX], MGET, EXISTS, PERSIST, SADD, SMEMBERS, DEL, PING,
+AUTH, SELECT) uygular. Süre aşımı (EX) kabul edilir ama uygulanmaz. Ağ gidiş-dönüşü
+komut başına sabit bir gecikmedir (rtt_ms, time.sleep) — boru hattındaki komutlar için
+de ayrı ayrı uygulanır; yalnızca MGET/GET karşılaştırması için kullanılmalıdır.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            if self.server.rtt_ms > 0:
+                time.sleep(self.server.rtt_ms / 1000.0)
+            # Yanıt parçaları tek kopyayla birleştirilir (büyük MGET yanıtları için).
+            self.wfile.write(b"".join(self.server.execute(command)))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line.startswith(b"*"):
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+def _bulk(value) -> list:
+    return [b"$-1\r\n"] if value is None else [b"$%d\r\n" % len(value), value, b"\r\n"]
+
+
+def _array(values) -> list:
+    parts = [b"*%d\r\n" % len(values)]
+    for value in values:
+        parts += _bulk(value)
+    return parts
+
+
+class StubRespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, rtt_ms: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _RespHandler)
+        self.rtt_ms = rtt_ms
+        self.data = {}
+        self.sets = {}
+        self.commands = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"redis://{host}:{port}/0"
+
+    def execute(self, args) -> list:
+        name = args[0].upper()
+        with self._lock:
+            self.commands += 1
+            if name in (b"PING", b"AUTH", b"SELECT"):
+                return [b"+OK\r\n"]
+            if name == b"GET":
+                return _bulk(self.data.get(args[1]))
+            if name == b"MGET":
+                return _array([self.data.get(key) for key in args[1:]])
+            if name == b"SET":
+                self.data[args[1]] = args[2]
+                return [b"+OK\r\n"]
+            if name == b"EXISTS":
+                return [b":%d\r\n" % sum(key in self.data for key in args[1:])]
+            if name == b"PERSIST":
+                return [b":%d\r\n" % (args[1] in self.data)]
+            if name == b"DEL":
+                removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+                return [b":%d\r\n" % removed]
+            if name == b"SADD":
+                members = self.sets.setdefault(args[1], set())
+                added = len(set(args[2:]) - members)
+                members.update(args[2:])
+                return [b":%d\r\n" % added]
+            if name == b"SMEMBERS":
+                return _array(sorted(self.sets.get(args[1], ())))
+        return [b"-ERR unknown command '%s'\r\n" % name]
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
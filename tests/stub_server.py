@@ -0,0 +1,49 @@
+"""
+Stub modelli yerel sunucu: gerçek FastAPI uygulamasını StubXtts ile ayağa kaldırır.
+
+Yük testleri (load_generator.py) GPU ve model indirmeden bu sunucuya karşı
+çalıştırılabilir. gRPC sunucusu uygulamanın kendi lifespan'i içinde başlar ve
+mTLS sertifikaları yoksa (mimari kural gereği) başlamaz; bu durumda yalnızca HTTP
+senaryoları kullanılabilir.
+
+Kullanım:
+    python3 tests/stub_server.py --port 14030 --token-ms 2 --chunk-ms 5
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault("TTS_COQUI_SERVICE_DEVICE", "cpu")
+
+from stub_xtts import install_stub_engine  # noqa: E402
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sentiric TTS stub-model server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=14030)
+    parser.add_argument("--token-ms", type=float, default=2.0, help="Stub GPT cost per token")
+    parser.add_argument("--chunk-ms", type=float, default=5.0, help="Stub vocoder cost per chunk")
+    parser.add_argument("--work-dir", default=None, help="Speakers/cache directory (default: temp)")
+    return parser.parse_args(argv)
+
+
+def main(args):
+    import uvicorn
+
+    # initialize() model zaten yüklüyse hiçbir şey yapmaz; bu yüzden stub,
+    # lifespan çalışmadan önce kurulmalıdır.
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="sentiric-stub-server-")
+    install_stub_engine(work_dir, token_cost_ms=args.token_ms, chunk_cost_ms=args.chunk_ms)
+
+    from app.main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main(parse_args())
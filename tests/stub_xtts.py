@@ -0,0 +1,190 @@
+"""
+Deterministik XTTS stub'ı.
+
+Gerçek model ve GPU olmadan motorun (TTSEngine), FastAPI uygulamasının ve gRPC
+servicer'ının BİZE AİT kodunu ölçmek için kullanılır. GPT maliyeti token başına,
+vocoder maliyeti chunk başına sabit bir süredir (time.sleep, GIL'i bırakır —
+gerçek torch op'ları gibi).
+"""
+
+import os
+import time
+import wave
+from collections import defaultdict
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from torch import nn
+from TTS.tts.models.xtts import Xtts
+
+SAMPLE_RATE = 24000
+# XTTS'te bir GPT ses token'ı ~1024 örneğe (24 kHz) karşılık gelir.
+SAMPLES_PER_TOKEN = 1024
+
+
+def _tone(num_samples: int, offset: int = 0) -> torch.Tensor:
+    t = (np.arange(num_samples, dtype=np.float32) + offset) / SAMPLE_RATE
+    return torch.from_numpy(0.3 * np.sin(2 * np.pi * 220.0 * t).astype(np.float32))
+
+
+class StubHifiDecoder(nn.Module):
+    """nn.Module olduğu için motorun forward hook'ları (vocoder zamanlaması) çalışır."""
+
+    def __init__(self, chunk_cost_ms: float):
+        super().__init__()
+        self.chunk_cost_ms = chunk_cost_ms
+        self.calls = 0
+
+    def forward(self, latents: torch.Tensor, g=None) -> torch.Tensor:
+        self.calls += 1
+        if self.chunk_cost_ms > 0:
+            time.sleep(self.chunk_cost_ms / 1000.0)
+        wav = _tone(latents.shape[1] * SAMPLES_PER_TOKEN).view(1, 1, -1)
+        return wav.expand(latents.shape[0], 1, -1).contiguous()
+
+
+class StubTokenizer:
+    char_limits = defaultdict(lambda: 250)
+
+    def encode(self, text, lang=None):
+        return [1] * len(text)
+
+
+class StubGptInference(nn.Module):
+    """Token başına bir forward: motorun GPT adımı hook'u (iptal kontrolü) çalışır."""
+
+    def __init__(self, token_cost_ms: float):
+        super().__init__()
+        self.token_cost_ms = token_cost_ms
+
+    def forward(self) -> None:
+        if self.token_cost_ms > 0:
+            time.sleep(self.token_cost_ms / 1000.0)
+
+
+class StubGpt:
+    """Motorun akış hattının kullandığı GPT yüzeyi: token başına sabit maliyet."""
+
+    def __init__(self, owner: "StubXtts"):
+        self.owner = owner
+        self.gpt_inference = StubGptInference(owner.token_cost_ms)
+
+    def compute_embeddings(self, cond_latents, text_inputs):
+        return text_inputs
+
+    def get_generator(self, fake_inputs, **kwargs):
+        count = max(4, int(fake_inputs.shape[-1] * self.owner.tokens_per_char))
+        for _ in range(count):
+            self.gpt_inference()
+            yield torch.zeros(1, dtype=torch.long), torch.zeros(1, 1)
+
+
+class StubXtts:
+    handle_chunks = Xtts.handle_chunks
+
+    def __init__(
+        self,
+        token_cost_ms: float = 2.0,
+        chunk_cost_ms: float = 5.0,
+        tokens_per_char: float = 1.0,
+        stream_chunk_size: int = 20,
+    ):
+        self.token_cost_ms = token_cost_ms
+        self.tokens_per_char = tokens_per_char
+        self.stream_chunk_size = stream_chunk_size
+        self.hifigan_decoder = StubHifiDecoder(chunk_cost_ms)
+        self.device = torch.device("cpu")
+        self.gpt = StubGpt(self)
+        self.tokenizer = StubTokenizer()
+        self.args = SimpleNamespace(gpt_max_text_tokens=10**6)
+
+    def token_count(self, text: str) -> int:
+        return max(4, int(len(text) * self.tokens_per_char))
+
+    def _generate_tokens(self, count: int):
+        for _ in range(count):
+            self.gpt.gpt_inference()
+        return torch.zeros(1, count, 1)
+
+    def get_conditioning_latents(self, audio_path=None, **kwargs):
+        return torch.zeros(1, 32, 1024), torch.zeros(1, 512, 1)
+
+    def get_speaker_embedding(self, audio, sr):
+        return torch.zeros(1, 512, 1)
+
+    def get_gpt_cond_latents(self, audio, sr, length=30, chunk_length=4):
+        return torch.zeros(1, 32, 1024)
+
+    def inference(self, text, language, gpt_cond_latent, speaker_embedding, **kwargs):
+        latents = self._generate_tokens(self.token_count(text))
+        wav = self.hifigan_decoder(latents, g=speaker_embedding)
+        return {"wav": wav.squeeze().numpy()}
+
+    def inference_stream(
+        self, text, language, gpt_cond_latent, speaker_embedding, **kwargs
+    ):
+        remaining = self.token_count(text)
+        chunk_size = kwargs.get("stream_chunk_size", self.stream_chunk_size)
+        while remaining > 0:
+            count = min(chunk_size, remaining)
+            remaining -= count
+            latents = self._generate_tokens(count)
+            yield self.hifigan_decoder(latents, g=speaker_embedding).squeeze()
+
+
+def _write_reference_wav(path: str, seconds: float = 1.0):
+    samples = (_tone(int(SAMPLE_RATE * seconds)).numpy() * 32767).astype(np.int16)
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(samples.tobytes())
+
+
+def install_stub_engine(work_dir: str, speakers=None, **stub_kwargs) -> StubXtts:
+    """
+    Global `tts_engine`'i geçici dizinlere yönlendirir ve modeli StubXtts ile değiştirir.
+    TTS_COQUI_SERVICE_DEVICE=cpu, app import edilmeden ÖNCE ayarlanmış olmalıdır.
+    """
+    from app.core.audio_cache import audio_cache
+    from app.core.cache_backends import FilesystemBackend
+    from app.core.config import settings
+    from app.core.engine import SmartMemoryManager, tts_engine
+    from app.core.history import history_store
+    from app.core.jobs import job_manager
+    from app.core.lang_id import language_identifier
+
+    speakers_dir = os.path.join(work_dir, "speakers")
+    cache_dir = os.path.join(work_dir, "cache")
+    latents_dir = os.path.join(cache_dir, "latents")
+    for path in (speakers_dir, cache_dir, latents_dir):
+        os.makedirs(path, exist_ok=True)
+
+    for name in speakers or [settings.DEFAULT_SPEAKER, "F_TR_Kurumsal_Ece"]:
+        folder = os.path.join(speakers_dir, name)
+        os.makedirs(folder, exist_ok=True)
+        _write_reference_wav(os.path.join(folder, "neutral.wav"))
+    _write_reference_wav(os.path.join(speakers_dir, "system_default.wav"))
+
+    tts_engine.SPEAKERS_DIR = speakers_dir
+    tts_engine.CACHE_DIR = cache_dir
+    tts_engine.LATENTS_DIR = latents_dir
+    tts_engine.speaker_registry.root_dir = speakers_dir
+    audio_cache.backend = FilesystemBackend(
+        os.path.join(cache_dir, "audio"), settings.AUDIO_CACHE_DISK_MAX_MB * 1024 * 1024
+    )
+    job_manager.root_dir = os.path.join(cache_dir, "jobs")
+    history_store.db_path = os.path.join(work_dir, "history", "history.db")
+
+    stub = StubXtts(**stub_kwargs)
+    tts_engine.model = stub
+    tts_engine.native_sample_rate = SAMPLE_RATE
+    tts_engine.memory_manager = SmartMemoryManager("cpu")
+    tts_engine._install_vocoder_stage()
+    tts_engine._install_stage_hooks()
+    tts_engine._install_cancellation_hook()
+
+    language_identifier.load()
+    tts_engine.refresh_speakers(force=True)
+    return stub
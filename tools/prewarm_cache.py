@@ -0,0 +1,99 @@
+"""
+Prompt kataloğunu kalıcı ses önbelleğine işler (deploy / scale-up sonrası ısınma).
+
+Katalog YAML veya CSV olabilir. Alanlar: id, text, speaker, language, format,
+sample_rate, temperature, speed, pin. Eksik alanlar servis varsayılanlarını alır.
+
+    # prompts.yaml
+    defaults: {speaker: F_TR_Kurumsal_Ece, language: tr, format: wav}
+    prompts:
+      - {id: welcome, text: "Hoş geldiniz.", pin: true}
+      - {id: hold, text: "Lütfen hatta kalınız."}
+
+Kullanım:
+    python3 tools/prewarm_cache.py prompts.yaml --workers 2 --report /tmp/prewarm.csv
+    python3 tools/prewarm_cache.py prompts.csv --check     # model yüklemeden eksikleri listele
+
+Servis başlangıcında aynı işlem TTS_COQUI_SERVICE_PREWARM_CATALOG ile tetiklenir.
+"""
+
+import os
+import sys
+import csv
+import json
+import logging
+import argparse
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.core.logging_utils import setup_logging  # noqa: E402
+from app.core.engine import tts_engine  # noqa: E402
+from app.core.audio_cache import audio_cache  # noqa: E402
+from app.core.prewarm import load_catalog, prewarm  # noqa: E402
+
+logger = logging.getLogger("PREWARM-CLI")
+
+
+def write_report(path, results):
+    rows = [asdict(r) for r in results]
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["id"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def check(entries):
+    missing = 0
+    for entry in entries:
+        key = audio_cache.key(entry.params, entry.params["output_format"])
+        cached = audio_cache.contains(key)
+        missing += 0 if cached else 1
+        logger.info(
+            f"{entry.id}: {'cached' if cached else 'MISSING'}",
+            extra={
+                "event": "PREWARM_CHECK",
+                "attributes": {"id": entry.id, "key": key, "cached": cached},
+            },
+        )
+    logger.info(
+        f"{len(entries) - missing}/{len(entries)} catalog entries cached.",
+        extra={"event": "PREWARM_CHECK_COMPLETE"},
+    )
+    return 1 if missing else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sentiric TTS prompt cache prewarmer")
+    parser.add_argument("catalog", help="YAML (.yaml/.yml) or CSV prompt catalog")
+    parser.add_argument("--workers", type=int, default=settings.PREWARM_WORKERS)
+    parser.add_argument("--force", action="store_true", help="Re-render even if cached")
+    parser.add_argument("--check", action="store_true", help="Only report cache coverage")
+    parser.add_argument("--report", default=None, help="Per-prompt report (.csv or .json)")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    entries = load_catalog(args.catalog)
+    if not entries:
+        logger.error("Catalog is empty or invalid.", extra={"event": "PREWARM_CATALOG_EMPTY"})
+        return 2
+
+    audio_cache.load()
+    if args.check:
+        tts_engine.refresh_speakers(force=True)
+        return check(entries)
+
+    tts_engine.initialize()
+    results = prewarm(entries, workers=args.workers, force=args.force)
+    if args.report:
+        write_report(args.report, results)
+    return 1 if any(r.status == "error" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())